@@ -1,5 +1,12 @@
-from .events import VoiceStreamEvent, VoiceStreamEventAudio, VoiceStreamEventLifecycle
+from .codec import alaw_decode, alaw_encode, mulaw_decode, mulaw_encode
+from .events import (
+    VoiceStreamEvent,
+    VoiceStreamEventAudio,
+    VoiceStreamEventLifecycle,
+    VoiceTurnTimings,
+)
 from .exceptions import STTWebsocketConnectionError
+from .frame_buffer import AudioFrameBuffer
 from .input import AudioInput, StreamedAudioInput
 from .model import (
     StreamedTranscriptionSession,
@@ -12,10 +19,15 @@ from .model import (
 from .models.openai_model_provider import OpenAIVoiceModelProvider
 from .models.openai_stt import OpenAISTTModel, OpenAISTTTranscriptionSession
 from .models.openai_tts import OpenAITTSModel
+from .output_format import AudioEncoding, AudioOutputEncoder
 from .pipeline import VoicePipeline
 from .pipeline_config import VoicePipelineConfig
+from .resample import StreamingResampler
 from .result import StreamedAudioResult
-from .utils import get_sentence_based_splitter
+from .speculation import SpeculationSettings
+from .tts_cache import CachedTTSModel, TTSCacheStats
+from .utils import IncrementalTextSplitter, get_sentence_based_splitter
+from .vad import SilenceGate, SilenceGateSettings, VADEvent, VoiceActivityDetector
 from .workflow import (
     SingleAgentVoiceWorkflow,
     SingleAgentWorkflowCallbacks,
@@ -42,10 +54,27 @@ __all__ = [
     "VoicePipeline",
     "VoicePipelineConfig",
     "get_sentence_based_splitter",
+    "IncrementalTextSplitter",
     "VoiceWorkflowHelper",
     "VoiceWorkflowBase",
     "SingleAgentWorkflowCallbacks",
     "StreamedTranscriptionSession",
     "OpenAISTTTranscriptionSession",
     "STTWebsocketConnectionError",
+    "mulaw_decode",
+    "mulaw_encode",
+    "alaw_decode",
+    "alaw_encode",
+    "CachedTTSModel",
+    "TTSCacheStats",
+    "StreamingResampler",
+    "VoiceActivityDetector",
+    "VADEvent",
+    "SilenceGate",
+    "SilenceGateSettings",
+    "AudioFrameBuffer",
+    "VoiceTurnTimings",
+    "SpeculationSettings",
+    "AudioEncoding",
+    "AudioOutputEncoder",
 ]
@@ -0,0 +1,29 @@
+"""Conversion between int16 PCM and float32 samples in [-1, 1], shared by everything in
+`agents.voice` that handles both, so the same audio always comes out at the same level."""
+
+from __future__ import annotations
+
+from .imports import np, npt
+
+PCM16_FULL_SCALE = 32768
+"""The int16 value of a float32 sample of 1.0. A power of two, so int16 -> float32 -> int16 is
+exact."""
+
+
+def pcm16_to_float(
+    pcm: npt.NDArray[np.int16 | np.float32], out: npt.NDArray[np.int16 | np.float32] | None = None
+) -> npt.NDArray[np.float32]:
+    """Scale int16 samples into [-1, 1), into `out` if given."""
+    return np.multiply(pcm, np.float32(1 / PCM16_FULL_SCALE), out=out, dtype=np.float32)
+
+
+def float_to_pcm16(
+    audio: npt.NDArray[np.int16 | np.float32], out: npt.NDArray[np.int16 | np.float32] | None = None
+) -> npt.NDArray[np.int16]:
+    """Scale float samples to int16, clipping anything outside [-1, 1), into `out` if given."""
+    scaled = np.multiply(audio, np.float32(PCM16_FULL_SCALE), dtype=np.float32)
+    np.clip(scaled, -PCM16_FULL_SCALE, PCM16_FULL_SCALE - 1, out=scaled)
+    if out is None:
+        return scaled.astype(np.int16)
+    out[:] = scaled
+    return out.view(np.int16)
@@ -0,0 +1,146 @@
+"""G.711 mu-law / A-law codecs for telephony audio.
+
+Both directions are implemented as lookup tables built once at import time, so encoding or
+decoding a chunk is a single vectorized `np.take` with no per-sample Python work. Every function
+accepts an optional `out` array so callers on a hot path can reuse their buffers between frames.
+"""
+
+from __future__ import annotations
+
+from ..exceptions import UserError
+from ._pcm import float_to_pcm16
+from .imports import np, npt
+
+_MULAW_BIAS = 0x84
+_MULAW_CLIP = 8159
+_MULAW_SEGMENT_ENDS = np.array(
+    [0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF], dtype=np.int32
+)
+_ALAW_SEGMENT_ENDS = np.array([0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF], dtype=np.int32)
+
+
+def _build_mulaw_decode_table() -> npt.NDArray[np.int16]:
+    u_val = ~np.arange(256, dtype=np.int32) & 0xFF
+    t = ((u_val & 0x0F) << 3) + _MULAW_BIAS
+    t <<= (u_val & 0x70) >> 4
+    return np.where(u_val & 0x80, _MULAW_BIAS - t, t - _MULAW_BIAS).astype(np.int16)
+
+
+def _build_alaw_decode_table() -> npt.NDArray[np.int16]:
+    a_val = np.arange(256, dtype=np.int32) ^ 0x55
+    t = (a_val & 0x0F) << 4
+    seg = (a_val & 0x70) >> 4
+    t = np.where(seg == 0, t + 8, t + 0x108)
+    t = np.where(seg > 1, t << np.maximum(seg - 1, 0), t)
+    return np.where(a_val & 0x80, t, -t).astype(np.int16)
+
+
+def _build_mulaw_encode_table() -> npt.NDArray[np.uint8]:
+    # Indexed by the int16 sample reinterpreted as uint16.
+    pcm = np.arange(65536, dtype=np.uint16).view(np.int16).astype(np.int32) >> 2
+    mask = np.where(pcm < 0, 0x7F, 0xFF)
+    pcm = np.minimum(np.abs(pcm), _MULAW_CLIP) + (_MULAW_BIAS >> 2)
+    seg = np.searchsorted(_MULAW_SEGMENT_ENDS, pcm)
+    u_val = (np.minimum(seg, 7) << 4) | ((pcm >> (seg + 1)) & 0x0F)
+    u_val = np.where(seg >= 8, 0x7F, u_val)
+    return (u_val ^ mask).astype(np.uint8)
+
+
+def _build_alaw_encode_table() -> npt.NDArray[np.uint8]:
+    pcm = np.arange(65536, dtype=np.uint16).view(np.int16).astype(np.int32) >> 3
+    mask = np.where(pcm >= 0, 0xD5, 0x55)
+    pcm = np.where(pcm >= 0, pcm, -pcm - 1)
+    seg = np.searchsorted(_ALAW_SEGMENT_ENDS, pcm)
+    a_val = (np.minimum(seg, 7) << 4) | (
+        np.where(seg < 2, pcm >> 1, pcm >> np.maximum(seg, 1)) & 0x0F
+    )
+    a_val = np.where(seg >= 8, 0x7F, a_val)
+    return (a_val ^ mask).astype(np.uint8)
+
+
+_MULAW_DECODE_TABLE = _build_mulaw_decode_table()
+_ALAW_DECODE_TABLE = _build_alaw_decode_table()
+_MULAW_ENCODE_TABLE = _build_mulaw_encode_table()
+_ALAW_ENCODE_TABLE = _build_alaw_encode_table()
+
+
+def _as_codes(
+    data: bytes | bytearray | memoryview | npt.NDArray[np.uint8],
+) -> npt.NDArray[np.uint8]:
+    if isinstance(data, np.ndarray):
+        if data.dtype != np.uint8:
+            raise UserError("Encoded audio must be a numpy array of uint8")
+        return data
+    return np.frombuffer(data, dtype=np.uint8)
+
+
+def _as_pcm16_index(pcm: npt.NDArray[np.int16 | np.float32]) -> npt.NDArray[np.uint16]:
+    if pcm.dtype == np.float32:
+        pcm = float_to_pcm16(pcm)
+    elif pcm.dtype != np.int16:
+        raise UserError("Buffer must be a numpy array of int16 or float32")
+    return pcm.reshape(-1).view(np.uint16)
+
+
+def mulaw_decode(
+    data: bytes | bytearray | memoryview | npt.NDArray[np.uint8],
+    out: npt.NDArray[np.int16] | None = None,
+) -> npt.NDArray[np.int16]:
+    """Decode G.711 mu-law bytes into 16-bit PCM samples.
+
+    Args:
+        data: The encoded audio, one byte per sample.
+        out: An optional int16 array of the same length to write the samples into.
+
+    Returns:
+        The decoded int16 samples.
+    """
+    return np.take(_MULAW_DECODE_TABLE, _as_codes(data), out=out)
+
+
+def mulaw_encode(
+    pcm: npt.NDArray[np.int16 | np.float32],
+    out: npt.NDArray[np.uint8] | None = None,
+) -> npt.NDArray[np.uint8]:
+    """Encode 16-bit (or float32) PCM samples as G.711 mu-law.
+
+    Args:
+        pcm: The audio samples. float32 samples are expected to be in the range [-1, 1].
+        out: An optional uint8 array of the same length to write the encoded bytes into.
+
+    Returns:
+        The encoded audio, one byte per sample. Call `.tobytes()` to get the wire payload.
+    """
+    return np.take(_MULAW_ENCODE_TABLE, _as_pcm16_index(pcm), out=out)
+
+
+def alaw_decode(
+    data: bytes | bytearray | memoryview | npt.NDArray[np.uint8],
+    out: npt.NDArray[np.int16] | None = None,
+) -> npt.NDArray[np.int16]:
+    """Decode G.711 A-law bytes into 16-bit PCM samples.
+
+    Args:
+        data: The encoded audio, one byte per sample.
+        out: An optional int16 array of the same length to write the samples into.
+
+    Returns:
+        The decoded int16 samples.
+    """
+    return np.take(_ALAW_DECODE_TABLE, _as_codes(data), out=out)
+
+
+def alaw_encode(
+    pcm: npt.NDArray[np.int16 | np.float32],
+    out: npt.NDArray[np.uint8] | None = None,
+) -> npt.NDArray[np.uint8]:
+    """Encode 16-bit (or float32) PCM samples as G.711 A-law.
+
+    Args:
+        pcm: The audio samples. float32 samples are expected to be in the range [-1, 1].
+        out: An optional uint8 array of the same length to write the encoded bytes into.
+
+    Returns:
+        The encoded audio, one byte per sample. Call `.tobytes()` to get the wire payload.
+    """
+    return np.take(_ALAW_ENCODE_TABLE, _as_pcm16_index(pcm), out=out)
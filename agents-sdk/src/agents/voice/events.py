@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Literal, Union
 
 from typing_extensions import TypeAlias
@@ -12,19 +12,41 @@ from .imports import np, npt
 class VoiceStreamEventAudio:
     """Streaming event from the VoicePipeline"""
 
-    data: npt.NDArray[np.int16 | np.float32] | None
-    """The audio data."""
+    data: npt.NDArray[np.int16 | np.float32 | np.uint8] | None
+    """The audio data. uint8 for the G.711 `output_encoding`s."""
 
     type: Literal["voice_stream_event_audio"] = "voice_stream_event_audio"
     """The type of event."""
 
 
+@dataclass
+class VoiceTurnTimings:
+    """When each stage of a turn first produced output, as `time.monotonic()` timestamps.
+
+    A stage that hasn't happened yet is None. The same object is filled in as the turn goes on,
+    so one taken from `turn_started` is complete by the time the turn ends.
+    """
+
+    transcript_at: float | None = None
+    """When the pipeline received the final transcript of the user's turn."""
+
+    first_text_at: float | None = None
+    """When the workflow yielded its first text, e.g. the first token from the LLM."""
+
+    first_audio_at: float | None = None
+    """When the first audio byte came back from the TTS model."""
+
+
 @dataclass
 class VoiceStreamEventLifecycle:
     """Streaming event from the VoicePipeline"""
 
-    event: Literal["turn_started", "turn_ended", "session_ended"]
-    """The event that occurred."""
+    event: Literal["turn_started", "turn_ended", "turn_interrupted", "session_ended"]
+    """The event that occurred. `turn_interrupted` is emitted instead of `turn_ended` when a turn
+    is cut short by `StreamedAudioResult.interrupt()`; no more audio for that turn will follow."""
+
+    timings: VoiceTurnTimings | None = field(default=None, compare=False)
+    """For turn events, the timings of the turn. None for `session_ended`."""
 
     type: Literal["voice_stream_event_lifecycle"] = "voice_stream_event_lifecycle"
     """The type of event."""
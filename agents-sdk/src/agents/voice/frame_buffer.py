@@ -0,0 +1,145 @@
+"""A growable PCM buffer for collecting audio chunk by chunk without joining bytes objects."""
+
+from __future__ import annotations
+
+from typing import Union
+
+from ..exceptions import UserError
+from ._pcm import float_to_pcm16, pcm16_to_float
+from .imports import np, npt
+
+# Enough for 200 ms of 24 kHz audio before the first time the buffer has to grow
+DEFAULT_CAPACITY = 4800
+
+AudioChunk = Union[bytes, bytearray, memoryview, "npt.NDArray[np.int16 | np.float32]"]
+
+
+class AudioFrameBuffer:
+    """An append-only buffer of mono PCM samples, emptied and reused rather than reallocated.
+
+    Raw bytes (e.g. from a TTS response) and numpy arrays can be appended. Bytes are copied
+    straight into the buffer, so a chunk that ends half way through a sample is fine: the odd
+    byte is kept and completes a sample with the next chunk. Arrays of the other sample format are
+    converted on the way in. `view()` returns the whole samples held so far without copying, and
+    `drain()` converts them into a new array (or one you pass in) and empties the buffer.
+
+    Storage doubles when it runs out and is kept across `drain()` and `clear()`, so a buffer that
+    is reused for a stream stops allocating once it has seen its largest chunk.
+    """
+
+    def __init__(self, dtype: npt.DTypeLike = np.int16, capacity: int = DEFAULT_CAPACITY):
+        """Create a new buffer.
+
+        Args:
+            dtype: The sample format to store, int16 or float32 (in [-1, 1]).
+            capacity: How many samples to allocate up front.
+        """
+        self.dtype = np.dtype(dtype)
+        if self.dtype != np.int16 and self.dtype != np.float32:
+            raise UserError("AudioFrameBuffer dtype must be int16 or float32")
+        self._data: npt.NDArray[np.int16 | np.float32] = np.zeros(max(1, capacity), self.dtype)
+        self._bytes = self._data.view(np.uint8)
+        self._nbytes = 0
+
+    def __len__(self) -> int:
+        """Number of whole samples held."""
+        return self._nbytes // self.dtype.itemsize
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held, including an incomplete trailing sample."""
+        return self._nbytes
+
+    def _reserve(self, nbytes: int) -> None:
+        needed = self._nbytes + nbytes
+        if needed <= len(self._bytes):
+            return
+        capacity = max(needed, 2 * len(self._bytes))
+        grown = np.zeros(-(-capacity // self.dtype.itemsize), self.dtype)
+        grown_bytes = grown.view(np.uint8)
+        grown_bytes[: self._nbytes] = self._bytes[: self._nbytes]
+        self._data = grown
+        self._bytes = grown_bytes
+
+    def append(self, audio: AudioChunk) -> None:
+        """Add audio to the end of the buffer.
+
+        Args:
+            audio: Raw PCM bytes in the buffer's sample format, or an int16 or float32 array.
+        """
+        if isinstance(audio, np.ndarray):
+            self._append_array(audio)
+            return
+        raw = np.frombuffer(audio, dtype=np.uint8)
+        self._reserve(len(raw))
+        self._bytes[self._nbytes : self._nbytes + len(raw)] = raw
+        self._nbytes += len(raw)
+
+    def _append_array(self, audio: npt.NDArray[np.int16 | np.float32]) -> None:
+        if audio.dtype != np.int16 and audio.dtype != np.float32:
+            raise UserError("Buffer must be a numpy array of int16 or float32")
+        if self._nbytes % self.dtype.itemsize:
+            raise UserError("Cannot append samples after an incomplete sample")
+        audio = audio.reshape(-1)
+        self._reserve(len(audio) * self.dtype.itemsize)
+        start = len(self)
+        _convert(audio, self._data[start : start + len(audio)])
+        self._nbytes += len(audio) * self.dtype.itemsize
+
+    def view(self) -> npt.NDArray[np.int16 | np.float32]:
+        """The whole samples held, without copying. Only valid until the buffer is next changed."""
+        return self._data[: len(self)]
+
+    def tobytes(self) -> bytes:
+        """Everything held, including an incomplete trailing sample, as bytes."""
+        return self._bytes[: self._nbytes].tobytes()
+
+    def drain(
+        self,
+        dtype: npt.DTypeLike | None = None,
+        out: npt.NDArray[np.int16 | np.float32] | None = None,
+    ) -> npt.NDArray[np.int16 | np.float32]:
+        """Take the whole samples held out of the buffer in one conversion.
+
+        An incomplete trailing sample stays behind for the next `append`.
+
+        Args:
+            dtype: The sample format to return, int16 or float32. Defaults to the buffer's own.
+                int16 is divided by 32768 to make float32, and float32 is scaled by 32768 and
+                clipped to make int16.
+            out: An array of that dtype and `len(self)` samples to write into instead of
+                allocating one.
+
+        Returns:
+            The samples, owned by the caller.
+        """
+        target = self.dtype if dtype is None else np.dtype(dtype)
+        if target != np.int16 and target != np.float32:
+            raise UserError("Invalid output dtype")
+        samples = self.view()
+        if out is None:
+            out = np.empty(len(samples), dtype=target)
+        elif out.dtype != target or out.shape != samples.shape:
+            raise UserError("out must match the dtype and number of samples drained")
+        _convert(samples, out)
+
+        whole_bytes = len(samples) * self.dtype.itemsize
+        rest = self._nbytes - whole_bytes
+        self._bytes[:rest] = self._bytes[whole_bytes : self._nbytes]
+        self._nbytes = rest
+        return out
+
+    def clear(self) -> None:
+        """Empty the buffer, keeping its storage."""
+        self._nbytes = 0
+
+
+def _convert(
+    source: npt.NDArray[np.int16 | np.float32], dest: npt.NDArray[np.int16 | np.float32]
+) -> None:
+    if source.dtype == dest.dtype:
+        dest[:] = source
+    elif dest.dtype == np.float32:
+        pcm16_to_float(source, out=dest)
+    else:
+        float_to_pcm16(source, out=dest)
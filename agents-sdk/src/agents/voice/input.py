@@ -5,11 +5,20 @@ import base64
 import io
 import wave
 from dataclasses import dataclass
+from typing import TYPE_CHECKING, Literal
 
 from ..exceptions import UserError
+from ._pcm import float_to_pcm16
+from .codec import alaw_decode, mulaw_decode
 from .imports import np, npt
+from .resample import StreamingResampler
+
+if TYPE_CHECKING:
+    from .vad import VADEvent, VoiceActivityDetector
 
 DEFAULT_SAMPLE_RATE = 24000
+# VAD events kept for a consumer that isn't reading them; a reader takes them chunk by chunk
+_MAX_QUEUED_VAD_EVENTS = 32
 
 
 def _buffer_to_audio_file(
@@ -20,8 +29,7 @@ def _buffer_to_audio_file(
 ) -> tuple[str, io.BytesIO, str]:
     if buffer.dtype == np.float32:
         # convert to int16
-        buffer = np.clip(buffer, -1.0, 1.0)
-        buffer = (buffer * 32767).astype(np.int16)
+        buffer = float_to_pcm16(buffer)
     elif buffer.dtype != np.int16:
         raise UserError("Buffer must be a numpy array of int16 or float32")
 
@@ -50,26 +58,80 @@ class AudioInput:
 
     def to_base64(self) -> str:
         if self.buffer.dtype == np.float32:
-            self.buffer = np.clip(self.buffer, -1.0, 1.0)
-            self.buffer = (self.buffer * 32767).astype(np.int16)
+            self.buffer = float_to_pcm16(self.buffer)
         elif self.buffer.dtype != np.int16:
             raise UserError("Buffer must be a numpy array of int16 or float32")
 
         return base64.b64encode(self.buffer.tobytes()).decode("utf-8")
 
-    # ✅ This is the method you need to add for GPT-4o voice streaming to work
     @classmethod
-    def from_raw_bytes(cls, raw_bytes: bytes, sample_rate: int = 8000) -> "AudioInput":
-        print("📦 DEBUG: from_raw_bytes called inside AudioInput")  # Optional debug
-        audio_np = np.frombuffer(raw_bytes, dtype=np.int16)
+    def from_raw_bytes(
+        cls,
+        raw_bytes: bytes,
+        sample_rate: int = 8000,
+        encoding: Literal["pcm16", "mulaw", "alaw"] = "pcm16",
+    ) -> AudioInput:
+        """Create an `AudioInput` from raw mono audio bytes.
+
+        Args:
+            raw_bytes: The audio data.
+            sample_rate: The sample rate of the audio data.
+            encoding: How the bytes are encoded. Use `mulaw` for Twilio media streams.
+        """
+        if encoding == "mulaw":
+            audio_np = mulaw_decode(raw_bytes)
+        elif encoding == "alaw":
+            audio_np = alaw_decode(raw_bytes)
+        else:
+            audio_np = np.frombuffer(raw_bytes, dtype=np.int16)
         return cls(buffer=audio_np, frame_rate=sample_rate)
 
 
 class StreamedAudioInput:
     """Audio input represented as a stream of audio data. Used in streaming voice mode."""
 
-    def __init__(self):
+    def __init__(
+        self,
+        sample_rate: int = DEFAULT_SAMPLE_RATE,
+        vad: VoiceActivityDetector | None = None,
+    ):
+        """Create a new streamed audio input.
+
+        Args:
+            sample_rate: The sample rate of the audio you will add, e.g. 8000 for telephony
+                audio. Audio at any other rate than the 24 kHz the models expect is resampled as
+                it is added.
+            vad: An optional local voice activity detector, at the same sample rate. Its events
+                are returned from `add_audio`, and STT models can use them to end turns
+                without waiting for server-side turn detection.
+        """
+        if vad is not None and vad.sample_rate != sample_rate:
+            raise UserError("The VAD must use the same sample rate as the input")
+        self.sample_rate = sample_rate
+        self.vad = vad
         self.queue: asyncio.Queue[npt.NDArray[np.int16 | np.float32]] = asyncio.Queue()
-
-    async def add_audio(self, audio: npt.NDArray[np.int16 | np.float32]):
+        self.vad_events: asyncio.Queue[VADEvent] = asyncio.Queue(maxsize=_MAX_QUEUED_VAD_EVENTS)
+        """VAD events, queued right after the audio that triggered them. Consumed by the STT
+        session with local endpointing. Only the most recent ones are kept when nothing reads
+        them."""
+        self._resampler = (
+            StreamingResampler(sample_rate, DEFAULT_SAMPLE_RATE)
+            if sample_rate != DEFAULT_SAMPLE_RATE
+            else None
+        )
+
+    async def add_audio(self, audio: npt.NDArray[np.int16 | np.float32]) -> list[VADEvent]:
+        """Add the next chunk of audio.
+
+        Returns:
+            The speech start and end events the chunk triggered, if there is a VAD. Usually empty.
+        """
+        events = self.vad.process(audio) if self.vad is not None else []
+        if self._resampler is not None:
+            audio = self._resampler.process(audio).copy()
         await self.queue.put(audio)
+        for event in events:
+            if self.vad_events.full():
+                self.vad_events.get_nowait()
+            self.vad_events.put_nowait(event)
+        return events
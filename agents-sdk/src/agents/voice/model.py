@@ -7,7 +7,9 @@ from typing import Any, Callable, Literal
 
 from .imports import np, npt
 from .input import AudioInput, StreamedAudioInput
-from .utils import get_sentence_based_splitter
+from .output_format import AudioEncoding
+from .utils import IncrementalTextSplitter, get_sentence_based_splitter
+from .vad import SilenceGateSettings
 
 DEFAULT_TTS_INSTRUCTIONS = (
     "You will receive partial sentences. Do not complete the sentence, just read out the text."
@@ -33,6 +35,28 @@ class TTSModelSettings:
     dtype: npt.DTypeLike = np.int16
     """The data type for the audio data to be returned in."""
 
+    output_sample_rate: int | None = None
+    """
+    The sample rate to return audio at, e.g. 8000 for telephony. Defaults to the TTS model's own
+    (24 kHz).
+    """
+
+    output_encoding: AudioEncoding | None = None
+    """
+    The encoding to return audio in: "pcm16", "float32", "mulaw" or "alaw" (G.711, one uint8 per
+    sample). Overrides `dtype`.
+    """
+
+    frame_duration_ms: int | None = None
+    """
+    Return audio in whole frames of this many milliseconds, as a `(frames, samples_per_frame)`
+    array, e.g. 20 for Twilio. The last frame of each turn is padded with silence.
+
+    If any of `output_sample_rate`, `output_encoding` and `frame_duration_ms` is set, the audio of
+    each turn is converted in order, in one pass per chunk, and `transform_data` is applied to the
+    converted audio.
+    """
+
     transform_data: (
         Callable[[npt.NDArray[np.int16 | np.float32]], npt.NDArray[np.int16 | np.float32]] | None
     ) = None
@@ -56,9 +80,41 @@ class TTSModelSettings:
     processed.
     """
 
+    incremental_splitter: Callable[[], IncrementalTextSplitter] | None = None
+    """
+    If set, creates the splitter that cuts each turn's text into chunks for the TTS model instead
+    of `text_splitter`. Called once per result. `IncrementalTextSplitter` sends a short first
+    clause of each turn, and with e.g.
+    `functools.partial(IncrementalTextSplitter, max_wait_seconds=0.6)` also cuts text that has
+    waited too long for a boundary.
+    """
+
     speed: float | None = None
     """The speed with which the TTS model will read the text. Between 0.25 and 4.0."""
 
+    max_inflight_segments: int | None = None
+    """
+    At most this many text segments are synthesized at once. Later segments wait, in order, for
+    earlier ones to finish. None for no limit.
+    """
+
+    max_buffered_seconds: float | None = None
+    """
+    Don't start synthesizing another segment while this many seconds of audio are waiting to be
+    read from `StreamedAudioResult.stream()`. Together with `max_inflight_segments` this bounds
+    how far synthesis runs ahead of playback, so less is wasted when a turn is interrupted. None
+    for no limit.
+    """
+
+    max_queued_seconds: float | None = None
+    """
+    At most this many seconds of audio are queued for `StreamedAudioResult.stream()` ahead of
+    what has been read. Past that, synthesis pauses until the consumer catches up, so a consumer
+    that reads at playback speed keeps memory use to a few seconds of audio per session. Unlike
+    `max_buffered_seconds`, which only holds back the next segment, this also pauses a segment
+    part way through. None for no limit.
+    """
+
 
 class TTSModel(abc.ABC):
     """A text-to-speech model that can convert text into audio output."""
@@ -98,6 +154,16 @@ class StreamedTranscriptionSession(abc.ABC):
         """Closes the session."""
         pass
 
+    def set_partial_transcript_handler(self, handler: Callable[[str], None] | None) -> bool:
+        """Ask to be called with the transcript of the current turn as it builds up, before the
+        final transcript is yielded from `transcribe_turns()`. Each call gets the whole partial
+        transcript so far.
+
+        Returns:
+            Whether the session produces partial transcripts. The default doesn't.
+        """
+        return False
+
 
 @dataclass
 class STTModelSettings:
@@ -115,6 +181,22 @@ class STTModelSettings:
     turn_detection: dict[str, Any] | None = None
     """The turn detection settings for the model when using streamed audio input."""
 
+    local_endpointing: bool = False
+    """
+    End turns on the `speech_end` events of the input's local voice activity detector instead of
+    using the model's own turn detection, which saves a round trip per turn. Requires a
+    `StreamedAudioInput` created with a `vad`.
+    """
+
+    silence_gate: SilenceGateSettings | None = None
+    """
+    If set, long stretches of silence in streamed audio are not sent to the model, with enough
+    padding around speech for the model's turn detection to keep working. Saves bandwidth and
+    encoding work on calls, where most inbound audio is silence. Requires `local_endpointing`, or
+    a `server_vad` `turn_detection` whose `silence_duration_ms` is below the gate's
+    `post_padding_ms`: semantic turn detection can wait longer than the gate keeps sending.
+    """
+
 
 class STTModel(abc.ABC):
     """A speech-to-text model that can convert audio input into text."""
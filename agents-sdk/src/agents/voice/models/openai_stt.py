@@ -4,20 +4,23 @@ import asyncio
 import base64
 import json
 import time
+from collections import deque
 from collections.abc import AsyncIterator
 from dataclasses import dataclass
-from typing import Any, cast
+from typing import Any, Callable, cast
 
 from openai import AsyncOpenAI
 
 from ... import _debug
-from ...exceptions import AgentsException
+from ...exceptions import AgentsException, UserError
 from ...logger import logger
 from ...tracing import Span, SpanError, TranscriptionSpanData, transcription_span
 from ..exceptions import STTWebsocketConnectionError
+from ..frame_buffer import AudioFrameBuffer
 from ..imports import np, npt, websockets
-from ..input import AudioInput, StreamedAudioInput
+from ..input import DEFAULT_SAMPLE_RATE, AudioInput, StreamedAudioInput
 from ..model import StreamedTranscriptionSession, STTModel, STTModelSettings
+from ..vad import SilenceGate, VADEvent
 
 EVENT_INACTIVITY_TIMEOUT = 1000  # Timeout for inactivity in event processing
 SESSION_CREATION_TIMEOUT = 10  # Timeout waiting for session.created event
@@ -39,14 +42,9 @@ class WebsocketDoneSentinel:
     pass
 
 
-def _audio_to_base64(audio_data: list[npt.NDArray[np.int16 | np.float32]]) -> str:
-    concatenated_audio = np.concatenate(audio_data)
-    if concatenated_audio.dtype == np.float32:
-        # convert to int16
-        concatenated_audio = np.clip(concatenated_audio, -1.0, 1.0)
-        concatenated_audio = (concatenated_audio * 32767).astype(np.int16)
-    audio_bytes = concatenated_audio.tobytes()
-    return base64.b64encode(audio_bytes).decode("utf-8")
+def _audio_to_base64(audio_data: AudioFrameBuffer) -> str:
+    # The buffer stores int16, so float32 input was already clipped and converted on append
+    return base64.b64encode(audio_data.tobytes()).decode("utf-8")
 
 
 async def _wait_for_event(
@@ -84,7 +82,35 @@ class OpenAISTTTranscriptionSession(StreamedTranscriptionSession):
         self._client = client
         self._model = model
         self._settings = settings
-        self._turn_detection = settings.turn_detection or DEFAULT_TURN_DETECTION
+        if settings.local_endpointing and input.vad is None:
+            raise UserError("local_endpointing requires a StreamedAudioInput with a vad")
+        if settings.silence_gate and not settings.local_endpointing:
+            # Once the gate closes the server hears nothing more, so its turn detection has to end
+            # the turn on the silence sent before that. semantic_vad may wait much longer.
+            turn_detection: dict[str, Any] = settings.turn_detection or DEFAULT_TURN_DETECTION
+            silence_ms = turn_detection.get("silence_duration_ms")
+            if (
+                turn_detection.get("type") != "server_vad"
+                or silence_ms is None
+                or silence_ms >= settings.silence_gate.post_padding_ms
+            ):
+                raise UserError(
+                    "silence_gate requires local_endpointing, or server_vad turn detection with a "
+                    "silence_duration_ms below the gate's post_padding_ms"
+                )
+        # With local endpointing the server never ends a turn on its own; we commit the audio
+        # buffer whenever the local VAD says the caller stopped talking
+        self._turn_detection: dict[str, Any] | None = (
+            None
+            if settings.local_endpointing
+            else settings.turn_detection or DEFAULT_TURN_DETECTION
+        )
+        self._vad_events: asyncio.Queue[VADEvent] | None = (
+            input.vad_events if settings.local_endpointing else None
+        )
+        self._silence_gate: SilenceGate | None = (
+            SilenceGate(settings.silence_gate) if settings.silence_gate else None
+        )
         self._trace_include_sensitive_data = trace_include_sensitive_data
         self._trace_include_sensitive_audio_data = trace_include_sensitive_audio_data
 
@@ -95,7 +121,10 @@ class OpenAISTTTranscriptionSession(StreamedTranscriptionSession):
         self._websocket: websockets.ClientConnection | None = None
         self._event_queue: asyncio.Queue[dict[str, Any] | WebsocketDoneSentinel] = asyncio.Queue()
         self._state_queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
-        self._turn_audio_buffer: list[npt.NDArray[np.int16 | np.float32]] = []
+        self._turn_audio_buffer = AudioFrameBuffer(np.int16)
+        self._partial_transcript_handler: Callable[[str], None] | None = None
+        self._partial_transcript = ""
+        self._partial_item_id: str | None = None
         self._tracing_span: Span[TranscriptionSpanData] | None = None
 
         # tasks
@@ -106,6 +135,7 @@ class OpenAISTTTranscriptionSession(StreamedTranscriptionSession):
         self._stored_exception: Exception | None = None
 
     def _start_turn(self) -> None:
+        self._turn_audio_buffer.clear()
         self._tracing_span = transcription_span(
             model=self._model,
             model_config={
@@ -131,8 +161,8 @@ class OpenAISTTTranscriptionSession(StreamedTranscriptionSession):
                 self._tracing_span.span_data.output = _transcript
 
             self._tracing_span.finish()
-            self._turn_audio_buffer = []
             self._tracing_span = None
+        self._turn_audio_buffer.clear()
 
     async def _event_listener(self) -> None:
         assert self._websocket is not None, "Websocket not initialized"
@@ -226,7 +256,11 @@ class OpenAISTTTranscriptionSession(StreamedTranscriptionSession):
                     break
 
                 event_type = event.get("type", "unknown")
-                if event_type == "conversation.item.input_audio_transcription.completed":
+                if event_type == "conversation.item.input_audio_transcription.delta":
+                    self._on_transcript_delta(event)
+                elif event_type == "conversation.item.input_audio_transcription.completed":
+                    self._partial_transcript = ""
+                    self._partial_item_id = None
                     transcript = cast(str, event.get("transcript", ""))
                     if len(transcript) > 0:
                         self._end_turn(transcript)
@@ -241,34 +275,76 @@ class OpenAISTTTranscriptionSession(StreamedTranscriptionSession):
                 raise e
         await self._output_queue.put(SessionCompleteSentinel())
 
+    def set_partial_transcript_handler(self, handler: Callable[[str], None] | None) -> bool:
+        self._partial_transcript_handler = handler
+        return True
+
+    def _on_transcript_delta(self, event: dict[str, Any]) -> None:
+        if self._partial_transcript_handler is None:
+            return
+        item_id = event.get("item_id")
+        if item_id != self._partial_item_id:
+            self._partial_item_id = item_id
+            self._partial_transcript = ""
+        self._partial_transcript += cast(str, event.get("delta", ""))
+        try:
+            self._partial_transcript_handler(self._partial_transcript)
+        except Exception as e:
+            logger.error(f"Error handling partial transcript: {e}")
+
     async def _stream_audio(
         self, audio_queue: asyncio.Queue[npt.NDArray[np.int16 | np.float32]]
     ) -> None:
         assert self._websocket is not None, "Websocket not initialized"
         self._start_turn()
+        seconds_sent = 0.0
+        pending_events: deque[VADEvent] = deque()
         while True:
             buffer = await audio_queue.get()
             if buffer is None:
                 break
 
-            self._turn_audio_buffer.append(buffer)
+            if self._trace_include_sensitive_audio_data:
+                # Only kept to attach to the turn's trace, and cleared at every turn boundary
+                self._turn_audio_buffer.append(buffer)
+            chunks = self._silence_gate.process(buffer) if self._silence_gate else [buffer]
             try:
-                await self._websocket.send(
-                    json.dumps(
-                        {
-                            "type": "input_audio_buffer.append",
-                            "audio": base64.b64encode(buffer.tobytes()).decode("utf-8"),
-                        }
+                for chunk in chunks:
+                    await self._websocket.send(
+                        json.dumps(
+                            {
+                                "type": "input_audio_buffer.append",
+                                "audio": base64.b64encode(chunk.tobytes()).decode("utf-8"),
+                            }
+                        )
                     )
-                )
             except websockets.ConnectionClosed:
                 break
             except Exception as e:
                 await self._output_queue.put(ErrorSentinel(e))
                 raise e
 
+            if self._vad_events is not None:
+                seconds_sent += len(buffer) / DEFAULT_SAMPLE_RATE
+                while not self._vad_events.empty():
+                    pending_events.append(self._vad_events.get_nowait())
+                # Only commit once the audio up to the end of speech has actually been sent
+                while pending_events and pending_events[0].timestamp <= seconds_sent:
+                    if pending_events.popleft().type == "speech_end":
+                        try:
+                            await self._websocket.send(
+                                json.dumps({"type": "input_audio_buffer.commit"})
+                            )
+                        except websockets.ConnectionClosed:
+                            return
+
             await asyncio.sleep(0)  # yield control
 
+    @property
+    def audio_bytes_saved(self) -> int:
+        """How many bytes of PCM audio the silence gate has not sent, 0 without a gate."""
+        return self._silence_gate.bytes_dropped if self._silence_gate else 0
+
     async def _process_websocket_connection(self) -> None:
         try:
             async with websockets.connect(
@@ -351,6 +427,12 @@ class OpenAISTTTranscriptionSession(StreamedTranscriptionSession):
         if self._websocket:
             await self._websocket.close()
 
+        if self._silence_gate and self._silence_gate.bytes_in:
+            logger.debug(
+                f"Silence gate dropped {self._silence_gate.bytes_dropped} of "
+                f"{self._silence_gate.bytes_in} audio bytes"
+            )
+
         self._check_errors()
         if self._stored_exception:
             raise self._stored_exception
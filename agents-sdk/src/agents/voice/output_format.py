@@ -0,0 +1,156 @@
+"""Converting TTS audio into the format a transport wants on the wire, e.g. 8 kHz mu-law frames.
+
+TTS models return 24 kHz int16 PCM. Telephony wants something else: 8 kHz G.711 in 20 ms frames,
+say. `AudioOutputEncoder` does the whole conversion in one pass per chunk. The resampler writes
+int16 straight into a reused scratch buffer, the codec table lookup writes straight into the frame
+accumulator, and the only copy is the array of whole frames handed to the consumer.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Literal
+
+from ..exceptions import UserError
+from ._pcm import PCM16_FULL_SCALE
+from .codec import alaw_encode, mulaw_encode
+from .imports import np, npt
+from .resample import StreamingResampler
+
+AudioEncoding = Literal["pcm16", "float32", "mulaw", "alaw"]
+
+_DTYPES: dict[str, type] = {
+    "pcm16": np.int16,
+    "float32": np.float32,
+    "mulaw": np.uint8,
+    "alaw": np.uint8,
+}
+# What silence encodes to, for padding the last frame of a turn
+_SILENCE = {"pcm16": 0, "float32": 0.0, "mulaw": 0xFF, "alaw": 0xD5}
+# A second of 8 kHz audio before the accumulator has to grow
+_INITIAL_CAPACITY = 8000
+
+
+class AudioOutputEncoder:
+    """Converts a stream of int16 PCM chunks into the configured output format.
+
+    Returns whole frames as a `(frames, samples_per_frame)` array when a frame duration is set,
+    and carries the samples that don't fill a frame over to the next chunk. Without one, each
+    chunk is returned converted as it is (float32 as a `(samples, 1)` column, like
+    `TTSModelSettings.dtype`). Use one encoder per stream, in stream order.
+    """
+
+    def __init__(
+        self,
+        input_rate: int,
+        sample_rate: int | None = None,
+        encoding: AudioEncoding = "pcm16",
+        frame_duration_ms: int | None = None,
+    ):
+        """Create a new encoder.
+
+        Args:
+            input_rate: The sample rate of the PCM passed to `encode`.
+            sample_rate: The sample rate to output. Defaults to `input_rate`.
+            encoding: The sample encoding to output.
+            frame_duration_ms: Group the output into frames of this many milliseconds.
+        """
+        if encoding not in _DTYPES:
+            raise UserError(f"Unsupported output encoding: {encoding}")
+        self.encoding = encoding
+        self.sample_rate = sample_rate or input_rate
+        self.resampler = (
+            StreamingResampler(input_rate, self.sample_rate)
+            if self.sample_rate != input_rate
+            else None
+        )
+        self.frame_size: int | None = None
+        if frame_duration_ms is not None:
+            self.frame_size = self.sample_rate * frame_duration_ms // 1000
+            if self.frame_size <= 0:
+                raise UserError("frame_duration_ms must be at least one sample long")
+        self.dtype = np.dtype(_DTYPES[encoding])
+        self._pending: npt.NDArray[Any] = np.zeros(_INITIAL_CAPACITY, self.dtype)
+        self._length = 0
+        self._scratch = np.zeros(0, np.float32)
+
+    def _reserve(self, n: int) -> None:
+        needed = self._length + n
+        if needed > len(self._pending):
+            grown = np.zeros(max(needed, 2 * len(self._pending)), self.dtype)
+            grown[: self._length] = self._pending[: self._length]
+            self._pending = grown
+
+    def _convert_into(self, pcm: npt.NDArray[np.int16]) -> None:
+        n_out = self.resampler.output_length(len(pcm)) if self.resampler else len(pcm)
+        self._reserve(n_out)
+        dest = self._pending[self._length : self._length + n_out]
+        if self.encoding == "float32":
+            if len(self._scratch) < len(pcm):
+                self._scratch = np.zeros(max(len(pcm), 2 * len(self._scratch)), np.float32)
+            scaled = self._scratch[: len(pcm)]
+            np.multiply(pcm, np.float32(1 / PCM16_FULL_SCALE), out=scaled)
+            if self.resampler:
+                self.resampler.process(scaled, out=dest)
+            else:
+                dest[:] = scaled
+        elif self.encoding == "pcm16":
+            if self.resampler:
+                self.resampler.process(pcm, out=dest)
+            else:
+                dest[:] = pcm
+        else:
+            # The resampler's int16 output is only valid until its next call, which is fine: the
+            # codec reads it straight away
+            resampled = self.resampler.process(pcm) if self.resampler else pcm
+            encode = mulaw_encode if self.encoding == "mulaw" else alaw_encode
+            encode(resampled, out=dest)
+        self._length += n_out
+
+    def _take(self, n: int) -> npt.NDArray[Any]:
+        out = self._pending[:n].copy()
+        rest = self._length - n
+        self._pending[:rest] = self._pending[n : self._length]
+        self._length = rest
+        if self.frame_size:
+            return out.reshape(-1, self.frame_size)
+        if self.encoding == "float32":
+            return out.reshape(-1, 1)
+        return out
+
+    def encode(self, pcm: npt.NDArray[np.int16]) -> npt.NDArray[Any] | None:
+        """Convert the next chunk of the stream.
+
+        Args:
+            pcm: The next chunk, int16.
+
+        Returns:
+            The converted audio (owned by the caller), or None if there isn't a whole frame yet.
+        """
+        if pcm.dtype != np.int16:
+            raise UserError("AudioOutputEncoder expects int16 PCM")
+        self._convert_into(pcm.reshape(-1))
+        n = self._length
+        if self.frame_size:
+            n -= n % self.frame_size
+        return self._take(n) if n else None
+
+    def flush(self) -> npt.NDArray[Any] | None:
+        """End the stream: convert what's left, padding the last frame with silence."""
+        if self.resampler:
+            # Push the end of the audio, still inside the resampling filter, out first
+            tail = int(self.resampler.delay * self.resampler.input_rate) + 1
+            self._convert_into(np.zeros(tail, np.int16))
+            self.resampler.reset()
+        if self.frame_size and self._length % self.frame_size:
+            padding = self.frame_size - self._length % self.frame_size
+            self._reserve(padding)
+            self._pending[self._length : self._length + padding] = _SILENCE[self.encoding]
+            self._length += padding
+        n = self._length
+        return self._take(n) if n else None
+
+    def reset(self) -> None:
+        """Drop what's pending and forget the stream, e.g. when a turn is interrupted."""
+        self._length = 0
+        if self.resampler:
+            self.resampler.reset()
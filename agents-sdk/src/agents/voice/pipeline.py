@@ -1,14 +1,17 @@
 from __future__ import annotations
 
 import asyncio
+import time
+import weakref
 
 from .._run_impl import TraceCtxManager
 from ..exceptions import UserError
 from ..logger import logger
 from .input import AudioInput, StreamedAudioInput
-from .model import STTModel, TTSModel
+from .model import StreamedTranscriptionSession, STTModel, TTSModel
 from .pipeline_config import VoicePipelineConfig
 from .result import StreamedAudioResult
+from .speculation import SpeculativeRun, Speculator
 from .workflow import VoiceWorkflowBase
 
 
@@ -44,6 +47,7 @@ class VoicePipeline:
         self._stt_model_name = stt_model if isinstance(stt_model, str) else None
         self._tts_model_name = tts_model if isinstance(tts_model, str) else None
         self.config = config or VoicePipelineConfig()
+        self._outputs: weakref.WeakSet[StreamedAudioResult] = weakref.WeakSet()
 
     async def run(self, audio_input: AudioInput | StreamedAudioInput) -> StreamedAudioResult:
         """Run the voice pipeline.
@@ -64,6 +68,19 @@ class VoicePipeline:
         else:
             raise UserError(f"Unsupported audio input type: {type(audio_input)}")
 
+    async def interrupt(self) -> bool:
+        """Interrupt the turn currently being spoken by every result this pipeline is streaming.
+        See `StreamedAudioResult.interrupt()`.
+
+        Returns:
+            Whether any turn was interrupted.
+        """
+        interrupted = False
+        for output in list(self._outputs):
+            if await output.interrupt():
+                interrupted = True
+        return interrupted
+
     def _get_tts_model(self) -> TTSModel:
         if not self.tts_model:
             self.tts_model = self.config.model_provider.get_tts_model(self._tts_model_name)
@@ -83,6 +100,54 @@ class VoicePipeline:
             self.config.trace_include_sensitive_audio_data,
         )
 
+    async def _run_turn(
+        self,
+        input_text: str,
+        output: StreamedAudioResult,
+        speculative_run: SpeculativeRun | None = None,
+    ) -> None:
+        output._set_transcript_received(time.monotonic())
+
+        async def run_workflow():
+            try:
+                # A confirmed speculative run already has a head start on this transcript
+                text_events = (
+                    speculative_run.stream() if speculative_run else self.workflow.run(input_text)
+                )
+                async for text_event in text_events:
+                    await output._add_text(text_event)
+                await output._turn_done()
+            finally:
+                if speculative_run:
+                    await speculative_run.cancel()
+
+        # The turn runs in its own task so that `StreamedAudioResult.interrupt()` can cancel it
+        # without ending the whole session.
+        turn_task = asyncio.create_task(run_workflow())
+        output._set_turn_task(turn_task)
+        try:
+            await asyncio.wait([turn_task])
+        except asyncio.CancelledError:
+            turn_task.cancel()
+            raise
+
+        if not turn_task.cancelled():
+            exception = turn_task.exception()
+            if exception:
+                raise exception
+
+    def _create_speculator(self, session: StreamedTranscriptionSession) -> Speculator | None:
+        if self.config.speculation is None:
+            return None
+        if self.workflow.checkpoint() is None:
+            logger.warning("Speculation is on, but the workflow doesn't support checkpoint()")
+            return None
+        speculator = Speculator(self.workflow, self.config.speculation)
+        if not session.set_partial_transcript_handler(speculator.on_partial_transcript):
+            logger.warning("Speculation is on, but the STT model doesn't send partial transcripts")
+            return None
+        return speculator
+
     async def _run_single_turn(self, audio_input: AudioInput) -> StreamedAudioResult:
         # Since this is single turn, we can use the TraceCtxManager to manage starting/ending the
         # trace
@@ -101,9 +166,7 @@ class VoicePipeline:
 
             async def stream_events():
                 try:
-                    async for text_event in self.workflow.run(input_text):
-                        await output._add_text(text_event)
-                    await output._turn_done()
+                    await self._run_turn(input_text, output)
                     await output._done()
                 except Exception as e:
                     logger.error(f"Error processing single turn: {e}")
@@ -111,6 +174,7 @@ class VoicePipeline:
                     raise e
 
             output._set_task(asyncio.create_task(stream_events()))
+            self._outputs.add(output)
             return output
 
     async def _run_multi_turn(self, audio_input: StreamedAudioInput) -> StreamedAudioResult:
@@ -132,20 +196,29 @@ class VoicePipeline:
                 self.config.trace_include_sensitive_audio_data,
             )
 
+            speculator = self._create_speculator(transcription_session)
+
             async def process_turns():
                 try:
                     async for input_text in transcription_session.transcribe_turns():
-                        result = self.workflow.run(input_text)
-                        async for text_event in result:
-                            await output._add_text(text_event)
-                        await output._turn_done()
+                        if speculator is None:
+                            await self._run_turn(input_text, output)
+                            continue
+                        speculative_run = await speculator.take(input_text)
+                        try:
+                            await self._run_turn(input_text, output, speculative_run)
+                        finally:
+                            speculator.turn_done()
                 except Exception as e:
                     logger.error(f"Error processing turns: {e}")
                     await output._add_error(e)
                     raise e
                 finally:
+                    if speculator:
+                        await speculator.close()
                     await transcription_session.close()
                     await output._done()
 
             output._set_task(asyncio.create_task(process_turns()))
+            self._outputs.add(output)
             return output
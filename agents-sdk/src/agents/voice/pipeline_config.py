@@ -6,6 +6,7 @@ from typing import Any
 from ..tracing.util import gen_group_id
 from .model import STTModelSettings, TTSModelSettings, VoiceModelProvider
 from .models.openai_model_provider import OpenAIVoiceModelProvider
+from .speculation import SpeculationSettings
 
 
 @dataclass
@@ -44,3 +45,11 @@ class VoicePipelineConfig:
 
     tts_settings: TTSModelSettings = field(default_factory=TTSModelSettings)
     """The settings to use for the TTS model."""
+
+    speculation: SpeculationSettings | None = None
+    """
+    If set, streamed sessions start the workflow on the partial transcript of a turn and use its
+    output if the final transcript matches, which hides most of the workflow's time to first
+    token. The workflow must support `checkpoint()` and `restore()`, and should not have side
+    effects that can't be rolled back, since a speculative run may be thrown away.
+    """
@@ -0,0 +1,199 @@
+"""Streaming sample-rate conversion, e.g. between 8 kHz telephony audio and 24 kHz model audio.
+
+The resampler is a rational polyphase FIR: conceptually it upsamples by `L`, low-pass filters and
+keeps every `M`-th sample, but it only ever computes the outputs it keeps. The last few input
+samples are carried over between chunks, so the output is the same however the stream is split
+up and chunk boundaries don't click.
+"""
+
+from __future__ import annotations
+
+import math
+
+from ..exceptions import UserError
+from ._pcm import PCM16_FULL_SCALE
+from .imports import np, npt
+
+DEFAULT_ZERO_CROSSINGS = 16
+DEFAULT_ROLLOFF = 0.94
+DEFAULT_KAISER_BETA = 7.0
+# Input samples the first buffer holds before it has to grow; a 20 ms frame at 48 kHz fits
+_INITIAL_CAPACITY = 960
+# Output index plans kept per resampler. Steady fixed-size frames need at most `up` of them.
+_MAX_PLANS = 64
+
+
+def _design_filter(
+    up: int, down: int, zero_crossings: int, rolloff: float, beta: float
+) -> npt.NDArray[np.float32]:
+    # Low-pass at the lower of the two Nyquist rates, expressed at the upsampled rate
+    cutoff = rolloff / (2 * max(up, down))
+    taps_per_phase = 2 * zero_crossings * max(up, down) // up
+    n = taps_per_phase * up
+    t = np.arange(n) - (n - 1) / 2
+    h = 2 * cutoff * np.sinc(2 * cutoff * t) * np.kaiser(n, beta)
+    # Unity gain at DC for every phase
+    h *= up / h.sum()
+    filter_taps: npt.NDArray[np.float32] = h.astype(np.float32)
+    return filter_taps
+
+
+class StreamingResampler:
+    """Converts a stream of mono audio from one sample rate to another, chunk by chunk.
+
+    ```python
+    upsample = StreamingResampler(8000, 24000)
+    for frame in frames:
+        pcm_24k = upsample.process(frame)
+    ```
+
+    `process` returns int16 for int16 input and float32 for float32 input. Output is written into
+    buffers owned by the resampler and reused on the next call, so copy the result (or pass
+    `out=`) if you need to keep it. Use one resampler per stream.
+    """
+
+    def __init__(
+        self,
+        input_rate: int,
+        output_rate: int,
+        *,
+        zero_crossings: int = DEFAULT_ZERO_CROSSINGS,
+        rolloff: float = DEFAULT_ROLLOFF,
+    ):
+        """Create a new resampler.
+
+        Args:
+            input_rate: The sample rate of the audio passed to `process`.
+            output_rate: The sample rate of the audio it returns.
+            zero_crossings: Filter length, in zero crossings of the low-pass filter on each side.
+                Longer filters have a sharper cutoff and cost proportionally more.
+            rolloff: Where the cutoff sits, as a fraction of the lower Nyquist rate.
+        """
+        if input_rate <= 0 or output_rate <= 0:
+            raise UserError("Sample rates must be positive")
+        g = math.gcd(input_rate, output_rate)
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+        self.up = output_rate // g
+        self.down = input_rate // g
+
+        h = _design_filter(self.up, self.down, zero_crossings, rolloff, DEFAULT_KAISER_BETA)
+        self.taps = len(h) // self.up
+        # Column p holds phase p, with taps in the order they meet the input window
+        self._bank = np.ascontiguousarray(h.reshape(self.taps, self.up)[::-1])
+        self._input = np.zeros(self.taps - 1 + _INITIAL_CAPACITY, dtype=np.float32)
+        self._windows = self._make_windows()
+        self._float_out = np.zeros(0, dtype=np.float32)
+        self._int_out = np.zeros(0, dtype=np.int16)
+        # Position of the next output, in upsampled samples from the start of the next chunk
+        self._position = 0
+        # The input is kept in the units it arrives in (int16 values for int16 input), so int16
+        # audio needs no scaling either way. This is the full scale of what's in the history.
+        self._history_scale = 1.0
+        # For ratios where neither rate divides the other: for a chunk's starting position and
+        # length, which window and filter phase each output uses, with the phases gathered into
+        # one contiguous bank. Worked out once, since frames repeat the same few positions.
+        self._plans: dict[
+            tuple[int, int], tuple[npt.NDArray[np.intp], npt.NDArray[np.float32]]
+        ] = {}
+
+    def _make_windows(self) -> npt.NDArray[np.float32]:
+        # windows[k] is the stretch of input that the outputs around input sample k are computed
+        # from. Built once per input buffer, since making a strided view is slower than using it.
+        return np.lib.stride_tricks.sliding_window_view(self._input, self.taps)
+
+    @property
+    def delay(self) -> float:
+        """How far the output lags the input because of the filter, in seconds."""
+        return (self.taps * self.up - 1) / 2 / (self.input_rate * self.up)
+
+    def output_length(self, input_length: int) -> int:
+        """How many samples the next `process` call returns for `input_length` input samples."""
+        return max(0, -(-(input_length * self.up - self._position) // self.down))
+
+    def reset(self) -> None:
+        """Forget the stream so far, e.g. before starting an unrelated one."""
+        self._input[: self.taps - 1] = 0
+        self._position = 0
+
+    def _plan(self, n_in: int, n_out: int) -> tuple[npt.NDArray[np.intp], npt.NDArray[np.float32]]:
+        key = (self._position, n_in)
+        plan = self._plans.get(key)
+        if plan is None:
+            if len(self._plans) >= _MAX_PLANS:
+                self._plans.clear()
+            k, p = np.divmod(self._position + self.down * np.arange(n_out), self.up)
+            plan = self._plans[key] = (k, np.ascontiguousarray(self._bank[:, p].T))
+        return plan
+
+    def process(
+        self,
+        audio: npt.NDArray[np.int16 | np.float32],
+        out: npt.NDArray[np.int16 | np.float32] | None = None,
+    ) -> npt.NDArray[np.int16 | np.float32]:
+        """Resample the next chunk of the stream.
+
+        Args:
+            audio: The next chunk, int16 or float32.
+            out: An optional array of the same dtype as `audio` and length
+                `output_length(len(audio))` to write the result into.
+
+        Returns:
+            The resampled chunk. Unless `out` was given, it is only valid until the next call.
+        """
+        if audio.dtype != np.int16 and audio.dtype != np.float32:
+            raise UserError("Buffer must be a numpy array of int16 or float32")
+        audio = audio.reshape(-1)
+        n_in = len(audio)
+        history = self.taps - 1
+        n_out = self.output_length(n_in)
+
+        if len(self._input) < history + n_in:
+            grown = np.zeros(history + n_in, dtype=np.float32)
+            grown[:history] = self._input[:history]
+            self._input = grown
+            self._windows = self._make_windows()
+        buffer = self._input[: history + n_in]
+        scale = PCM16_FULL_SCALE if audio.dtype == np.int16 else 1.0
+        if scale != self._history_scale:
+            # The stream switched between int16 and float32: bring the history into line
+            buffer[:history] *= np.float32(scale / self._history_scale)
+            self._history_scale = scale
+        buffer[history:] = audio
+
+        if len(self._float_out) < n_out:
+            self._float_out = np.zeros(max(n_out, 2 * len(self._float_out)), dtype=np.float32)
+        result = self._float_out[:n_out]
+
+        if self.down == 1:
+            # Every phase of every input sample is kept: one matrix product does the lot
+            np.dot(self._windows[:n_in], self._bank, out=result.reshape(n_in, self.up))
+        elif self.up == 1:
+            # Plain decimation: every `down`-th window, one phase
+            windows = self._windows[self._position :: self.down][:n_out]
+            np.dot(windows, self._bank[:, 0], out=result)
+        else:
+            k, bank = self._plan(n_in, n_out)
+            np.einsum("ij,ij->i", self._windows[k], bank, out=result)
+
+        self._position += self.down * n_out - self.up * n_in
+        # Keep the tail as history for the next chunk
+        buffer[:history] = buffer[n_in:]
+
+        if audio.dtype == np.float32:
+            if out is None:
+                return result
+            out[:] = result
+            return out
+
+        if out is None:
+            if len(self._int_out) < n_out:
+                self._int_out = np.zeros(len(self._float_out), dtype=np.int16)
+            out = self._int_out[:n_out]
+        # Already in int16 units. The filter can overshoot a full-scale input slightly. Two ufuncs
+        # beat np.clip here.
+        np.maximum(result, -PCM16_FULL_SCALE, out=result)
+        np.minimum(result, PCM16_FULL_SCALE - 1, out=result)
+        np.rint(result, out=result)
+        out[:] = result
+        return out
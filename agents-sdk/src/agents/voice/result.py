@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import asyncio
 import base64
+import time
+from collections import deque
 from collections.abc import AsyncIterator
 from typing import Any
 
@@ -14,15 +16,27 @@ from .events import (
     VoiceStreamEventAudio,
     VoiceStreamEventError,
     VoiceStreamEventLifecycle,
+    VoiceTurnTimings,
 )
+from .frame_buffer import AudioFrameBuffer
 from .imports import np, npt
+from .input import DEFAULT_SAMPLE_RATE
 from .model import TTSModel, TTSModelSettings
+from .output_format import AudioEncoding, AudioOutputEncoder
 from .pipeline_config import VoicePipelineConfig
+from .utils import _CallableSplitter
 
+# How many audio chunks a segment can have waiting for the dispatcher before its synthesis pauses
+SEGMENT_QUEUE_SIZE = 4
 
-def _audio_to_base64(audio_data: list[bytes]) -> str:
-    joined_audio_data = b"".join(audio_data)
-    return base64.b64encode(joined_audio_data).decode("utf-8")
+_ENCODINGS_BY_DTYPE: dict[Any, AudioEncoding] = {
+    np.dtype(np.int16): "pcm16",
+    np.dtype(np.float32): "float32",
+}
+
+
+def _audio_to_base64(audio_data: AudioFrameBuffer) -> str:
+    return base64.b64encode(audio_data.tobytes()).decode("utf-8")
 
 
 class StreamedAudioResult:
@@ -46,24 +60,68 @@ class StreamedAudioResult:
         self.total_output_text = ""
         self.instructions = tts_settings.instructions
         self.text_generation_task: asyncio.Task[Any] | None = None
+        self.turn_task: asyncio.Task[Any] | None = None
 
         self._voice_pipeline_config = voice_pipeline_config
-        self._text_buffer = ""
+        # Converts each turn's audio into the configured output format, in dispatch order
+        self._output_encoder: AudioOutputEncoder | None = None
+        if (
+            tts_settings.output_sample_rate is not None
+            or tts_settings.output_encoding is not None
+            or tts_settings.frame_duration_ms is not None
+        ):
+            encoding = tts_settings.output_encoding or _ENCODINGS_BY_DTYPE.get(
+                np.dtype(tts_settings.dtype)
+            )
+            if encoding is None:
+                raise UserError("Invalid output dtype")
+            self._output_encoder = AudioOutputEncoder(
+                DEFAULT_SAMPLE_RATE,
+                tts_settings.output_sample_rate,
+                encoding,
+                tts_settings.frame_duration_ms,
+            )
+        self._text_splitter = (
+            tts_settings.incremental_splitter()
+            if tts_settings.incremental_splitter is not None
+            else _CallableSplitter(tts_settings.text_splitter)
+        )
+        self._flush_timer: asyncio.TimerHandle | None = None
         self._turn_text_buffer = ""
         self._queue: asyncio.Queue[VoiceStreamEvent] = asyncio.Queue()
         self._tasks: list[asyncio.Task[Any]] = []
-        self._ordered_tasks: list[
-            asyncio.Queue[VoiceStreamEvent | None]
-        ] = []  # New: list to hold local queues for each text segment
+        # Local queues for each text segment, in the order their audio must be played
+        self._ordered_tasks: deque[asyncio.Queue[VoiceStreamEvent | None]] = deque()
+        # Set whenever a segment is added or the session completes, so the dispatcher can sleep
+        # while there is nothing to do
+        self._segments_changed = asyncio.Event()
         self._dispatcher_task: asyncio.Task[Any] | None = (
             None  # Task to dispatch audio chunks in order
         )
+        # The TTS lookahead window: segments take a slot in the order they were created, once
+        # fewer than `max_inflight_segments` are being synthesized and less than
+        # `max_buffered_seconds` of audio is waiting to be read
+        self._tts_window = asyncio.Condition()
+        self._segments_created = 0
+        self._next_segment_slot = 0
+        self._inflight_segments = 0
+        self._buffered_seconds = 0.0
+        # Credits for `max_queued_seconds`: the dispatcher takes them for the audio it queues for
+        # `stream()` and reading returns them. Segment queues are bounded too, so synthesis
+        # pauses when the dispatcher runs out of credit.
+        self._queued_seconds = 0.0
+        # Audio events in `_queue` that `stream()` hasn't handed out yet. A turn has ended for the
+        # dispatcher once its last segment is queued, but is still playing until these are read.
+        self._unread_audio_events = 0
+        # Bumped on interrupt, so segments from before it don't touch the counters afterwards
+        self._window_generation = 0
 
         self._done_processing = False
         self._buffer_size = tts_settings.buffer_size
         self._started_processing_turn = False
         self._first_byte_received = False
         self._generation_start_time: str | None = None
+        self._turn_timings = VoiceTurnTimings()
         self._completed_session = False
         self._stored_exception: BaseException | None = None
         self._tracing_span: Span[SpeechGroupSpanData] | None = None
@@ -77,31 +135,142 @@ class StreamedAudioResult:
         self._started_processing_turn = True
         self._first_byte_received = False
         self._generation_start_time = time_iso()
-        await self._queue.put(VoiceStreamEventLifecycle(event="turn_started"))
+        await self._queue.put(
+            VoiceStreamEventLifecycle(event="turn_started", timings=self._turn_timings)
+        )
 
     def _set_task(self, task: asyncio.Task[Any]):
         self.text_generation_task = task
 
+    def _set_turn_task(self, task: asyncio.Task[Any]):
+        self.turn_task = task
+
+    def _set_transcript_received(self, at: float):
+        # Called before the workflow runs, so a fresh object per turn. Segments of the previous
+        # turn keep a reference to their own.
+        self._turn_timings = VoiceTurnTimings(transcript_at=at)
+
     async def _add_error(self, error: Exception):
         await self._queue.put(VoiceStreamEventError(error))
 
     def _transform_audio_buffer(
-        self, buffer: list[bytes], output_dtype: npt.DTypeLike
+        self, buffer: AudioFrameBuffer, output_dtype: npt.DTypeLike
     ) -> npt.NDArray[np.int16 | np.float32]:
-        np_array = np.frombuffer(b"".join(buffer), dtype=np.int16)
-
         if output_dtype == np.int16:
-            return np_array
+            return buffer.drain(np.int16)
         elif output_dtype == np.float32:
-            return (np_array.astype(np.float32) / 32767.0).reshape(-1, 1)
+            return buffer.drain(np.float32).reshape(-1, 1)
         else:
             raise UserError("Invalid output dtype")
 
+    def _segment_audio(self, buffer: AudioFrameBuffer) -> npt.NDArray[np.int16 | np.float32]:
+        if self._output_encoder:
+            # Converted by the dispatcher, which sees the turn's audio in order
+            return buffer.drain(np.int16)
+        audio_np = self._transform_audio_buffer(buffer, self.tts_settings.dtype)
+        if self.tts_settings.transform_data:
+            audio_np = self.tts_settings.transform_data(audio_np)
+        return audio_np
+
+    def _encode_output(self, pcm: npt.NDArray[Any] | None) -> VoiceStreamEventAudio | None:
+        assert self._output_encoder is not None
+        audio = self._output_encoder.flush() if pcm is None else self._output_encoder.encode(pcm)
+        if audio is None:
+            return None
+        if self.tts_settings.transform_data:
+            audio = self.tts_settings.transform_data(audio)
+        return VoiceStreamEventAudio(data=audio)
+
+    def _audio_seconds(self, audio: npt.NDArray[Any]) -> float:
+        if self._output_encoder:
+            return audio.size / self._output_encoder.sample_rate
+        return len(audio) / DEFAULT_SAMPLE_RATE
+
+    def _window_open(self) -> bool:
+        max_inflight = self.tts_settings.max_inflight_segments
+        max_buffered = self.tts_settings.max_buffered_seconds
+        if max_inflight is not None and self._inflight_segments >= max_inflight:
+            return False
+        if max_buffered is not None and self._buffered_seconds >= max_buffered:
+            return False
+        return True
+
+    async def _acquire_tts_slot(self, index: int | None) -> int:
+        async with self._tts_window:
+            await self._tts_window.wait_for(
+                lambda: (index is None or index <= self._next_segment_slot) and self._window_open()
+            )
+            if index is not None:
+                self._next_segment_slot = max(self._next_segment_slot, index + 1)
+            self._inflight_segments += 1
+            self._tts_window.notify_all()
+            return self._window_generation
+
+    async def _release_tts_slot(self, generation: int) -> None:
+        async with self._tts_window:
+            if generation == self._window_generation:
+                self._inflight_segments -= 1
+                self._tts_window.notify_all()
+
+    async def _add_buffered_audio(self, seconds: float) -> None:
+        async with self._tts_window:
+            self._buffered_seconds += seconds
+
+    async def _take_queue_credit(self, seconds: float) -> None:
+        max_queued = self.tts_settings.max_queued_seconds
+        async with self._tts_window:
+            await self._tts_window.wait_for(
+                lambda: max_queued is None or self._queued_seconds < max_queued
+            )
+            self._queued_seconds += seconds
+
+    async def _audio_read(self, seconds: float) -> None:
+        async with self._tts_window:
+            self._buffered_seconds = max(0.0, self._buffered_seconds - seconds)
+            self._queued_seconds = max(0.0, self._queued_seconds - seconds)
+            self._tts_window.notify_all()
+
+    async def _put_audio(
+        self,
+        local_queue: asyncio.Queue[VoiceStreamEvent | None],
+        audio: npt.NDArray[np.int16 | np.float32],
+        generation: int,
+    ) -> None:
+        if generation == self._window_generation:
+            await self._add_buffered_audio(len(audio) / DEFAULT_SAMPLE_RATE)
+        await local_queue.put(VoiceStreamEventAudio(data=audio))
+
+    def _start_segment(self, text: str, finish_turn: bool = False) -> None:
+        local_queue: asyncio.Queue[VoiceStreamEvent | None] = asyncio.Queue(
+            maxsize=SEGMENT_QUEUE_SIZE
+        )
+        self._add_segment(local_queue)
+        index = self._segments_created
+        self._segments_created += 1
+        self._tasks.append(
+            asyncio.create_task(self._stream_audio(text, local_queue, finish_turn, index))
+        )
+
     async def _stream_audio(
         self,
         text: str,
         local_queue: asyncio.Queue[VoiceStreamEvent | None],
         finish_turn: bool = False,
+        index: int | None = None,
+    ):
+        # Wait for room in the lookahead window before asking for any audio
+        generation = await self._acquire_tts_slot(index)
+        try:
+            await self._synthesize_segment(text, local_queue, finish_turn, generation)
+        finally:
+            await self._release_tts_slot(generation)
+
+    async def _synthesize_segment(
+        self,
+        text: str,
+        local_queue: asyncio.Queue[VoiceStreamEvent | None],
+        finish_turn: bool,
+        generation: int,
     ):
         with speech_span(
             model=self.tts_model.model_name,
@@ -114,40 +283,48 @@ class StreamedAudioResult:
             output_format="pcm",
             parent=self._tracing_span,
         ) as tts_span:
+            timings = self._turn_timings
             try:
                 first_byte_received = False
-                buffer: list[bytes] = []
-                full_audio_data: list[bytes] = []
+                # TTS chunks are raw int16 PCM and may split a sample; the buffer carries the odd
+                # byte over to the next chunk
+                buffer = AudioFrameBuffer()
+                buffered_chunks = 0
+                full_audio_data = (
+                    AudioFrameBuffer()
+                    if self._voice_pipeline_config.trace_include_sensitive_audio_data
+                    else None
+                )
 
                 async for chunk in self.tts_model.run(text, self.tts_settings):
                     if not first_byte_received:
                         first_byte_received = True
                         tts_span.span_data.first_content_at = time_iso()
+                        if timings.first_audio_at is None:
+                            timings.first_audio_at = time.monotonic()
 
                     if chunk:
                         buffer.append(chunk)
-                        full_audio_data.append(chunk)
-                        if len(buffer) >= self._buffer_size:
-                            audio_np = self._transform_audio_buffer(buffer, self.tts_settings.dtype)
-                            if self.tts_settings.transform_data:
-                                audio_np = self.tts_settings.transform_data(audio_np)
-                            await local_queue.put(
-                                VoiceStreamEventAudio(data=audio_np)
-                            )  # Use local queue
-                            buffer = []
-                if buffer:
-                    audio_np = self._transform_audio_buffer(buffer, self.tts_settings.dtype)
-                    if self.tts_settings.transform_data:
-                        audio_np = self.tts_settings.transform_data(audio_np)
-                    await local_queue.put(VoiceStreamEventAudio(data=audio_np))  # Use local queue
-
-                if self._voice_pipeline_config.trace_include_sensitive_audio_data:
+                        buffered_chunks += 1
+                        if full_audio_data is not None:
+                            full_audio_data.append(chunk)
+                        if buffered_chunks >= self._buffer_size and len(buffer):
+                            audio_np = self._segment_audio(buffer)
+                            await self._put_audio(local_queue, audio_np, generation)
+                            buffered_chunks = 0
+                if len(buffer):
+                    audio_np = self._segment_audio(buffer)
+                    await self._put_audio(local_queue, audio_np, generation)
+
+                if full_audio_data is not None:
                     tts_span.span_data.output = _audio_to_base64(full_audio_data)
                 else:
                     tts_span.span_data.output = ""
 
                 if finish_turn:
-                    await local_queue.put(VoiceStreamEventLifecycle(event="turn_ended"))
+                    await local_queue.put(
+                        VoiceStreamEventLifecycle(event="turn_ended", timings=timings)
+                    )
                 else:
                     await local_queue.put(None)  # Signal completion for this segment
             except Exception as e:
@@ -167,34 +344,64 @@ class StreamedAudioResult:
                 await local_queue.put(VoiceStreamEventLifecycle(event="session_ended"))
                 raise e
 
+    def _add_segment(self, local_queue: asyncio.Queue[VoiceStreamEvent | None]):
+        self._ordered_tasks.append(local_queue)
+        self._segments_changed.set()
+
     async def _add_text(self, text: str):
         await self._start_turn()
+        if text and self._turn_timings.first_text_at is None:
+            self._turn_timings.first_text_at = time.monotonic()
 
-        self._text_buffer += text
         self.total_output_text += text
         self._turn_text_buffer += text
 
-        combined_sentences, self._text_buffer = self.tts_settings.text_splitter(self._text_buffer)
-
-        if len(combined_sentences) >= 20:
-            local_queue: asyncio.Queue[VoiceStreamEvent | None] = asyncio.Queue()
-            self._ordered_tasks.append(local_queue)
-            self._tasks.append(
-                asyncio.create_task(self._stream_audio(combined_sentences, local_queue))
+        chunk = self._text_splitter.push(text)
+        if chunk:
+            self._start_segment(chunk)
+            if self._dispatcher_task is None:
+                self._dispatcher_task = asyncio.create_task(self._dispatch_audio())
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        # Cut the text on the splitter's time budget even if no more arrives (e.g. during a tool
+        # call)
+        if self._flush_timer:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        deadline = self._text_splitter.deadline
+        if deadline is not None:
+            self._flush_timer = asyncio.get_running_loop().call_later(
+                max(0.0, deadline - time.monotonic()), self._flush_due_text
             )
+
+    def _flush_due_text(self) -> None:
+        self._flush_timer = None
+        chunk = self._text_splitter.flush_due()
+        if chunk:
+            self._start_segment(chunk)
             if self._dispatcher_task is None:
                 self._dispatcher_task = asyncio.create_task(self._dispatch_audio())
+        self._schedule_flush()
+
+    def _cancel_flush(self) -> None:
+        if self._flush_timer:
+            self._flush_timer.cancel()
+            self._flush_timer = None
 
     async def _turn_done(self):
-        if self._text_buffer:
+        self._cancel_flush()
+        text = self._text_splitter.flush()
+        if text:
+            self._start_segment(text, finish_turn=True)  # The final segment
+        elif self._started_processing_turn:
+            # All of the text has gone out already, e.g. it ended in whitespace or the time budget
+            # cut it, so the turn ends with a segment that holds nothing else
             local_queue: asyncio.Queue[VoiceStreamEvent | None] = asyncio.Queue()
-            self._ordered_tasks.append(local_queue)  # Append the local queue for the final segment
-            self._tasks.append(
-                asyncio.create_task(
-                    self._stream_audio(self._text_buffer, local_queue, finish_turn=True)
-                )
+            local_queue.put_nowait(
+                VoiceStreamEventLifecycle(event="turn_ended", timings=self._turn_timings)
             )
-            self._text_buffer = ""
+            self._add_segment(local_queue)
         self._done_processing = True
         if self._dispatcher_task is None:
             self._dispatcher_task = asyncio.create_task(self._dispatch_audio())
@@ -214,21 +421,102 @@ class StreamedAudioResult:
 
     async def _done(self):
         self._completed_session = True
+        self._segments_changed.set()
+        if self._dispatcher_task is None:
+            # A streamed session can end before any turn produced text; the dispatcher still has
+            # to run so that `session_ended` reaches the consumer.
+            self._dispatcher_task = asyncio.create_task(self._dispatch_audio())
         await self._wait_for_completion()
 
+    async def interrupt(self) -> bool:
+        """Cut the current turn short, e.g. because the user started talking over it.
+
+        Cancels the workflow run for the current turn and every pending text-to-speech segment,
+        drops any audio that has been generated but not yet consumed from `stream()`, and emits a
+        `turn_interrupted` lifecycle event. The session itself keeps running, so the next turn
+        is processed as soon as it is transcribed.
+
+        Returns:
+            Whether a turn was in progress, or its audio not yet all read, and got interrupted.
+        """
+        if self._completed_session or (
+            not self._started_processing_turn and not self._unread_audio_events
+        ):
+            return False
+
+        if self.turn_task and not self.turn_task.done():
+            self.turn_task.cancel()
+
+        for task in self._tasks:
+            if not task.done():
+                task.cancel()
+        self._tasks = []
+
+        if self._dispatcher_task and not self._dispatcher_task.done():
+            self._dispatcher_task.cancel()
+        self._dispatcher_task = None
+        self._ordered_tasks.clear()
+
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._unread_audio_events = 0
+
+        # The cancelled segments' slots and buffered audio are gone with them
+        async with self._tts_window:
+            self._window_generation += 1
+            self._next_segment_slot = self._segments_created
+            self._inflight_segments = 0
+            self._buffered_seconds = 0.0
+            self._queued_seconds = 0.0
+            self._tts_window.notify_all()
+
+        self._cancel_flush()
+        self._text_splitter.reset()
+        if self._output_encoder:
+            self._output_encoder.reset()
+        self._finish_turn()
+        await self._queue.put(
+            VoiceStreamEventLifecycle(event="turn_interrupted", timings=self._turn_timings)
+        )
+        return True
+
+    async def _queue_audio(self, event: VoiceStreamEventAudio) -> None:
+        if event.data is not None:
+            await self._take_queue_credit(self._audio_seconds(event.data))
+        self._unread_audio_events += 1
+        await self._queue.put(event)
+
     async def _dispatch_audio(self):
         # Dispatch audio chunks from each segment in the order they were added
         while True:
-            if len(self._ordered_tasks) == 0:
+            if not self._ordered_tasks:
                 if self._completed_session:
                     break
-                await asyncio.sleep(0)
+                # Idle between turns: sleep until a segment is added or the session ends
+                self._segments_changed.clear()
+                await self._segments_changed.wait()
                 continue
-            local_queue = self._ordered_tasks.pop(0)
+            local_queue = self._ordered_tasks.popleft()
             while True:
                 chunk = await local_queue.get()
                 if chunk is None:
                     break
+                if self._output_encoder:
+                    if isinstance(chunk, VoiceStreamEventAudio) and chunk.data is not None:
+                        encoded = self._encode_output(chunk.data)
+                        if encoded is None:
+                            continue  # Not a whole frame yet
+                        chunk = encoded
+                    elif (
+                        isinstance(chunk, VoiceStreamEventLifecycle) and chunk.event == "turn_ended"
+                    ):
+                        # The end of the turn, padded to a whole frame, goes out before it
+                        last = self._encode_output(None)
+                        if last is not None:
+                            await self._queue_audio(last)
+                if isinstance(chunk, VoiceStreamEventAudio):
+                    await self._queue_audio(chunk)
+                    continue
                 await self._queue.put(chunk)
                 if isinstance(chunk, VoiceStreamEventLifecycle):
                     local_queue.task_done()
@@ -244,6 +532,7 @@ class StreamedAudioResult:
         await asyncio.gather(*tasks)
 
     def _cleanup_tasks(self):
+        self._cancel_flush()
         self._finish_turn()
 
         for task in self._tasks:
@@ -253,6 +542,9 @@ class StreamedAudioResult:
         if self._dispatcher_task and not self._dispatcher_task.done():
             self._dispatcher_task.cancel()
 
+        if self.turn_task and not self.turn_task.done():
+            self.turn_task.cancel()
+
         if self.text_generation_task and not self.text_generation_task.done():
             self.text_generation_task.cancel()
 
@@ -276,6 +568,10 @@ class StreamedAudioResult:
                 break
             if event is None:
                 break
+            if isinstance(event, VoiceStreamEventAudio):
+                self._unread_audio_events = max(0, self._unread_audio_events - 1)
+                if event.data is not None:
+                    await self._audio_read(self._audio_seconds(event.data))
             yield event
             if event.type == "voice_stream_event_lifecycle" and event.event == "session_ended":
                 break
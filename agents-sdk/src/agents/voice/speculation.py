@@ -0,0 +1,209 @@
+"""Starting the workflow on a partial transcript, before the final one arrives.
+
+Streaming transcription models send the transcript of a turn as it builds up, a little before the
+final one. With speculation on, the pipeline runs the workflow as soon as the partial transcript
+looks finished and holds back what it produces. If the final transcript matches, that output goes
+straight to TTS, so most of the workflow's time to first token is hidden behind transcription. If
+not, the run is cancelled, the workflow's state is rolled back and the turn runs as usual.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import difflib
+import re
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Any
+
+from ..logger import logger
+from .workflow import VoiceWorkflowBase
+
+_SENTENCE_END = (".", "?", "!")
+_NOT_WORD = re.compile(r"[^\w\s']")
+
+
+@dataclass
+class SpeculationSettings:
+    """Settings for starting the workflow on partial transcripts."""
+
+    min_similarity: float = 0.9
+    """How close the final transcript has to be to the speculated one (0-1, compared after
+    lowercasing and dropping punctuation) for the speculative run to be used."""
+
+    stable_ms: int = 200
+    """Start a speculative run once the partial transcript hasn't changed for this long. A partial
+    transcript that ends a sentence starts one straight away."""
+
+    min_words: int = 2
+    """Don't speculate on partial transcripts shorter than this."""
+
+    max_runs_per_turn: int = 3
+    """At most this many speculative runs per turn, counting the ones that get restarted as the
+    transcript grows."""
+
+
+def normalize_transcript(text: str) -> str:
+    """Lowercase a transcript and strip punctuation and extra whitespace for comparison."""
+    return " ".join(_NOT_WORD.sub(" ", text.lower()).split())
+
+
+def transcripts_match(speculated: str, final: str, min_similarity: float) -> bool:
+    """Whether a final transcript is close enough to the speculated one."""
+    a, b = normalize_transcript(speculated), normalize_transcript(final)
+    if a == b:
+        return True
+    return difflib.SequenceMatcher(None, a, b).ratio() >= min_similarity
+
+
+class SpeculativeRun:
+    """A workflow run on a partial transcript. Its output is held until it is confirmed."""
+
+    def __init__(self, workflow: VoiceWorkflowBase, transcript: str, checkpoint: Any):
+        self.transcript = transcript
+        self.checkpoint = checkpoint
+        self._chunks: list[str] = []
+        self._done = False
+        self._error: Exception | None = None
+        self._changed = asyncio.Event()
+        self.task = asyncio.create_task(self._consume(workflow))
+
+    async def _consume(self, workflow: VoiceWorkflowBase) -> None:
+        run = workflow.run(self.transcript)
+        try:
+            async for chunk in run:
+                self._chunks.append(chunk)
+                self._changed.set()
+        except Exception as e:
+            self._error = e
+        finally:
+            self._done = True
+            self._changed.set()
+            aclose = getattr(run, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    async def cancel(self) -> None:
+        if not self.task.done():
+            self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+
+    async def stream(self) -> AsyncIterator[str]:
+        """Everything the run has produced so far, then the rest as it comes."""
+        sent = 0
+        while True:
+            while sent < len(self._chunks):
+                yield self._chunks[sent]
+                sent += 1
+            if self._done:
+                if self._error:
+                    raise self._error
+                return
+            self._changed.clear()
+            await self._changed.wait()
+
+
+class Speculator:
+    """Runs the workflow speculatively on the partial transcripts of a streamed session.
+
+    Fed partial transcripts by the transcription session, it keeps at most one speculative run
+    going and restarts it as the transcript grows. `take()` is given the final transcript and
+    returns the run if it matches, otherwise rolls the workflow back. Nothing is speculated while
+    a turn is being processed, since workflows don't expect to run twice at once.
+    """
+
+    def __init__(self, workflow: VoiceWorkflowBase, settings: SpeculationSettings):
+        self.workflow = workflow
+        self.settings = settings
+        self.busy = False
+        self._partial = ""
+        self._runs_this_turn = 0
+        self._current: SpeculativeRun | None = None
+        self._timer: asyncio.TimerHandle | None = None
+        self._lock = asyncio.Lock()
+        self._pending: set[asyncio.Task[Any]] = set()
+
+    def on_partial_transcript(self, text: str) -> None:
+        """Handle the latest partial transcript of the current turn."""
+        self._partial = text
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        if self.busy or len(text.split()) < self.settings.min_words:
+            return
+        if text.rstrip().endswith(_SENTENCE_END):
+            self._schedule(text)
+        else:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.settings.stable_ms / 1000, self._schedule, text
+            )
+
+    def _schedule(self, text: str) -> None:
+        self._timer = None
+        task = asyncio.create_task(self._start(text))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _start(self, text: str) -> None:
+        async with self._lock:
+            if self.busy or text != self._partial:
+                return
+            if self._current and normalize_transcript(self._current.transcript) == (
+                normalize_transcript(text)
+            ):
+                return
+            if self._runs_this_turn >= self.settings.max_runs_per_turn:
+                return
+            await self._discard()
+            checkpoint = self.workflow.checkpoint()
+            if checkpoint is None:
+                return
+            self._runs_this_turn += 1
+            logger.debug(f"Speculatively running the workflow on: {text}")
+            self._current = SpeculativeRun(self.workflow, text, checkpoint)
+
+    async def _discard(self) -> None:
+        if self._current is None:
+            return
+        run, self._current = self._current, None
+        await run.cancel()
+        self.workflow.restore(run.checkpoint)
+
+    async def take(self, transcript: str) -> SpeculativeRun | None:
+        """Claim the speculative run for a final transcript, if there is one and it matches.
+
+        Marks the speculator busy until `turn_done()`.
+        """
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        async with self._lock:
+            self.busy = True
+            self._partial = ""
+            self._runs_this_turn = 0
+            run = self._current
+            if run is None:
+                return None
+            if run._error is None and transcripts_match(
+                run.transcript, transcript, self.settings.min_similarity
+            ):
+                self._current = None
+                logger.debug("Speculative run confirmed")
+                return run
+            logger.debug("Speculative run discarded: the final transcript differs")
+            await self._discard()
+            return None
+
+    def turn_done(self) -> None:
+        self.busy = False
+
+    async def close(self) -> None:
+        if self._timer:
+            self._timer.cancel()
+        for task in list(self._pending):
+            task.cancel()
+        async with self._lock:
+            await self._discard()
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from pathlib import Path
+
+from ..logger import logger
+from .model import TTSModel, TTSModelSettings
+
+DEFAULT_TTS_CACHE_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTS_CACHE_MAX_ENTRY_BYTES = 4 * 1024 * 1024
+_HIT_CHUNK_BYTES = 4096
+
+
+@dataclass
+class TTSCacheStats:
+    """Counters for a `CachedTTSModel`."""
+
+    hits: int = 0
+    """Requests served from memory."""
+
+    disk_hits: int = 0
+    """Requests served from the on-disk store."""
+
+    misses: int = 0
+    """Requests that had to go to the underlying model."""
+
+    joined: int = 0
+    """Requests that shared a response another request was already reading from the underlying
+    model."""
+
+    evictions: int = 0
+    """Entries dropped from memory to stay under the byte limit."""
+
+    entries: int = 0
+    """Entries currently held in memory."""
+
+    bytes: int = 0
+    """Bytes of audio currently held in memory."""
+
+    @property
+    def hit_rate(self) -> float:
+        served = self.hits + self.disk_hits + self.joined
+        total = served + self.misses
+        return served / total if total else 0.0
+
+
+def normalize_tts_text(text: str) -> str:
+    """Collapse whitespace so the same phrase always maps to the same cache entry. Case and
+    punctuation are kept, since they change how the phrase is spoken."""
+    return " ".join(text.split())
+
+
+class _SharedResponse:
+    """A response from the underlying model, read by every concurrent request for the same key.
+
+    Whichever reader runs out of chunks first pulls the next one, so the model is read no faster
+    than the fastest reader.
+    """
+
+    def __init__(self, stream: AsyncIterator[bytes]):
+        self.stream = stream
+        self.chunks: list[bytes] = []
+        self.size = 0
+        self.done = False
+        self.error: Exception | None = None
+        self.readers = 0
+        self.pull: asyncio.Task[None] | None = None
+
+
+class CachedTTSModel(TTSModel):
+    """A TTS model that remembers the audio it has produced.
+
+    Wraps another `TTSModel`. Audio is content-addressed by the model name, the voice,
+    instructions and speed in the settings, and the normalized text, so a phrase is only
+    synthesized once for each way of saying it. Entries live in an in-memory LRU bounded by
+    `max_bytes`. If `disk_path` is set, they are also written there and read back with `mmap`,
+    so they survive restarts and are shared by every process pointing at the same directory.
+    Disk reads and writes run in a worker thread, and writes happen in the background once the
+    audio has been served, so the disk never holds up a reply. The directory is never pruned.
+
+    Concurrent requests for the same audio share a single response from the underlying model
+    instead of each synthesizing it. Only complete responses are cached: if every consumer stops
+    reading part way through (for example because the turn was interrupted), the response is
+    abandoned and nothing is stored.
+    """
+
+    def __init__(
+        self,
+        model: TTSModel,
+        *,
+        max_bytes: int = DEFAULT_TTS_CACHE_MAX_BYTES,
+        max_entry_bytes: int = DEFAULT_TTS_CACHE_MAX_ENTRY_BYTES,
+        disk_path: str | os.PathLike[str] | None = None,
+    ):
+        """Create a new cached TTS model.
+
+        Args:
+            model: The TTS model to cache.
+            max_bytes: The most audio, in bytes, to keep in memory.
+            max_entry_bytes: Responses larger than this are never cached.
+            disk_path: A directory for the persistent store. If not provided, the cache is
+                memory-only.
+        """
+        self.model = model
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.disk_path = Path(disk_path) if disk_path is not None else None
+        if self.disk_path is not None:
+            self.disk_path.mkdir(parents=True, exist_ok=True)
+        self.stats = TTSCacheStats()
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._responses: dict[str, _SharedResponse] = {}
+        self._disk_writes: set[asyncio.Task[None]] = set()
+
+    @property
+    def model_name(self) -> str:
+        return self.model.model_name
+
+    def cache_key(self, text: str, settings: TTSModelSettings) -> str:
+        """The content address of `text` spoken with `settings`."""
+        material = json.dumps(
+            [
+                self.model.model_name,
+                settings.voice,
+                settings.instructions,
+                settings.speed,
+                normalize_tts_text(text),
+            ]
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    async def run(self, text: str, settings: TTSModelSettings) -> AsyncIterator[bytes]:
+        key = self.cache_key(text, settings)
+
+        audio = self._memory.get(key)
+        if audio is not None:
+            self._memory.move_to_end(key)
+            self.stats.hits += 1
+            for start in range(0, len(audio), _HIT_CHUNK_BYTES):
+                yield audio[start : start + _HIT_CHUNK_BYTES]
+            return
+
+        disk_audio = await asyncio.to_thread(self._read_disk, key) if self.disk_path else None
+        if disk_audio is not None:
+            self.stats.disk_hits += 1
+            self._remember(key, disk_audio)
+            for start in range(0, len(disk_audio), _HIT_CHUNK_BYTES):
+                yield disk_audio[start : start + _HIT_CHUNK_BYTES]
+            return
+
+        shared = self._responses.get(key)
+        if shared is None:
+            self.stats.misses += 1
+            shared = _SharedResponse(self.model.run(text, settings))
+            self._responses[key] = shared
+        else:
+            self.stats.joined += 1
+
+        shared.readers += 1
+        try:
+            sent = 0
+            while True:
+                while sent < len(shared.chunks):
+                    yield shared.chunks[sent]
+                    sent += 1
+                if shared.done:
+                    if shared.error is not None:
+                        raise shared.error
+                    return
+                if shared.pull is None or shared.pull.done():
+                    shared.pull = asyncio.create_task(self._pull(key, shared))
+                # Shielded, so one reader going away doesn't cut the response off for the others
+                await asyncio.shield(shared.pull)
+        finally:
+            shared.readers -= 1
+            if shared.readers == 0 and not shared.done:
+                # Nobody is listening any more: stop the response and cache nothing
+                shared.done = True
+                self._forget_response(key, shared)
+                if shared.pull is not None and not shared.pull.done():
+                    shared.pull.cancel()
+                else:
+                    aclose = getattr(shared.stream, "aclose", None)
+                    if aclose is not None:
+                        await aclose()
+
+    def clear(self) -> None:
+        """Drop everything held in memory. The on-disk store is left alone."""
+        self._memory.clear()
+        self.stats.entries = 0
+        self.stats.bytes = 0
+
+    async def flush(self) -> None:
+        """Wait until every entry still being written to the on-disk store is on disk."""
+        while self._disk_writes:
+            await asyncio.gather(*self._disk_writes)
+
+    async def _pull(self, key: str, shared: _SharedResponse) -> None:
+        try:
+            chunk = await shared.stream.__anext__()
+        except StopAsyncIteration:
+            shared.done = True
+            self._forget_response(key, shared)
+            if 0 < shared.size <= self.max_entry_bytes:
+                audio = b"".join(shared.chunks)
+                self._remember(key, audio)
+                if self.disk_path is not None:
+                    self._start_disk_write(key, audio)
+        except Exception as e:
+            shared.done = True
+            shared.error = e
+            self._forget_response(key, shared)
+        else:
+            shared.chunks.append(chunk)
+            shared.size += len(chunk)
+
+    def _start_disk_write(self, key: str, audio: bytes) -> None:
+        # In the background and off the event loop: readers already have the audio, and a slow
+        # disk mustn't stall them or any other call
+        task = asyncio.create_task(asyncio.to_thread(self._write_disk, key, audio))
+        self._disk_writes.add(task)
+        task.add_done_callback(self._disk_writes.discard)
+
+    def _forget_response(self, key: str, shared: _SharedResponse) -> None:
+        if self._responses.get(key) is shared:
+            del self._responses[key]
+
+    def _remember(self, key: str, audio: bytes) -> None:
+        if len(audio) > self.max_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self.stats.bytes -= len(previous)
+        self._memory[key] = audio
+        self.stats.bytes += len(audio)
+        while self.stats.bytes > self.max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self.stats.bytes -= len(evicted)
+            self.stats.evictions += 1
+        self.stats.entries = len(self._memory)
+
+    def _disk_file(self, key: str) -> Path:
+        assert self.disk_path is not None
+        return self.disk_path / key[:2] / f"{key}.pcm"
+
+    def _read_disk(self, key: str) -> bytes | None:
+        # Runs in a worker thread: copying out of the mapping is where the disk is actually read
+        try:
+            with open(self._disk_file(key), "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return mapped[:]
+        except (OSError, ValueError):
+            # Missing, unreadable or empty
+            return None
+
+    def _write_disk(self, key: str, audio: bytes) -> None:
+        if self.disk_path is None:
+            return
+        path = self._disk_file(key)
+        try:
+            path.parent.mkdir(exist_ok=True)
+            # Write to a temporary file and rename it into place, so other processes never see a
+            # partially written entry
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_name, path)
+        except OSError as e:
+            logger.warning(f"Could not write TTS cache entry {path}: {e}")
@@ -1,4 +1,5 @@
 import re
+import time
 from typing import Callable
 
 
@@ -35,3 +36,164 @@ def get_sentence_based_splitter(
         return "", text_buffer
 
     return sentence_based_text_splitter
+
+
+_SENTENCE_END = ".!?"
+_CLAUSE_END = ",;:—"
+# Closing quotes and brackets that can sit between the punctuation and the space after it
+_CLOSERS = "\"')]”’"
+
+
+class IncrementalTextSplitter:
+    """Splits a turn's streamed text into chunks for TTS as it arrives.
+
+    Each `push()` only looks at the text that is new since the last one, so a long reply costs
+    no more to split than a short one. The first chunk of a turn is cut at the first clause
+    boundary (a comma, semicolon, colon or dash, or the end of a sentence) at least
+    `first_chunk_min_length` characters in, so the listener hears something quickly. After that,
+    chunks are whole sentences of at least `min_sentence_length` characters. If `max_wait_seconds`
+    is set and no boundary turns up within that long of text arriving, what there is up to the
+    last whole word is cut anyway. A single word is never cut.
+
+    A splitter keeps state for one stream of turns. `flush()` ends a turn and `reset()` drops it.
+    """
+
+    def __init__(
+        self,
+        first_chunk_min_length: int = 10,
+        min_sentence_length: int = 20,
+        max_wait_seconds: float | None = None,
+    ):
+        """Create a new splitter.
+
+        Args:
+            first_chunk_min_length: The minimum length of the first chunk of a turn.
+            min_sentence_length: The minimum length of the later chunks of a turn.
+            max_wait_seconds: How long text may wait for a boundary before it is cut at the last
+                whole word instead. None (the default) to always wait for a boundary.
+        """
+        self.first_chunk_min_length = first_chunk_min_length
+        self.min_sentence_length = min_sentence_length
+        self.max_wait_seconds = max_wait_seconds
+        self._pending = ""
+        self._scanned = 0
+        self._last_sentence_end: int | None = None
+        self._last_clause_end: int | None = None
+        self._last_space: int | None = None
+        self._pending_since: float | None = None
+        self._first_chunk = True
+
+    @property
+    def deadline(self) -> float | None:
+        """When the text waiting for a boundary is due to be cut (`time.monotonic()`), if any. None
+        while there is no whole word to cut after."""
+        if self.max_wait_seconds is None or self._pending_since is None:
+            return None
+        if self._last_space is None:
+            return None
+        return self._pending_since + self.max_wait_seconds
+
+    def push(self, text: str, now: float | None = None) -> str:
+        """Add text to the turn.
+
+        Args:
+            text: The new text.
+            now: The current `time.monotonic()`, if the caller already has it.
+
+        Returns:
+            The next chunk to synthesize, or an empty string if the text should wait for more.
+        """
+        now = time.monotonic() if now is None else now
+        if not self._pending:
+            # A chunk never starts with whitespace, so a space is always the end of a word
+            text = text.lstrip()
+        if self._pending_since is None and text:
+            self._pending_since = now
+        self._pending += text
+        self._scan()
+
+        if self._first_chunk:
+            cut, min_length = self._last_clause_end, self.first_chunk_min_length
+        else:
+            cut, min_length = self._last_sentence_end, self.min_sentence_length
+        if cut is not None and cut >= min_length:
+            return self._cut(cut, now)
+        return self.flush_due(now)
+
+    def flush_due(self, now: float | None = None) -> str:
+        """Cut the waiting text at the last whole word if it is past its deadline.
+
+        Returns:
+            The chunk, or an empty string if nothing is due.
+        """
+        deadline = self.deadline
+        now = time.monotonic() if now is None else now
+        if deadline is None or now < deadline or self._last_space is None:
+            return ""
+        return self._cut(self._last_space, now)
+
+    def flush(self) -> str:
+        """End the turn.
+
+        Returns:
+            All the text still waiting.
+        """
+        chunk = self._pending.strip()
+        self.reset()
+        return chunk
+
+    def reset(self) -> None:
+        """Drop the text still waiting and start a new turn."""
+        self._pending = ""
+        self._scanned = 0
+        self._last_sentence_end = self._last_clause_end = self._last_space = None
+        self._pending_since = None
+        self._first_chunk = True
+
+    def _scan(self) -> None:
+        pending = self._pending
+        for i in range(self._scanned, len(pending)):
+            if not pending[i].isspace():
+                continue
+            self._last_space = i
+            # Look back past closing quotes and brackets for the punctuation
+            j = i - 1
+            while j >= 0 and pending[j] in _CLOSERS:
+                j -= 1
+            if j < 0:
+                continue
+            if pending[j] in _SENTENCE_END:
+                self._last_sentence_end = self._last_clause_end = i
+            elif pending[j] in _CLAUSE_END:
+                self._last_clause_end = i
+        self._scanned = len(pending)
+
+    def _cut(self, at: int, now: float) -> str:
+        chunk = self._pending[:at].strip()
+        self._pending = self._pending[at:].lstrip()
+        if chunk:
+            self._first_chunk = False
+        # What's left is short (it follows the cut), so finding its boundaries again is cheap
+        self._scanned = 0
+        self._last_sentence_end = self._last_clause_end = self._last_space = None
+        self._scan()
+        self._pending_since = now if self._pending else None
+        return chunk
+
+
+class _CallableSplitter(IncrementalTextSplitter):
+    """Adapts a `text_splitter` function, which re-splits the whole buffer each time."""
+
+    def __init__(self, splitter: Callable[[str], tuple[str, str]]):
+        super().__init__(max_wait_seconds=None)
+        self._splitter = splitter
+
+    def push(self, text: str, now: float | None = None) -> str:
+        text_buffer = self._pending + text
+        chunk, remaining = self._splitter(text_buffer)
+        # Like the sentence splitter, don't send TTS anything shorter than `min_sentence_length`
+        if len(chunk) < self.min_sentence_length:
+            self._pending = text_buffer
+            return ""
+        self._pending = remaining
+        return chunk
@@ -0,0 +1,264 @@
+"""Local voice activity detection for streamed audio.
+
+Runs next to the audio stream, so speech start and end are known the moment the audio arrives
+rather than after a round trip to a server-side VAD. Each 10-30 ms frame is classified from its
+energy relative to an adaptive noise floor and its zero-crossing rate; a short run of speech
+frames starts speech, and a configurable hangover of non-speech frames ends it.
+
+`SilenceGate` is a much cruder cousin used to avoid streaming long silences to a model.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Literal
+
+from ..exceptions import UserError
+from ._pcm import PCM16_FULL_SCALE
+from .imports import np, npt
+from .input import DEFAULT_SAMPLE_RATE
+
+_SILENCE_DB = -100.0
+
+
+@dataclass
+class VADEvent:
+    """Speech started or ended in a stream of audio."""
+
+    type: Literal["speech_start", "speech_end"]
+    """What happened."""
+
+    timestamp: float
+    """When it happened, in seconds of audio since the start of the stream. For `speech_start`
+    this is the start of the first speech frame, for `speech_end` the end of the last one."""
+
+
+class VoiceActivityDetector:
+    """Detects when someone starts and stops speaking in a stream of mono PCM audio.
+
+    Feed audio chunks of any size to `process`, which returns the events they triggered. Energy
+    and zero-crossing rate are computed for all whole frames in a chunk at once; incomplete frames
+    are carried over to the next call. Use one detector per stream.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = DEFAULT_SAMPLE_RATE,
+        *,
+        frame_ms: int = 20,
+        threshold_db: float = 12.0,
+        min_energy_db: float = -45.0,
+        max_zero_crossing_rate: float = 0.35,
+        start_ms: int = 60,
+        hangover_ms: int = 400,
+        noise_adapt_s: float = 1.5,
+    ):
+        """Create a new voice activity detector.
+
+        Args:
+            sample_rate: The sample rate of the audio passed to `process`.
+            frame_ms: The analysis frame length, between 10 and 30 ms.
+            threshold_db: How far above the noise floor a frame has to be to count as speech.
+            min_energy_db: Frames quieter than this (in dBFS) are never speech, however quiet
+                the line is.
+            max_zero_crossing_rate: Frames that cross zero more often than this (as a fraction
+                of samples) are treated as hiss or clicks rather than voice.
+            start_ms: How much continuous speech it takes to emit `speech_start`.
+            hangover_ms: How much continuous non-speech it takes to emit `speech_end`.
+            noise_adapt_s: Time constant for the noise floor to follow louder background noise.
+                It follows quieter noise almost immediately.
+        """
+        if not 10 <= frame_ms <= 30:
+            raise UserError("frame_ms must be between 10 and 30")
+        self.sample_rate = sample_rate
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.frame_seconds = self.frame_samples / sample_rate
+        self.threshold_db = threshold_db
+        self.min_energy_db = min_energy_db
+        self.max_zero_crossing_rate = max_zero_crossing_rate
+        self.start_frames = max(1, round(start_ms / frame_ms))
+        self.hangover_frames = max(1, round(hangover_ms / frame_ms))
+        self._rise = self.frame_seconds / noise_adapt_s
+        # While someone is talking the floor still rises, just much more slowly, so a sudden
+        # jump in background noise cannot hold the detector in speech forever
+        self._rise_in_speech = self._rise / 10
+
+        self._pending = np.zeros(self.frame_samples, dtype=np.float32)
+        self._pending_len = 0
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget everything, including the noise floor."""
+        self._pending_len = 0
+        self.noise_floor_db: float | None = None
+        self.is_speaking = False
+        self._frames_seen = 0
+        self._speech_run = 0
+        self._silence_run = 0
+        self._candidate_start = 0
+
+    def _frame_features(
+        self, frames: npt.NDArray[np.float32]
+    ) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+        power = np.einsum("ij,ij->i", frames, frames) / self.frame_samples
+        energy_db = 10 * np.log10(np.maximum(power, 1e-10))
+        signs = np.signbit(frames)
+        crossings = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1)
+        return energy_db.astype(np.float64), crossings / self.frame_samples
+
+    def process(self, audio: npt.NDArray[np.int16 | np.float32]) -> list[VADEvent]:
+        """Analyse the next chunk of the stream.
+
+        Args:
+            audio: int16 samples, or float32 samples in [-1, 1].
+
+        Returns:
+            The speech start and end events in this chunk, oldest first. Usually empty.
+        """
+        samples: npt.NDArray[np.float32]
+        if audio.dtype == np.int16:
+            samples = audio.reshape(-1).astype(np.float32)
+            samples *= np.float32(1 / PCM16_FULL_SCALE)
+        elif audio.dtype == np.float32:
+            samples = audio.reshape(-1).astype(np.float32, copy=False)
+        else:
+            raise UserError("Buffer must be a numpy array of int16 or float32")
+
+        if self._pending_len:
+            fill = min(self.frame_samples - self._pending_len, len(samples))
+            self._pending[self._pending_len : self._pending_len + fill] = samples[:fill]
+            self._pending_len += fill
+            samples = samples[fill:]
+            if self._pending_len < self.frame_samples:
+                return []
+            samples = np.concatenate((self._pending, samples))
+            self._pending_len = 0
+
+        whole = len(samples) - len(samples) % self.frame_samples
+        rest = len(samples) - whole
+        self._pending[:rest] = samples[whole:]
+        self._pending_len = rest
+        if not whole:
+            return []
+
+        energy_db, zcr = self._frame_features(samples[:whole].reshape(-1, self.frame_samples))
+        events: list[VADEvent] = []
+        for db, crossing_rate in zip(energy_db.tolist(), zcr.tolist()):
+            self._step(db, crossing_rate, events)
+        return events
+
+    def _step(self, db: float, crossing_rate: float, events: list[VADEvent]) -> None:
+        frame = self._frames_seen
+        self._frames_seen += 1
+        if self.noise_floor_db is None:
+            # Calls start with the line open and nobody talking yet
+            self.noise_floor_db = max(db, _SILENCE_DB)
+
+        speech = (
+            db >= self.noise_floor_db + self.threshold_db
+            and db >= self.min_energy_db
+            and crossing_rate <= self.max_zero_crossing_rate
+        )
+
+        if db < self.noise_floor_db:
+            self.noise_floor_db += (db - self.noise_floor_db) * 0.5
+        else:
+            rise = self._rise_in_speech if speech or self.is_speaking else self._rise
+            self.noise_floor_db += (db - self.noise_floor_db) * rise
+
+        if not self.is_speaking:
+            if not speech:
+                self._speech_run = 0
+                return
+            if self._speech_run == 0:
+                self._candidate_start = frame
+            self._speech_run += 1
+            if self._speech_run >= self.start_frames:
+                self.is_speaking = True
+                self._silence_run = 0
+                events.append(VADEvent("speech_start", self._candidate_start * self.frame_seconds))
+            return
+
+        if speech:
+            self._silence_run = 0
+            return
+        self._silence_run += 1
+        if self._silence_run >= self.hangover_frames:
+            self.is_speaking = False
+            self._speech_run = 0
+            last_speech_end = frame + 1 - self._silence_run
+            events.append(VADEvent("speech_end", last_speech_end * self.frame_seconds))
+
+
+@dataclass
+class SilenceGateSettings:
+    """Settings for dropping long silences from audio streamed to a transcription model."""
+
+    threshold_db: float = -50.0
+    """Chunks quieter than this (RMS, in dBFS) count as silence."""
+
+    pre_padding_ms: int = 300
+    """Silence kept and sent just before speech resumes, so the start of speech isn't clipped."""
+
+    post_padding_ms: int = 1000
+    """
+    Silence still sent after speech stops. Unless turns are ended locally, it has to be longer
+    than the `silence_duration_ms` of the model's `server_vad` turn detection, or the model never
+    hears enough silence to end the turn.
+    """
+
+
+class SilenceGate:
+    """Decides which chunks of an audio stream are worth sending.
+
+    Audio is passed through while someone is speaking and for `post_padding_ms` afterwards.
+    After that silent chunks are held back, keeping only the most recent `pre_padding_ms`, which
+    are released in front of the next loud chunk. Counts the bytes it drops.
+    """
+
+    def __init__(self, settings: SilenceGateSettings, sample_rate: int = DEFAULT_SAMPLE_RATE):
+        self.settings = settings
+        self.sample_rate = sample_rate
+        self.bytes_in = 0
+        self.bytes_dropped = 0
+        self._held: deque[npt.NDArray[np.int16 | np.float32]] = deque()
+        self._held_seconds = 0.0
+        # Start out gated: nothing has been said yet
+        self._silent_seconds = settings.post_padding_ms / 1000
+
+    @staticmethod
+    def _level_db(audio: npt.NDArray[np.int16 | np.float32]) -> float:
+        if not len(audio):
+            return _SILENCE_DB
+        samples = audio.astype(np.float32).reshape(-1)
+        if audio.dtype == np.int16:
+            samples *= np.float32(1 / PCM16_FULL_SCALE)
+        power = float(np.dot(samples, samples)) / len(samples)
+        return 10 * float(np.log10(max(power, 1e-10)))
+
+    def process(
+        self, audio: npt.NDArray[np.int16 | np.float32]
+    ) -> list[npt.NDArray[np.int16 | np.float32]]:
+        """Feed the next chunk. Returns the chunks to send now, oldest first."""
+        self.bytes_in += audio.nbytes
+        seconds = len(audio) / self.sample_rate
+
+        if self._level_db(audio) >= self.settings.threshold_db:
+            send = [*self._held, audio]
+            self._held.clear()
+            self._held_seconds = 0.0
+            self._silent_seconds = 0.0
+            return send
+
+        self._silent_seconds += seconds
+        if self._silent_seconds <= self.settings.post_padding_ms / 1000:
+            return [audio]
+
+        self._held.append(audio)
+        self._held_seconds += seconds
+        while self._held and self._held_seconds > self.settings.pre_padding_ms / 1000:
+            dropped = self._held.popleft()
+            self._held_seconds -= len(dropped) / self.sample_rate
+            self.bytes_dropped += dropped.nbytes
+        return []
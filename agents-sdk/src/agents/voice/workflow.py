@@ -32,6 +32,18 @@ class VoiceWorkflowBase(abc.ABC):
         """
         pass
 
+    def checkpoint(self) -> Any:
+        """
+        Snapshot the workflow's state, so that a speculative `run()` (see `SpeculationSettings`)
+        can be rolled back with `restore()` if its transcript turns out to be wrong. The default
+        returns None, which means the workflow is never run speculatively.
+        """
+        return None
+
+    def restore(self, checkpoint: Any) -> None:
+        """Undo everything since `checkpoint()` returned `checkpoint`."""
+        return None
+
 
 class VoiceWorkflowHelper:
     @classmethod
@@ -91,3 +103,9 @@ class SingleAgentVoiceWorkflow(VoiceWorkflowBase):
         # Update the input history and current agent
         self._input_history = result.to_input_list()
         self._current_agent = result.last_agent
+
+    def checkpoint(self) -> Any:
+        return list(self._input_history), self._current_agent
+
+    def restore(self, checkpoint: Any) -> None:
+        self._input_history, self._current_agent = checkpoint
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+try:
+    from agents import UserError
+    from agents.voice import AudioInput, alaw_decode, alaw_encode, mulaw_decode, mulaw_encode
+except ImportError:
+    pass
+
+
+ALL_CODES = bytes(range(256))
+
+
+def test_mulaw_decode_known_values():
+    decoded = mulaw_decode(bytes([0xFF, 0x7F, 0x00, 0x80]))
+    assert decoded.dtype == np.int16
+    assert decoded.tolist() == [0, 0, -32124, 32124]
+
+
+def test_alaw_decode_known_values():
+    decoded = alaw_decode(bytes([0xD5, 0x55, 0x2A, 0xAA]))
+    assert decoded.dtype == np.int16
+    assert decoded.tolist() == [8, -8, -32256, 32256]
+
+
+def test_encode_silence():
+    silence = np.zeros(160, dtype=np.int16)
+    assert mulaw_encode(silence).tobytes() == b"\xff" * 160
+    assert alaw_encode(silence).tobytes() == b"\xd5" * 160
+
+
+@pytest.mark.parametrize(
+    "encode, decode",
+    [(mulaw_encode, mulaw_decode), (alaw_encode, alaw_decode)],
+)
+def test_roundtrip_is_stable(encode, decode):
+    # Every decoded code word must encode back to a code that decodes to the same sample.
+    samples = decode(ALL_CODES)
+    assert np.array_equal(decode(encode(samples)), samples)
+
+
+@pytest.mark.parametrize(
+    "encode, decode, tolerance",
+    [(mulaw_encode, mulaw_decode, 0.04), (alaw_encode, alaw_decode, 0.04)],
+)
+def test_encode_error_is_bounded(encode, decode, tolerance):
+    # G.711 is logarithmic: the quantization error grows with the amplitude but stays within a
+    # few percent of it.
+    samples = np.linspace(-32000, 32000, 8000).astype(np.int16)
+    error = np.abs(decode(encode(samples)).astype(np.int32) - samples)
+    assert np.all(error <= np.maximum(np.abs(samples) * tolerance, 32))
+
+
+def test_encode_float32_matches_int16():
+    samples = np.linspace(-1.0, 1.0, 1000, dtype=np.float32)
+    as_int16 = np.clip(samples * 32768, -32768, 32767).astype(np.int16)
+    assert np.array_equal(mulaw_encode(samples), mulaw_encode(as_int16))
+    assert np.array_equal(alaw_encode(samples), alaw_encode(as_int16))
+
+
+def test_reuses_output_buffers():
+    pcm_out = np.empty(256, dtype=np.int16)
+    decoded = mulaw_decode(ALL_CODES, out=pcm_out)
+    assert decoded is pcm_out
+
+    code_out = np.empty(256, dtype=np.uint8)
+    encoded = mulaw_encode(pcm_out, out=code_out)
+    assert encoded is code_out
+
+
+def test_encode_invalid_dtype():
+    with pytest.raises(UserError, match="Buffer must be a numpy array of int16 or float32"):
+        mulaw_encode(np.zeros(4, dtype=np.float64))
+
+    with pytest.raises(UserError, match="Encoded audio must be a numpy array of uint8"):
+        mulaw_decode(np.zeros(4, dtype=np.int16))
+
+
+def test_audio_input_from_mulaw_bytes():
+    payload = mulaw_encode(np.full(160, 1000, dtype=np.int16)).tobytes()
+    audio_input = AudioInput.from_raw_bytes(payload, sample_rate=8000, encoding="mulaw")
+
+    assert audio_input.frame_rate == 8000
+    assert len(audio_input.buffer) == 160
+    assert np.all(np.abs(audio_input.buffer.astype(np.int32) - 1000) < 40)
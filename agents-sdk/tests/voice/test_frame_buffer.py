@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+try:
+    from agents import UserError
+    from agents.voice import AudioFrameBuffer
+except ImportError:
+    pass
+
+
+def test_frame_buffer_carries_split_samples_across_chunks():
+    samples = np.arange(-500, 500, dtype=np.int16)
+    data = samples.tobytes()
+    buffer = AudioFrameBuffer(capacity=16)
+    drained = []
+    # Odd-sized chunks split samples in half
+    for start in range(0, len(data), 333):
+        buffer.append(data[start : start + 333])
+        drained.append(buffer.drain())
+
+    assert buffer.nbytes == 0
+    assert np.array_equal(np.concatenate(drained), samples)
+
+
+def test_frame_buffer_drain_converts_like_the_pipeline():
+    samples = np.array([-32768, -1, 0, 1, 32767], dtype=np.int16)
+    buffer = AudioFrameBuffer()
+    buffer.append(samples.tobytes())
+    out = np.empty(5, dtype=np.float32)
+
+    result = buffer.drain(np.float32, out=out)
+    assert result is out
+    assert np.array_equal(out, samples.astype(np.float32) / 32768)
+    assert len(buffer) == 0
+
+
+def test_frame_buffer_converts_float_input():
+    audio = np.array([-2.0, -1.0, -0.5, 0.0, 0.5, 1.0, 2.0], dtype=np.float32)
+    buffer = AudioFrameBuffer(np.int16)
+    buffer.append(audio)
+    expected = np.clip(audio * 32768, -32768, 32767).astype(np.int16)
+    assert np.array_equal(buffer.view(), expected)
+    assert buffer.tobytes() == expected.tobytes()
+
+
+def test_frame_buffer_reuses_its_storage():
+    buffer = AudioFrameBuffer(capacity=4)
+    buffer.append(np.ones(100, dtype=np.int16))
+    storage = buffer.view()
+    buffer.drain()
+    buffer.append(np.ones(100, dtype=np.int16))
+    assert np.shares_memory(buffer.view(), storage)
+    buffer.clear()
+    assert len(buffer) == 0
+
+
+def test_frame_buffer_rejects_bad_input():
+    with pytest.raises(UserError):
+        AudioFrameBuffer(np.int32)
+    buffer = AudioFrameBuffer()
+    with pytest.raises(UserError):
+        buffer.append(np.zeros(4, dtype=np.int32))
+    buffer.append(b"\x01")
+    with pytest.raises(UserError):
+        buffer.append(np.zeros(4, dtype=np.int16))
+    with pytest.raises(UserError):
+        buffer.drain(np.float64)
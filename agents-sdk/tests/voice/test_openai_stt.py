@@ -11,7 +11,7 @@ import pytest
 try:
     from agents.voice import OpenAISTTTranscriptionSession, StreamedAudioInput, STTModelSettings
     from agents.voice.exceptions import STTWebsocketConnectionError
-    from agents.voice.models.openai_stt import EVENT_INACTIVITY_TIMEOUT
+    from agents.voice.models.openai_stt import EVENT_INACTIVITY_TIMEOUT, WebsocketDoneSentinel
 
     from .fake_models import FakeStreamedAudioInput
 except ImportError:
@@ -229,6 +229,49 @@ async def test_transcription_event_puts_output_in_queue():
         # Cleanup
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize("include_audio", [True, False])
+async def test_turn_audio_buffer_is_reset_every_turn(include_audio: bool):
+    """
+    The audio kept for tracing only ever holds the current turn, however many turns the session
+    runs, and nothing is kept when audio isn't traced.
+    """
+    session = OpenAISTTTranscriptionSession(
+        input=StreamedAudioInput(),
+        client=AsyncMock(api_key="FAKE_KEY"),
+        model="whisper-1",
+        settings=STTModelSettings(),
+        trace_include_sensitive_data=False,
+        trace_include_sensitive_audio_data=include_audio,
+    )
+    session._websocket = AsyncMock()
+    audio_queue = session._input_queue
+    streamer = asyncio.create_task(session._stream_audio(audio_queue))
+    handler = asyncio.create_task(session._handle_events())
+
+    frame = np.ones(160, dtype=np.int16)
+    for turn in range(3):
+        for _ in range(5):
+            await audio_queue.put(frame)
+        while not audio_queue.empty():
+            await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert len(session._turn_audio_buffer) == (5 * len(frame) if include_audio else 0)
+
+        await session._event_queue.put(
+            {
+                "type": "conversation.item.input_audio_transcription.completed",
+                "transcript": f"turn {turn}",
+            }
+        )
+        assert await session._output_queue.get() == f"turn {turn}"
+        assert len(session._turn_audio_buffer) == 0
+
+    streamer.cancel()
+    await session._event_queue.put(WebsocketDoneSentinel())
+    await handler
+
+
 @pytest.mark.asyncio
 async def test_timeout_waiting_for_created_event(monkeypatch):
     """
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+try:
+    from agents import UserError
+    from agents.voice import (
+        AudioOutputEncoder,
+        StreamedAudioResult,
+        StreamingResampler,
+        TTSModelSettings,
+        VoicePipelineConfig,
+        alaw_encode,
+        mulaw_encode,
+    )
+
+    from .fake_models import FakeTTS
+    from .helpers import extract_events
+except ImportError:
+    pass
+
+
+def _tone(seconds: float = 0.5, rate: int = 24000) -> np.ndarray:
+    t = np.arange(int(rate * seconds)) / rate
+    return (np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16)
+
+
+def _encode_in_chunks(
+    encoder: "AudioOutputEncoder", audio: np.ndarray, size: int
+) -> list[np.ndarray]:
+    out = [encoder.encode(audio[i : i + size]) for i in range(0, len(audio), size)]
+    out.append(encoder.flush())
+    return [chunk for chunk in out if chunk is not None]
+
+
+@pytest.mark.parametrize("encoding", ["mulaw", "alaw"])
+def test_encoder_matches_resampling_then_encoding(encoding):
+    audio = _tone()
+    encoder = AudioOutputEncoder(24000, 8000, encoding, frame_duration_ms=20)
+    frames = np.concatenate(_encode_in_chunks(encoder, audio, 777))
+    assert frames.dtype == np.uint8
+    assert frames.shape[1] == 160
+
+    resampler = StreamingResampler(24000, 8000)
+    expected = resampler.process(audio).copy()
+    codec = mulaw_encode if encoding == "mulaw" else alaw_encode
+    assert np.array_equal(frames.reshape(-1)[: len(expected)], codec(expected))
+
+
+def test_encoder_pads_the_last_frame_with_silence():
+    encoder = AudioOutputEncoder(24000, 24000, "mulaw", frame_duration_ms=20)
+    assert encoder.encode(np.zeros(100, np.int16)) is None
+    last = encoder.flush()
+    assert last is not None
+    assert last.shape == (1, 480)
+    assert np.all(last == 0xFF)
+    assert encoder.flush() is None
+
+
+def test_encoder_float32_without_frames_is_a_column():
+    audio = np.array([0, 16384, -32768], dtype=np.int16)
+    encoder = AudioOutputEncoder(24000, encoding="float32")
+    out = encoder.encode(audio)
+    assert out is not None
+    assert out.shape == (3, 1)
+    assert np.array_equal(out[:, 0], [0.0, 0.5, -1.0])
+
+
+def test_encoder_float32_round_trips_exactly():
+    audio = _tone()
+    encoder = AudioOutputEncoder(24000, encoding="float32")
+    out = encoder.encode(audio)
+    assert out is not None
+    assert np.array_equal((out[:, 0] * 32768).astype(np.int16), audio)
+
+
+def test_encoder_rejects_unknown_encodings():
+    with pytest.raises(UserError):
+        AudioOutputEncoder(24000, encoding="opus")  # type: ignore[arg-type]
+
+
+@pytest.mark.asyncio
+async def test_result_emits_wire_ready_frames():
+    settings = TTSModelSettings(
+        buffer_size=1, output_sample_rate=8000, output_encoding="mulaw", frame_duration_ms=20
+    )
+    result = StreamedAudioResult(FakeTTS(), settings, VoicePipelineConfig())
+    await result._add_text("Hello there, this is a test of the output format. Bye now.")
+    await result._turn_done()
+    await result._done()
+
+    events, audio_chunks = await extract_events(result)
+    assert events[-2:] == ["turn_ended", "session_ended"]
+    assert audio_chunks
+    # Every audio event is made of whole 20 ms frames of 8 kHz mu-law
+    assert all(len(chunk) % 160 == 0 for chunk in audio_chunks)
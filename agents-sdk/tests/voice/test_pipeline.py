@@ -1,11 +1,22 @@
 from __future__ import annotations
 
+import asyncio
+import time
+from collections.abc import AsyncIterator
+
 import numpy as np
 import numpy.typing as npt
 import pytest
 
 try:
-    from agents.voice import AudioInput, TTSModelSettings, VoicePipeline, VoicePipelineConfig
+    from agents.voice import (
+        AudioInput,
+        StreamedAudioResult,
+        TTSModelSettings,
+        VoicePipeline,
+        VoicePipelineConfig,
+        VoiceStreamEvent,
+    )
 
     from .fake_models import FakeStreamedAudioInput, FakeSTT, FakeTTS, FakeWorkflow
     from .helpers import extract_events
@@ -177,3 +188,289 @@ async def test_voicepipeline_transform_data() -> None:
         "session_ended",
     ]
     await fake_tts.verify_audio("out_1", audio_chunks[0], dtype=np.int16)
+
+
+@pytest.mark.asyncio
+async def test_voicepipeline_streamed_audio_input_without_turns() -> None:
+    # Multi turn, but the caller never finished a turn. The stream should still end cleanly.
+
+    fake_stt = FakeSTT([])
+    workflow = FakeWorkflow()
+    fake_tts = FakeTTS()
+    pipeline = VoicePipeline(workflow=workflow, stt_model=fake_stt, tts_model=fake_tts)
+
+    streamed_audio_input = await FakeStreamedAudioInput.get(count=2)
+
+    result = await pipeline.run(streamed_audio_input)
+    events, audio_chunks = await extract_events(result)
+    assert events == ["session_ended"]
+    assert audio_chunks == []
+
+
+class StallingTTS(FakeTTS):
+    """Yields one chunk for text containing "stall" and then never finishes."""
+
+    def __init__(self):
+        super().__init__()
+        self.cancelled = False
+
+    async def run(self, text: str, settings: TTSModelSettings) -> AsyncIterator[bytes]:
+        yield np.zeros(2, dtype=np.int16).tobytes()
+        if "stall" in text:
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                self.cancelled = True
+                raise
+
+
+def _label(event: VoiceStreamEvent) -> str:
+    if event.type == "voice_stream_event_lifecycle":
+        return event.event
+    if event.type == "voice_stream_event_audio":
+        return "audio"
+    return "error"
+
+
+@pytest.mark.asyncio
+async def test_voicepipeline_interrupt_multi_turn() -> None:
+    # The first turn stalls mid-speech and gets interrupted. The session should carry on with the
+    # second turn.
+
+    fake_stt = FakeSTT(["first", "second"])
+    workflow = FakeWorkflow([["stall here"], ["out_2"]])
+    fake_tts = StallingTTS()
+    config = VoicePipelineConfig(tts_settings=TTSModelSettings(buffer_size=1))
+    pipeline = VoicePipeline(
+        workflow=workflow, stt_model=fake_stt, tts_model=fake_tts, config=config
+    )
+    streamed_audio_input = await FakeStreamedAudioInput.get(count=2)
+
+    result = await pipeline.run(streamed_audio_input)
+    events: list[str] = []
+    async for event in result.stream():
+        events.append(_label(event))
+        if events == ["turn_started", "audio"]:
+            assert await pipeline.interrupt()
+
+    assert events == [
+        "turn_started",
+        "audio",  # first chunk of the stalled turn
+        "turn_interrupted",
+        "turn_started",
+        "audio",  # out_2
+        "turn_ended",
+        "session_ended",
+    ]
+    assert fake_tts.cancelled
+
+
+@pytest.mark.asyncio
+async def test_voicepipeline_interrupt_single_turn() -> None:
+    fake_stt = FakeSTT(["first"])
+    workflow = FakeWorkflow([["stall here"]])
+    fake_tts = StallingTTS()
+    config = VoicePipelineConfig(tts_settings=TTSModelSettings(buffer_size=1))
+    pipeline = VoicePipeline(
+        workflow=workflow, stt_model=fake_stt, tts_model=fake_tts, config=config
+    )
+    audio_input = AudioInput(buffer=np.zeros(2, dtype=np.int16))
+
+    result = await pipeline.run(audio_input)
+    events: list[str] = []
+    async for event in result.stream():
+        events.append(_label(event))
+        if events == ["turn_started", "audio"]:
+            assert await result.interrupt()
+
+    assert events == ["turn_started", "audio", "turn_interrupted", "session_ended"]
+    assert fake_tts.cancelled
+    # Nothing left to interrupt once the session is over.
+    assert not await result.interrupt()
+
+
+@pytest.mark.asyncio
+async def test_voicepipeline_turn_timings() -> None:
+    fake_stt = FakeSTT(["first", "second"])
+    workflow = FakeWorkflow([["out_1"], ["out_2"]])
+    pipeline = VoicePipeline(workflow=workflow, stt_model=fake_stt, tts_model=FakeTTS())
+    result = await pipeline.run(await FakeStreamedAudioInput.get(count=2))
+
+    started = []
+    async for event in result.stream():
+        if event.type != "voice_stream_event_lifecycle" or event.event == "session_ended":
+            continue
+        timings = event.timings
+        assert timings is not None
+        if event.event == "turn_started":
+            started.append(timings)
+        else:
+            # The turn's own timings, complete, even if the next turn has already started
+            assert timings is started[-1]
+            assert timings.transcript_at is not None
+            assert timings.first_text_at is not None
+            assert timings.first_audio_at is not None
+            assert timings.transcript_at <= timings.first_text_at <= timings.first_audio_at
+
+    assert len(started) == 2
+    assert started[0] is not started[1]
+
+
+class SlowFirstTTS(FakeTTS):
+    """Takes longest for the first segment, so later segments finish first. Each segment's audio
+    is its index."""
+
+    def __init__(self):
+        super().__init__()
+        self.segments = 0
+
+    async def run(self, text: str, settings: TTSModelSettings) -> AsyncIterator[bytes]:
+        index = self.segments
+        self.segments += 1
+        await asyncio.sleep(0.03 if index == 0 else 0)
+        yield np.full(2, index, dtype=np.int16).tobytes()
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_idles_without_spinning_and_keeps_order() -> None:
+    tts = SlowFirstTTS()
+    result = StreamedAudioResult(tts, TTSModelSettings(buffer_size=1), VoicePipelineConfig())
+    result._dispatcher_task = asyncio.create_task(result._dispatch_audio())
+
+    # Nothing to dispatch: the dispatcher should be asleep, not polling
+    cpu = time.process_time()
+    await asyncio.sleep(0.2)
+    assert time.process_time() - cpu < 0.1
+
+    await result._add_text("This is the first sentence, which is slow to synthesize. ")
+    await result._add_text("And a second one, which is done sooner.")
+    await result._turn_done()
+    await result._done()
+
+    order = []
+    async for event in result.stream():
+        if event.type == "voice_stream_event_audio" and event.data is not None:
+            order.append(int(event.data[0]))
+    assert tts.segments >= 2
+    assert order == list(range(tts.segments))
+
+
+class ConcurrencyCountingTTS(FakeTTS):
+    """Records how many segments are synthesized at once and the order they start in."""
+
+    def __init__(self):
+        super().__init__()
+        self.running = 0
+        self.max_running = 0
+        self.started: list[str] = []
+
+    async def run(self, text: str, settings: TTSModelSettings) -> AsyncIterator[bytes]:
+        self.started.append(text)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(0.01)
+            yield np.zeros(2400, dtype=np.int16).tobytes()
+        finally:
+            self.running -= 1
+
+
+SENTENCES = [f"This is sentence number {i} of the reply. " for i in range(4)]
+
+
+@pytest.mark.asyncio
+async def test_tts_lookahead_limits_inflight_segments() -> None:
+    tts = ConcurrencyCountingTTS()
+    settings = TTSModelSettings(buffer_size=1, max_inflight_segments=1)
+    result = StreamedAudioResult(tts, settings, VoicePipelineConfig())
+    for sentence in SENTENCES:
+        await result._add_text(sentence)
+    await result._turn_done()
+    await result._done()
+
+    _, audio_chunks = await extract_events(result)
+    assert len(tts.started) >= 2
+    assert len(audio_chunks) == len(tts.started)
+    assert tts.max_running == 1
+    assert "".join("".join(tts.started).split()) == "".join("".join(SENTENCES).split())
+
+
+@pytest.mark.asyncio
+async def test_tts_lookahead_waits_for_buffered_audio_to_drain() -> None:
+    tts = ConcurrencyCountingTTS()
+    # Each segment is 0.1 s of audio, so once the first is synthesized nothing else fits ahead of
+    # playback
+    settings = TTSModelSettings(buffer_size=1, max_inflight_segments=1, max_buffered_seconds=0.05)
+    result = StreamedAudioResult(tts, settings, VoicePipelineConfig())
+
+    # Like the pipeline, produce in the background: the turn can't finish until its audio is read
+    async def produce() -> None:
+        for sentence in SENTENCES:
+            await result._add_text(sentence)
+        await result._turn_done()
+        await result._done()
+
+    producer = asyncio.create_task(produce())
+    await asyncio.sleep(0.1)
+    assert len(tts.started) == 1
+
+    # Reading the audio makes room for the next segments
+    _, audio_chunks = await extract_events(result)
+    await producer
+    assert len(tts.started) >= 2
+    assert len(audio_chunks) == len(tts.started)
+
+
+class LongReplyTTS(FakeTTS):
+    """Yields 50 chunks of 0.1 s each and counts how many the consumer has pulled from it."""
+
+    def __init__(self):
+        super().__init__()
+        self.yielded = 0
+
+    async def run(self, text: str, settings: TTSModelSettings) -> AsyncIterator[bytes]:
+        for _ in range(50):
+            self.yielded += 1
+            yield np.ones(2400, dtype=np.int16).tobytes()
+
+
+@pytest.mark.asyncio
+async def test_synthesis_pauses_until_the_consumer_reads() -> None:
+    tts = LongReplyTTS()
+    settings = TTSModelSettings(buffer_size=1, max_queued_seconds=0.5)
+    result = StreamedAudioResult(tts, settings, VoicePipelineConfig())
+
+    async def produce() -> None:
+        await result._add_text("Here is a very long answer")
+        await result._turn_done()
+        await result._done()
+
+    producer = asyncio.create_task(produce())
+    await asyncio.sleep(0.1)
+    # The queue to `stream()` holds 0.5 s, the segment's own queue a few chunks more
+    assert tts.yielded < 15
+    assert not producer.done()
+
+    _, audio_chunks = await extract_events(result)
+    await producer
+    assert tts.yielded == 50
+    assert len(audio_chunks) == 50
+
+
+@pytest.mark.asyncio
+async def test_interrupt_drops_a_finished_turn_that_is_still_unread() -> None:
+    settings = TTSModelSettings(buffer_size=1)
+    result = StreamedAudioResult(FakeTTS(), settings, VoicePipelineConfig())
+    await result._add_text("Sure thing, that is all sorted for you.")
+    await result._turn_done()
+    # The dispatcher queues the last segment and `turn_ended`, but nothing has been read yet
+    while result._started_processing_turn:
+        await asyncio.sleep(0)
+
+    assert await result.interrupt()
+    assert result._queued_seconds == 0.0
+    await result._done()
+    events, audio_chunks = await extract_events(result)
+    # Everything queued for the turn is dropped, `turn_started` included since it was never read
+    assert events == ["turn_interrupted", "session_ended"]
+    assert audio_chunks == []
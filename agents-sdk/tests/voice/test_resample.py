@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+try:
+    from agents import UserError
+    from agents.voice import StreamedAudioInput, StreamingResampler
+except ImportError:
+    pass
+
+
+def _tone(freq: float, rate: int, seconds: float = 1.0, amplitude: float = 10000) -> np.ndarray:
+    t = np.arange(int(rate * seconds)) / rate
+    return (np.sin(2 * np.pi * freq * t) * amplitude).astype(np.int16)
+
+
+@pytest.mark.parametrize(
+    "input_rate,output_rate", [(8000, 24000), (24000, 8000), (16000, 24000), (44100, 24000)]
+)
+def test_resampler_chunking_does_not_change_output(input_rate: int, output_rate: int):
+    audio = _tone(440, input_rate)
+    whole = StreamingResampler(input_rate, output_rate).process(audio).copy()
+
+    resampler = StreamingResampler(input_rate, output_rate)
+    chunks = []
+    rng = np.random.default_rng(0)
+    start = 0
+    while start < len(audio):
+        size = int(rng.integers(1, 700))
+        chunks.append(resampler.process(audio[start : start + size]).copy())
+        start += size
+
+    assert len(whole) == output_rate
+    assert np.array_equal(np.concatenate(chunks), whole)
+
+
+@pytest.mark.parametrize("input_rate,output_rate", [(8000, 24000), (24000, 8000)])
+def test_resampler_keeps_frequency_and_level(input_rate: int, output_rate: int):
+    resampler = StreamingResampler(input_rate, output_rate)
+    out = resampler.process(_tone(440, input_rate)).astype(np.float64)
+    settled = out[int(resampler.delay * output_rate) + 10 :]
+
+    assert abs(settled.std() - 10000 / np.sqrt(2)) < 50
+    spectrum = np.abs(np.fft.rfft(out))
+    peak_hz = np.argmax(spectrum) * output_rate / len(out)
+    assert abs(peak_hz - 440) <= 1
+
+
+def test_resampler_removes_content_above_the_new_nyquist():
+    out = StreamingResampler(24000, 8000).process(_tone(6000, 24000))
+    assert np.abs(out[100:]).max() < 10
+
+
+def test_resampler_float32_and_out():
+    resampler = StreamingResampler(8000, 24000)
+    audio = (_tone(300, 8000, seconds=0.02) / 32768).astype(np.float32)
+    out = np.empty(resampler.output_length(len(audio)), dtype=np.float32)
+    result = resampler.process(audio, out=out)
+    assert result is out
+    assert out.dtype == np.float32
+    assert len(out) == 480
+
+
+def test_resampler_switching_dtype_keeps_the_level():
+    audio = _tone(300, 8000, seconds=0.04)
+    as_float = (audio / 32768).astype(np.float32)
+    whole = StreamingResampler(8000, 24000).process(as_float).copy()
+
+    resampler = StreamingResampler(8000, 24000)
+    first = resampler.process(audio[:160]).astype(np.float32) / 32768
+    second = resampler.process(as_float[160:]).copy()
+    assert np.allclose(np.concatenate([first, second]), whole, atol=1e-4)
+
+
+def test_resampler_reuses_its_output_buffer():
+    resampler = StreamingResampler(8000, 24000)
+    frame = _tone(300, 8000, seconds=0.02)
+    first = resampler.process(frame)
+    second = resampler.process(frame)
+    assert np.shares_memory(first, second)
+
+
+def test_resampler_rejects_bad_input():
+    with pytest.raises(UserError):
+        StreamingResampler(0, 8000)
+    with pytest.raises(UserError):
+        StreamingResampler(8000, 24000).process(np.zeros(160, dtype=np.int32))
+
+
+@pytest.mark.asyncio
+async def test_streamed_audio_input_resamples_to_model_rate():
+    streamed = StreamedAudioInput(sample_rate=8000)
+    frame = _tone(300, 8000, seconds=0.02)
+    await streamed.add_audio(frame)
+    await streamed.add_audio(frame)
+
+    first = streamed.queue.get_nowait()
+    second = streamed.queue.get_nowait()
+    assert first.dtype == np.int16
+    assert len(first) == len(second) == 480
+    assert not np.shares_memory(first, second)
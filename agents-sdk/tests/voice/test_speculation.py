@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Any
+from unittest.mock import AsyncMock
+
+import pytest
+
+try:
+    from agents.voice import (
+        AudioInput,
+        OpenAISTTTranscriptionSession,
+        SpeculationSettings,
+        StreamedAudioInput,
+        StreamedTranscriptionSession,
+        STTModel,
+        STTModelSettings,
+        VoicePipeline,
+        VoicePipelineConfig,
+        VoiceWorkflowBase,
+    )
+    from agents.voice.speculation import transcripts_match
+
+    from .fake_models import FakeStreamedAudioInput, FakeTTS
+    from .helpers import extract_events
+except ImportError:
+    pass
+
+
+class PartialSession(StreamedTranscriptionSession):
+    """Sends each turn's partial transcripts, then its final transcript."""
+
+    def __init__(self, turns: list[tuple[list[str], str]]):
+        self.turns = turns
+        self.handler: Any = None
+
+    def set_partial_transcript_handler(self, handler: Any) -> bool:
+        self.handler = handler
+        return True
+
+    async def transcribe_turns(self) -> AsyncIterator[str]:
+        for partials, final in self.turns:
+            for partial in partials:
+                self.handler(partial)
+                await asyncio.sleep(0.01)
+            # Transcription takes a while to finish after the last partial
+            await asyncio.sleep(0.05)
+            yield final
+
+    async def close(self) -> None:
+        return None
+
+
+class PartialSTT(STTModel):
+    def __init__(self, turns: list[tuple[list[str], str]]):
+        self.turns = turns
+
+    @property
+    def model_name(self) -> str:
+        return "partial_stt"
+
+    async def transcribe(self, input: AudioInput, settings: STTModelSettings, *_: bool) -> str:
+        raise NotImplementedError
+
+    async def create_session(
+        self, input: StreamedAudioInput, settings: STTModelSettings, *_: bool
+    ) -> StreamedTranscriptionSession:
+        return PartialSession(self.turns)
+
+
+class RecordingWorkflow(VoiceWorkflowBase):
+    def __init__(self):
+        self.history: list[str] = []
+        self.runs: list[str] = []
+
+    async def run(self, transcription: str) -> AsyncIterator[str]:
+        self.runs.append(transcription)
+        self.history.append(transcription)
+        await asyncio.sleep(0.01)
+        yield f"reply to {transcription}"
+
+    def checkpoint(self) -> Any:
+        return list(self.history)
+
+    def restore(self, checkpoint: Any) -> None:
+        self.history = checkpoint
+
+
+async def _run(workflow: RecordingWorkflow, turns: list[tuple[list[str], str]]) -> list[str]:
+    pipeline = VoicePipeline(
+        workflow=workflow,
+        stt_model=PartialSTT(turns),
+        tts_model=FakeTTS(),
+        config=VoicePipelineConfig(speculation=SpeculationSettings(stable_ms=30)),
+    )
+    result = await pipeline.run(await FakeStreamedAudioInput.get(count=1))
+    events, _ = await extract_events(result)
+    return events
+
+
+def test_transcripts_match():
+    assert transcripts_match("Book a table, please.", "book a table please", 0.9)
+    assert transcripts_match(
+        "I'd like to book a table for two", "I'd like to book a table for 2", 0.9
+    )
+    assert not transcripts_match("Book a table.", "Cancel my order.", 0.9)
+
+
+@pytest.mark.asyncio
+async def test_confirmed_speculation_is_used():
+    workflow = RecordingWorkflow()
+    events = await _run(workflow, [(["Book a", "Book a table."], "book a table")])
+
+    assert events == ["turn_started", "audio", "turn_ended", "session_ended"]
+    # Only the speculative run happened, and it stuck
+    assert workflow.runs == ["Book a table."]
+    assert workflow.history == ["Book a table."]
+
+
+@pytest.mark.asyncio
+async def test_wrong_speculation_is_rolled_back():
+    workflow = RecordingWorkflow()
+    events = await _run(
+        workflow,
+        [(["Book a table."], "Cancel my order."), (["Thanks a lot!"], "Thanks a lot!")],
+    )
+
+    assert events == ["turn_started", "audio", "turn_ended"] * 2 + ["session_ended"]
+    assert workflow.runs == ["Book a table.", "Cancel my order.", "Thanks a lot!"]
+    assert workflow.history == ["Cancel my order.", "Thanks a lot!"]
+
+
+@pytest.mark.asyncio
+async def test_no_speculation_on_short_partials():
+    workflow = RecordingWorkflow()
+    await _run(workflow, [(["Yes."], "Yes.")])
+    assert workflow.runs == ["Yes."]
+
+
+def test_openai_session_accumulates_transcript_deltas():
+    session = OpenAISTTTranscriptionSession(
+        input=StreamedAudioInput(),
+        client=AsyncMock(api_key="FAKE_KEY"),
+        model="gpt-4o-transcribe",
+        settings=STTModelSettings(),
+        trace_include_sensitive_data=False,
+        trace_include_sensitive_audio_data=False,
+    )
+    partials: list[str] = []
+    assert session.set_partial_transcript_handler(partials.append)
+
+    delta = "conversation.item.input_audio_transcription.delta"
+    session._on_transcript_delta({"type": delta, "item_id": "a", "delta": "Hello"})
+    session._on_transcript_delta({"type": delta, "item_id": "a", "delta": " there."})
+    session._on_transcript_delta({"type": delta, "item_id": "b", "delta": "Bye"})
+    assert partials == ["Hello", "Hello there.", "Bye"]
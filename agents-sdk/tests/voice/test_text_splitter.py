@@ -0,0 +1,146 @@
+import asyncio
+
+import pytest
+
+try:
+    from agents.voice import (
+        IncrementalTextSplitter,
+        StreamedAudioResult,
+        TTSModelSettings,
+        VoicePipelineConfig,
+        get_sentence_based_splitter,
+    )
+
+    from .fake_models import FakeTTS
+    from .helpers import extract_events
+except ImportError:
+    pass
+
+
+def feed(splitter: "IncrementalTextSplitter", text: str, step: int = 3) -> list[str]:
+    chunks = []
+    for start in range(0, len(text), step):
+        chunk = splitter.push(text[start : start + step], now=0.0)
+        if chunk:
+            chunks.append(chunk)
+    rest = splitter.flush()
+    if rest:
+        chunks.append(rest)
+    return chunks
+
+
+def test_first_chunk_is_a_clause_then_whole_sentences():
+    splitter = IncrementalTextSplitter(max_wait_seconds=None)
+    text = (
+        "Sure thing, I can help with that. Your appointment is on Tuesday. "
+        "It starts at ten in the morning. Anything else?"
+    )
+    assert feed(splitter, text) == [
+        "Sure thing,",
+        "I can help with that.",
+        "Your appointment is on Tuesday.",
+        "It starts at ten in the morning.",
+        "Anything else?",
+    ]
+
+
+def test_sentences_that_arrive_together_are_one_chunk():
+    splitter = IncrementalTextSplitter(max_wait_seconds=None)
+    assert splitter.push("Sure thing, ") == "Sure thing,"
+    assert splitter.push("I can help. It is on Tuesday. It") == "I can help. It is on Tuesday."
+    assert splitter.push(" is short. And") == ""
+    assert splitter.flush() == "It is short. And"
+
+
+def test_short_clauses_wait_for_the_minimum_length():
+    splitter = IncrementalTextSplitter(first_chunk_min_length=10, max_wait_seconds=None)
+    assert splitter.push("Hi, ") == ""
+    assert splitter.push("there, how are you? ") == "Hi, there, how are you?"
+
+
+def test_punctuation_inside_quotes_and_numbers():
+    splitter = IncrementalTextSplitter(first_chunk_min_length=0, max_wait_seconds=None)
+    assert splitter.push("It costs 3.50 dollars") == ""
+    assert splitter.push(' "exactly." Then') == 'It costs 3.50 dollars "exactly."'
+
+
+def test_each_turn_starts_with_a_short_chunk_again():
+    splitter = IncrementalTextSplitter(max_wait_seconds=None)
+    assert feed(splitter, "Okay then, see you soon.") == ["Okay then,", "see you soon."]
+    assert feed(splitter, "Of course, goodbye now.") == ["Of course,", "goodbye now."]
+
+
+def test_time_budget_cuts_at_the_last_whole_word():
+    splitter = IncrementalTextSplitter(max_wait_seconds=0.5)
+    assert splitter.push("Let me check the availability", now=1.0) == ""
+    assert splitter.deadline == 1.5
+    assert splitter.flush_due(now=1.4) == ""
+    assert splitter.push(" for next", now=1.6) == "Let me check the availability for"
+    # The rest waits again, now for a whole sentence, but can't be cut inside its only word
+    assert splitter.deadline is None
+    assert splitter.push(" week, please.", now=1.7) == ""
+    assert splitter.deadline == 2.1
+    assert splitter.flush() == "next week, please."
+    assert splitter.deadline is None
+
+
+def test_callable_splitter_is_still_supported():
+    settings = TTSModelSettings(text_splitter=get_sentence_based_splitter(min_sentence_length=5))
+    result = StreamedAudioResult(FakeTTS(), settings, VoicePipelineConfig())
+    # Chunks shorter than 20 characters wait for more text, as they always have
+    assert result._text_splitter.push("Hello there. How") == ""
+    assert result._text_splitter.push(" are you? I") == "Hello there. How are you?"
+    assert result._text_splitter.flush() == "I"
+
+
+def test_sentence_splitter_is_the_default():
+    result = StreamedAudioResult(FakeTTS(), TTSModelSettings(), VoicePipelineConfig())
+    assert result._text_splitter.push("Sure thing, I can help. With") == "Sure thing, I can help."
+    assert result._text_splitter.deadline is None
+
+
+def test_time_budget_never_cuts_inside_a_word():
+    splitter = IncrementalTextSplitter(max_wait_seconds=0.5)
+    # Leading whitespace is not a word boundary
+    assert splitter.push(" Supercalifragilistic", now=0.0) == ""
+    assert splitter.deadline is None
+    assert splitter.flush_due(now=5.0) == ""
+    # Once the word is whole it goes out, as it is long overdue
+    assert splitter.push("expialidocious is", now=5.1) == "Supercalifragilisticexpialidocious"
+    assert splitter.flush() == "is"
+
+
+@pytest.mark.asyncio
+async def test_result_flushes_text_on_the_time_budget():
+    tts = FakeTTS()
+    settings = TTSModelSettings(buffer_size=1)
+    result = StreamedAudioResult(tts, settings, VoicePipelineConfig())
+    result._text_splitter = IncrementalTextSplitter(max_wait_seconds=0.05)
+
+    # No boundary and no more text: the segment starts once the budget is up
+    await result._add_text("Let me look that up for you ")
+    assert result._segments_created == 0
+    await asyncio.sleep(0.08)
+    assert result._segments_created == 1
+
+    # The budget cut took every word, so nothing is left for a final segment, but the turn still
+    # ends
+    await result._turn_done()
+    await result._done()
+    events, _ = await extract_events(result)
+    assert events[-2:] == ["turn_ended", "session_ended"]
+
+
+@pytest.mark.asyncio
+async def test_result_ends_the_turn_after_trailing_whitespace():
+    settings = TTSModelSettings(buffer_size=1, incremental_splitter=IncrementalTextSplitter)
+    result = StreamedAudioResult(FakeTTS(), settings, VoicePipelineConfig())
+    for delta in ["Sure", ", I can help", " with that.", "\n"]:
+        await result._add_text(delta)
+    # The whole sentence has gone out, only the newline is pending
+    assert result._segments_created == 1
+
+    await result._turn_done()
+    await result._done()
+    events, _ = await extract_events(result)
+    assert events == ["turn_started", "audio", "turn_ended", "session_ended"]
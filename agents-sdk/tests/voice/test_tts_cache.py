@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections.abc import AsyncGenerator, AsyncIterator
+from pathlib import Path
+from typing import cast
+
+import numpy as np
+import pytest
+
+try:
+    from agents.voice import CachedTTSModel, TTSModel, TTSModelSettings, VoicePipeline
+
+    from .fake_models import FakeStreamedAudioInput, FakeSTT, FakeTTS, FakeWorkflow
+    from .helpers import extract_events
+except ImportError:
+    pass
+
+
+class CountingTTS(TTSModel):
+    """Returns one chunk of a constant value per word and counts calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    @property
+    def model_name(self) -> str:
+        return "counting_tts"
+
+    async def run(self, text: str, settings: TTSModelSettings) -> AsyncIterator[bytes]:
+        self.calls += 1
+        for word in text.split():
+            yield np.full(100, len(word), dtype=np.int16).tobytes()
+
+
+async def _collect(model: TTSModel, text: str, settings: TTSModelSettings) -> bytes:
+    return b"".join([chunk async for chunk in model.run(text, settings)])
+
+
+@pytest.mark.asyncio
+async def test_cached_tts_serves_repeats_from_memory():
+    inner = CountingTTS()
+    model = CachedTTSModel(inner)
+    settings = TTSModelSettings()
+
+    first = await _collect(model, "How can I help you today?", settings)
+    second = await _collect(model, "  How can I\nhelp you   today? ", settings)
+
+    assert first == second
+    assert inner.calls == 1
+    assert (model.stats.hits, model.stats.misses) == (1, 1)
+    assert model.stats.entries == 1
+    assert model.stats.bytes == len(first)
+    assert model.stats.hit_rate == 0.5
+    assert model.model_name == "counting_tts"
+
+
+@pytest.mark.asyncio
+async def test_cached_tts_key_includes_settings():
+    inner = CountingTTS()
+    model = CachedTTSModel(inner)
+
+    await _collect(model, "Hello there", TTSModelSettings(voice="alloy"))
+    await _collect(model, "Hello there", TTSModelSettings(voice="ash"))
+    await _collect(model, "Hello there", TTSModelSettings(voice="ash", speed=1.5))
+    await _collect(model, "Hello there", TTSModelSettings(voice="ash", instructions="Shout."))
+    await _collect(model, "hello there", TTSModelSettings(voice="ash", instructions="Shout."))
+
+    assert inner.calls == 5
+    assert model.stats.hits == 0
+
+
+@pytest.mark.asyncio
+async def test_cached_tts_evicts_least_recently_used():
+    inner = CountingTTS()
+    # Each one-word phrase is 200 bytes, so two fit
+    model = CachedTTSModel(inner, max_bytes=400)
+    settings = TTSModelSettings()
+
+    await _collect(model, "one", settings)
+    await _collect(model, "two", settings)
+    await _collect(model, "one", settings)
+    await _collect(model, "three", settings)
+
+    assert model.stats.evictions == 1
+    assert model.stats.bytes == 400
+    await _collect(model, "one", settings)
+    assert inner.calls == 3
+    await _collect(model, "two", settings)
+    assert inner.calls == 4
+
+
+@pytest.mark.asyncio
+async def test_cached_tts_skips_oversized_and_partial_responses():
+    inner = CountingTTS()
+    model = CachedTTSModel(inner, max_entry_bytes=300)
+    settings = TTSModelSettings()
+
+    await _collect(model, "far too long to cache", settings)
+    assert model.stats.entries == 0
+
+    stream = cast(AsyncGenerator[bytes, None], model.run("stopped part way", settings))
+    await stream.__anext__()
+    await stream.aclose()
+    assert model.stats.entries == 0
+
+    await _collect(model, "far too long to cache", settings)
+    assert inner.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_cached_tts_concurrent_misses_share_one_response():
+    inner = CountingTTS()
+    model = CachedTTSModel(inner)
+    settings = TTSModelSettings()
+
+    results = await asyncio.gather(
+        *[_collect(model, "Please hold the line", settings) for _ in range(3)]
+    )
+    assert results[0] == results[1] == results[2]
+    assert inner.calls == 1
+    assert (model.stats.misses, model.stats.joined) == (1, 2)
+    assert model.stats.entries == 1
+
+
+@pytest.mark.asyncio
+async def test_cached_tts_shared_response_outlives_the_first_reader():
+    inner = CountingTTS()
+    model = CachedTTSModel(inner)
+    settings = TTSModelSettings()
+    expected = await _collect(CountingTTS(), "one two three four", settings)
+
+    first = cast(AsyncGenerator[bytes, None], model.run("one two three four", settings))
+    await first.__anext__()
+    second = model.run("one two three four", settings)
+    head = await second.__anext__()
+
+    # The first reader is interrupted, the second still gets all of the audio
+    await first.aclose()
+    assert head + b"".join([chunk async for chunk in second]) == expected
+    assert inner.calls == 1
+    assert model.stats.entries == 1
+
+
+@pytest.mark.asyncio
+async def test_cached_tts_disk_store_is_shared(tmp_path: Path):
+    settings = TTSModelSettings()
+    writer_inner = CountingTTS()
+    writer = CachedTTSModel(writer_inner, disk_path=tmp_path)
+    audio = await _collect(writer, "Thanks for calling", settings)
+    # The entry is written in the background, after the audio was served
+    await writer.flush()
+
+    # A second model, as in another worker or after a restart, finds it on disk
+    reader_inner = CountingTTS()
+    reader = CachedTTSModel(reader_inner, disk_path=tmp_path)
+    assert await _collect(reader, "Thanks for calling", settings) == audio
+    assert reader_inner.calls == 0
+    assert reader.stats.disk_hits == 1
+
+    # ...and keeps it in memory from then on
+    assert await _collect(reader, "Thanks for calling", settings) == audio
+    assert reader.stats.hits == 1
+    assert list(tmp_path.glob("*/*.tmp")) == []
+
+
+@pytest.mark.asyncio
+async def test_cached_tts_disk_write_does_not_hold_up_readers(tmp_path: Path):
+    settings = TTSModelSettings()
+    model = CachedTTSModel(CountingTTS(), disk_path=tmp_path)
+    disk_free = threading.Event()
+    write_disk = model._write_disk
+
+    def slow_write_disk(key: str, audio: bytes) -> None:
+        disk_free.wait(timeout=5)
+        write_disk(key, audio)
+
+    model._write_disk = slow_write_disk  # type: ignore[method-assign]
+    audio = await asyncio.wait_for(_collect(model, "Thanks for calling", settings), timeout=1)
+    assert audio
+    assert list(tmp_path.glob("*/*.pcm")) == []
+
+    disk_free.set()
+    await model.flush()
+    assert len(list(tmp_path.glob("*/*.pcm"))) == 1
+
+
+@pytest.mark.asyncio
+async def test_cached_tts_in_pipeline():
+    model = CachedTTSModel(FakeTTS())
+    pipeline = VoicePipeline(
+        workflow=FakeWorkflow([["Hello there."], ["Hello there."]]),
+        stt_model=FakeSTT(["first", "second"]),
+        tts_model=model,
+    )
+    result = await pipeline.run(await FakeStreamedAudioInput.get(count=2))
+    events, audio_chunks = await extract_events(result)
+    assert events[-1] == "session_ended"
+    assert len(audio_chunks) == 2
+    assert (model.stats.misses, model.stats.hits) == (1, 1)
@@ -0,0 +1,250 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock
+
+import numpy as np
+import pytest
+
+try:
+    from agents import UserError
+    from agents.voice import (
+        OpenAISTTTranscriptionSession,
+        SilenceGate,
+        SilenceGateSettings,
+        StreamedAudioInput,
+        STTModelSettings,
+        VADEvent,
+        VoiceActivityDetector,
+    )
+except ImportError:
+    pass
+
+RATE = 8000
+
+
+def _noise(seconds: float, amplitude: float, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.normal(0, amplitude, int(RATE * seconds)).astype(np.int16)
+
+
+async def _finish_streaming(streamed: "StreamedAudioInput", task: asyncio.Task[None]) -> None:
+    # End the input, so the session sends everything still queued and then returns
+    streamed.queue.put_nowait(None)  # type: ignore[arg-type]
+    await asyncio.wait_for(task, timeout=5)
+
+
+def _voice(seconds: float, amplitude: float = 5000) -> np.ndarray:
+    t = np.arange(int(RATE * seconds)) / RATE
+    envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)
+    return (np.sin(2 * np.pi * 150 * t) * envelope * amplitude).astype(np.int16)
+
+
+def _run(detector: VoiceActivityDetector, audio: np.ndarray, chunk: int) -> list[VADEvent]:
+    events: list[VADEvent] = []
+    for start in range(0, len(audio), chunk):
+        events += detector.process(audio[start : start + chunk])
+    return events
+
+
+def test_vad_detects_speech_start_and_end():
+    audio = np.concatenate((_noise(1, 100), _voice(1.5), _noise(1, 100, seed=1)))
+    events = _run(VoiceActivityDetector(RATE, hangover_ms=300), audio, 160)
+
+    assert [e.type for e in events] == ["speech_start", "speech_end"]
+    assert events[0].timestamp == pytest.approx(1.0, abs=0.03)
+    assert events[1].timestamp == pytest.approx(2.5, abs=0.1)
+
+
+def test_vad_hangover_bridges_short_pauses():
+    audio = np.concatenate(
+        (_noise(1, 100), _voice(0.5), _noise(0.2, 100, seed=1), _voice(0.5), _noise(1, 100))
+    )
+    events = _run(VoiceActivityDetector(RATE, hangover_ms=400), audio, 160)
+    assert [e.type for e in events] == ["speech_start", "speech_end"]
+
+    events = _run(VoiceActivityDetector(RATE, hangover_ms=100), audio, 160)
+    assert [e.type for e in events] == ["speech_start", "speech_end"] * 2
+
+
+def test_vad_adapts_to_background_noise():
+    # The line gets a lot noisier, which on its own must not count as speech
+    audio = np.concatenate((_noise(1, 100), _noise(3, 1500, seed=1), _voice(1, 8000)))
+    detector = VoiceActivityDetector(RATE)
+    events = _run(detector, audio, 160)
+
+    assert [e.type for e in events] == ["speech_start"]
+    assert events[0].timestamp == pytest.approx(4.0, abs=0.03)
+    assert detector.is_speaking
+
+
+def test_vad_ignores_hiss():
+    # Loud but crossing zero on nearly every sample
+    hiss = (np.tile([4000, -4000], RATE // 2)).astype(np.int16)
+    audio = np.concatenate((_noise(1, 100), hiss))
+    assert _run(VoiceActivityDetector(RATE), audio, 160) == []
+
+
+def test_vad_chunking_does_not_change_events():
+    audio = np.concatenate((_noise(1, 100), _voice(1), _noise(1, 100, seed=1)))
+    expected = _run(VoiceActivityDetector(RATE), audio, 160)
+    assert _run(VoiceActivityDetector(RATE), audio, 37) == expected
+    assert _run(VoiceActivityDetector(RATE), audio.astype(np.float32) / 32768, 1000) == expected
+
+
+def test_vad_rejects_bad_settings():
+    with pytest.raises(UserError):
+        VoiceActivityDetector(RATE, frame_ms=50)
+    with pytest.raises(UserError):
+        StreamedAudioInput(sample_rate=8000, vad=VoiceActivityDetector(24000))
+
+
+@pytest.mark.asyncio
+async def test_streamed_audio_input_returns_vad_events():
+    streamed = StreamedAudioInput(sample_rate=RATE, vad=VoiceActivityDetector(RATE))
+    audio = np.concatenate((_noise(0.5, 100), _voice(0.5)))
+    events = []
+    for start in range(0, len(audio), 160):
+        events += await streamed.add_audio(audio[start : start + 160])
+
+    assert [e.type for e in events] == ["speech_start"]
+    assert streamed.vad_events.get_nowait() == events[0]
+    assert streamed.queue.qsize() == len(audio) // 160
+
+
+@pytest.mark.asyncio
+async def test_unread_vad_events_are_bounded():
+    streamed = StreamedAudioInput(sample_rate=RATE, vad=VoiceActivityDetector(RATE))
+    # A minute of turn taking with nobody reading the events, as without local endpointing
+    for _ in range(30):
+        for chunk in (_voice(1), _noise(1, 100)):
+            for start in range(0, len(chunk), 160):
+                await streamed.add_audio(chunk[start : start + 160])
+
+    events = []
+    while not streamed.vad_events.empty():
+        events.append(streamed.vad_events.get_nowait())
+    assert len(events) == 32
+    # The oldest were dropped
+    assert events[-1].timestamp == pytest.approx(59, abs=0.5)
+
+
+@pytest.mark.asyncio
+async def test_local_endpointing_commits_after_speech_end():
+    streamed = StreamedAudioInput(
+        sample_rate=RATE, vad=VoiceActivityDetector(RATE, hangover_ms=200)
+    )
+    session = OpenAISTTTranscriptionSession(
+        input=streamed,
+        client=AsyncMock(api_key="FAKE_KEY"),
+        model="gpt-4o-transcribe",
+        settings=STTModelSettings(local_endpointing=True),
+        trace_include_sensitive_data=False,
+        trace_include_sensitive_audio_data=False,
+    )
+    assert session._turn_detection is None
+    session._websocket = AsyncMock()
+    task = asyncio.create_task(session._stream_audio(streamed.queue))
+
+    audio = np.concatenate((_noise(0.5, 100), _voice(0.5), _noise(0.5, 100, seed=1)))
+    for start in range(0, len(audio), 160):
+        await streamed.add_audio(audio[start : start + 160])
+    await _finish_streaming(streamed, task)
+
+    sent = [json.loads(call.args[0])["type"] for call in session._websocket.send.call_args_list]
+    assert sent.count("input_audio_buffer.commit") == 1
+    # The commit comes after the audio up to the end of speech
+    assert sent.index("input_audio_buffer.commit") >= 50
+
+
+def test_local_endpointing_requires_vad():
+    with pytest.raises(UserError):
+        OpenAISTTTranscriptionSession(
+            input=StreamedAudioInput(),
+            client=AsyncMock(api_key="FAKE_KEY"),
+            model="gpt-4o-transcribe",
+            settings=STTModelSettings(local_endpointing=True),
+            trace_include_sensitive_data=False,
+            trace_include_sensitive_audio_data=False,
+        )
+
+
+def test_silence_gate_drops_long_silence_but_keeps_padding():
+    gate = SilenceGate(
+        SilenceGateSettings(pre_padding_ms=100, post_padding_ms=200), sample_rate=RATE
+    )
+    frames = [_noise(0.02, 10)] * 50 + [_voice(0.02)] * 10 + [_noise(0.02, 10, seed=1)] * 50
+    sent = [len(gate.process(frame)) for frame in frames]
+
+    # Leading silence is held back, then the last 100 ms of it goes out with the first speech
+    assert sent[:50] == [0] * 50
+    assert sent[50] == 6
+    # Speech and 200 ms of trailing silence pass straight through, the rest is dropped
+    assert sent[51:70] == [1] * 19
+    assert sent[70:] == [0] * 40
+    assert gate.bytes_in == 110 * 320
+    assert gate.bytes_dropped == (45 + 35) * 320
+
+
+@pytest.mark.asyncio
+async def test_stt_session_silence_gate_reports_bytes_saved():
+    streamed = StreamedAudioInput(sample_rate=RATE)
+    session = OpenAISTTTranscriptionSession(
+        input=streamed,
+        client=AsyncMock(api_key="FAKE_KEY"),
+        model="gpt-4o-transcribe",
+        settings=STTModelSettings(
+            turn_detection={"type": "server_vad", "silence_duration_ms": 500},
+            silence_gate=SilenceGateSettings(),
+        ),
+        trace_include_sensitive_data=False,
+        trace_include_sensitive_audio_data=False,
+    )
+    session._websocket = AsyncMock()
+    task = asyncio.create_task(session._stream_audio(streamed.queue))
+
+    audio = np.concatenate((_noise(2, 10), _voice(0.5), _noise(2, 10, seed=1)))
+    for start in range(0, len(audio), 160):
+        await streamed.add_audio(audio[start : start + 160])
+    await _finish_streaming(streamed, task)
+
+    sent = len(session._websocket.send.call_args_list)
+    # 300 ms before speech, 500 ms of speech and 1 s after it, in 20 ms frames
+    assert sent == pytest.approx(90, abs=2)
+    # Everything else was dropped, apart from the last 300 ms still held as padding
+    held = 15
+    assert session.audio_bytes_saved == (len(audio) // 160 - sent - held) * 960
+
+
+@pytest.mark.parametrize(
+    "turn_detection",
+    [
+        None,
+        {"type": "semantic_vad"},
+        {"type": "server_vad"},
+        {"type": "server_vad", "silence_duration_ms": 1200},
+    ],
+)
+def test_silence_gate_rejects_turn_detection_that_outlasts_the_padding(turn_detection):
+    with pytest.raises(UserError):
+        OpenAISTTTranscriptionSession(
+            input=StreamedAudioInput(),
+            client=AsyncMock(api_key="FAKE_KEY"),
+            model="gpt-4o-transcribe",
+            settings=STTModelSettings(
+                turn_detection=turn_detection, silence_gate=SilenceGateSettings()
+            ),
+            trace_include_sensitive_data=False,
+            trace_include_sensitive_audio_data=False,
+        )
+
+
+def test_silence_gate_with_local_endpointing():
+    session = OpenAISTTTranscriptionSession(
+        input=StreamedAudioInput(vad=VoiceActivityDetector()),
+        client=AsyncMock(api_key="FAKE_KEY"),
+        model="gpt-4o-transcribe",
+        settings=STTModelSettings(local_endpointing=True, silence_gate=SilenceGateSettings()),
+        trace_include_sensitive_data=False,
+        trace_include_sensitive_audio_data=False,
+    )
+    assert session._silence_gate is not None
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import numpy as np
+
+from agents.voice import mulaw_decode
+
+# 🎚️ Caller audio we keep around per call. 8 kHz int16, so 20 s is 320 KB, allocated once.
+INBOUND_SAMPLE_RATE = 8000
+INBOUND_MAX_SECONDS = 20.0
+INBOUND_FRAME_SAMPLES = 160
+
+
+class AudioRingBuffer:
+    """Fixed-size ring buffer of PCM samples, preallocated when the call starts.
+
+    Memory per call never grows: once `max_seconds` of audio has been written, the oldest samples
+    are overwritten. Capacity is rounded up to a whole number of frames, so frame-sized writes
+    never straddle the end of the buffer and every frame can be handed out as a zero-copy view.
+
+    Views point into the ring and are overwritten once the buffer wraps around, so anything that
+    holds on to them (the STT input queue, a recorder) must consume them within `max_seconds`.
+    """
+
+    def __init__(
+        self,
+        max_seconds: float = INBOUND_MAX_SECONDS,
+        sample_rate: int = INBOUND_SAMPLE_RATE,
+        frame_samples: int = INBOUND_FRAME_SAMPLES,
+    ):
+        frames = max(1, -(-int(max_seconds * sample_rate) // frame_samples))
+        self.sample_rate = sample_rate
+        self.capacity = frames * frame_samples
+        self._buffer = np.zeros(self.capacity, dtype=np.int16)
+        self._write_pos = 0
+        self.total_samples = 0
+
+    def __len__(self) -> int:
+        """Number of samples currently held, at most `capacity`."""
+        return min(self.total_samples, self.capacity)
+
+    @property
+    def duration(self) -> float:
+        return len(self) / self.sample_rate
+
+    def _reserve(self, n: int) -> np.ndarray | None:
+        """Claim the next `n` samples if they fit without wrapping and return them as a view."""
+        if self._write_pos + n > self.capacity:
+            return None
+        view = self._buffer[self._write_pos : self._write_pos + n]
+        self._write_pos = (self._write_pos + n) % self.capacity
+        self.total_samples += n
+        return view
+
+    def write(self, pcm: np.ndarray) -> np.ndarray:
+        """Append samples. Returns a view of where they landed if they didn't wrap, else a copy."""
+        pcm = pcm.reshape(-1)
+        view = self._reserve(len(pcm))
+        if view is not None:
+            view[:] = pcm
+            return view
+        for sample_offset in range(0, len(pcm), self.capacity):
+            self._write_wrapped(pcm[sample_offset : sample_offset + self.capacity])
+        return pcm.copy()
+
+    def _write_wrapped(self, pcm: np.ndarray):
+        head = min(len(pcm), self.capacity - self._write_pos)
+        self._buffer[self._write_pos : self._write_pos + head] = pcm[:head]
+        self._buffer[: len(pcm) - head] = pcm[head:]
+        self._write_pos = (self._write_pos + len(pcm)) % self.capacity
+        self.total_samples += len(pcm)
+
+    def write_mulaw(self, payload: bytes) -> np.ndarray:
+        """Decode a mu-law payload straight into the ring, with no intermediate array."""
+        view = self._reserve(len(payload))
+        if view is None:
+            return self.write(mulaw_decode(payload))
+        return mulaw_decode(payload, out=view)
+
+    def segments(self, num_samples: int | None = None) -> tuple[np.ndarray, ...]:
+        """The most recent `num_samples` (default: everything held), oldest first, as one or two
+        zero-copy views."""
+        n = len(self) if num_samples is None else min(num_samples, len(self))
+        start = self._write_pos - n
+        if start >= 0:
+            return (self._buffer[start : self._write_pos],)
+        if self._write_pos == 0:
+            return (self._buffer[start:],)
+        return (self._buffer[start:], self._buffer[: self._write_pos])
+
+    def window(self, num_samples: int | None = None) -> np.ndarray:
+        """The most recent `num_samples` as one array. Zero-copy unless the window wraps."""
+        parts = self.segments(num_samples)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def latest(self, seconds: float) -> np.ndarray:
+        return self.window(int(seconds * self.sample_rate))
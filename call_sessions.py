@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import time
+from typing import Callable
+
+from starlette.websockets import WebSocket
+
+from agents.tracing.util import gen_group_id
+from agents.voice import (
+    StreamedAudioInput,
+    StreamedAudioResult,
+    STTModel,
+    TTSModel,
+    VoicePipeline,
+    VoiceActivityDetector,
+    VoicePipelineConfig,
+    VoiceWorkflowBase,
+)
+from audio_buffer import INBOUND_SAMPLE_RATE, AudioRingBuffer
+from jitter_buffer import JitterBuffer
+from latency_metrics import TurnLatency
+from twilio_bridge import TWILIO_OUTPUT_FORMAT, TwilioMediaSender, barge_in, bridge_result
+
+# ⏱️ How long to wait for Callie to finish her last turn after the caller hangs up
+DRAIN_TIMEOUT = 5.0
+
+# 💤 Twilio sends media continuously during a call, so a session this quiet is a dead connection
+IDLE_TIMEOUT = 60.0
+REAP_INTERVAL = 10.0
+
+# 🚦 Admission control defaults: calls a worker runs at once, and how many more may wait for a slot
+MAX_CALLS = 50
+MAX_QUEUED = 5
+QUEUE_TIMEOUT = 2.0
+
+
+class CallSession:
+    """Everything that belongs to one phone call. Nothing in here is shared with other calls."""
+
+    def __init__(self, stream_sid: str, pipeline: VoicePipeline, sender: TwilioMediaSender):
+        self.stream_sid = stream_sid
+        self.pipeline = pipeline
+        self.sender = sender
+        # Twilio audio is 8 kHz; the input resamples it to the 24 kHz the STT model expects. The
+        # local VAD tells us the moment the caller starts or stops talking.
+        self.audio_input = StreamedAudioInput(
+            sample_rate=INBOUND_SAMPLE_RATE, vad=VoiceActivityDetector(INBOUND_SAMPLE_RATE)
+        )
+        self.inbound_audio = AudioRingBuffer()
+        # 📶 Caller audio is reordered and evened out here before anything else hears it
+        self.jitter = JitterBuffer(self._on_caller_audio)
+        self.latency = TurnLatency()
+        self.result: StreamedAudioResult | None = None
+        self.last_activity = time.monotonic()
+        self._playback_task: asyncio.Task | None = None
+        self._closed = False
+
+    async def start(self):
+        self.sender.start(self.stream_sid)
+        # Every media frame is pushed straight into the pipeline, which transcribes and answers
+        # turn by turn while the call is live.
+        self.result = await self.pipeline.run(self.audio_input)
+        self._playback_task = asyncio.create_task(
+            bridge_result(self.result, self.sender, self.latency)
+        )
+        self.jitter.start()
+
+    def touch(self):
+        self.last_activity = time.monotonic()
+
+    async def _on_caller_audio(self, payload: bytes):
+        # Twilio sends 8 kHz G.711 mu-law, one byte per sample. It is decoded straight into the
+        # call's preallocated ring buffer and handed on as a view.
+        pcm = self.inbound_audio.write_mulaw(payload)
+        vad_events = await self.audio_input.add_audio(pcm)
+        if not vad_events:
+            return
+
+        # ⏱️ The VAD only calls the end of speech after a stretch of silence, so work back from
+        # how much audio it has heard to when the caller actually went quiet
+        for event in vad_events:
+            if event.type == "speech_end":
+                heard = self.inbound_audio.total_samples / INBOUND_SAMPLE_RATE
+                self.latency.caller_stopped_speaking(time.monotonic() - (heard - event.timestamp))
+
+        # 🗣️ Caller started talking while Callie is answering: stop speaking right away. This
+        # goes by whether the response is still active, not whether audio is playing this
+        # instant, so speech between two TTS segments counts too.
+        if self.result and any(e.type == "speech_start" for e in vad_events):
+            if await barge_in(self.result, self.sender):
+                print("✋ Caller barged in")
+
+    async def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        await self.jitter.close()
+        print(f"📶 Inbound audio ({self.stream_sid}): {self.jitter.stats()}")
+
+        # The caller is gone: stop the writer first so the rest of the reply isn't paced out to no one
+        await self.sender.close()
+
+        # Stopping the turn loop closes the transcription session and ends the output stream.
+        result = self.result
+        if result and result.text_generation_task and not result.text_generation_task.done():
+            result.text_generation_task.cancel()
+        if self._playback_task:
+            try:
+                await asyncio.wait_for(self._playback_task, timeout=DRAIN_TIMEOUT)
+            except asyncio.TimeoutError:
+                print(f"⌛ Playback did not finish in time ({self.stream_sid})")
+            except Exception as e:
+                print(f"❌ Error during audio processing ({self.stream_sid}):", e)
+
+
+class CallSessionRegistry:
+    """Active calls keyed by Twilio `streamSid`.
+
+    Each call gets its own workflow (and so its own conversation history) from `workflow_factory`.
+    The STT/TTS models and the model provider behind them, along with its HTTP connection pool,
+    are created once and shared by every call. Sessions are evicted when the call ends or when
+    they have been idle for `idle_timeout` seconds, so memory tracks active calls only.
+
+    Admission control keeps a saturated worker from slowing every call down at once: at most
+    `max_calls` run together, up to `max_queued` more wait `queue_timeout` seconds for a slot,
+    and anything beyond that is turned away straight away so Twilio can try elsewhere.
+    """
+
+    def __init__(
+        self,
+        workflow_factory: Callable[[], VoiceWorkflowBase],
+        *,
+        config: VoicePipelineConfig | None = None,
+        stt_model: STTModel | None = None,
+        tts_model: TTSModel | None = None,
+        idle_timeout: float = IDLE_TIMEOUT,
+        max_calls: int = MAX_CALLS,
+        max_queued: int = MAX_QUEUED,
+        queue_timeout: float = QUEUE_TIMEOUT,
+    ):
+        self.workflow_factory = workflow_factory
+        config = config or VoicePipelineConfig()
+        # 📦 Every call is bridged straight to Twilio, so the pipeline hands back Twilio frames
+        self.config = dataclasses.replace(
+            config, tts_settings=dataclasses.replace(config.tts_settings, **TWILIO_OUTPUT_FORMAT)
+        )
+        self.stt_model = stt_model or self.config.model_provider.get_stt_model(None)
+        self.tts_model = tts_model or self.config.model_provider.get_tts_model(None)
+        self.idle_timeout = idle_timeout
+        self.max_calls = max_calls
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.active_calls = 0
+        self.queued_calls = 0
+        self._slots = asyncio.Semaphore(max_calls)
+        self._sessions: dict[str, CallSession] = {}
+        self._reaper_task: asyncio.Task | None = None
+        self.accepting = True
+        self._empty = asyncio.Event()
+        self._empty.set()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, stream_sid: str) -> CallSession | None:
+        return self._sessions.get(stream_sid)
+
+    async def open(self, stream_sid: str, websocket: WebSocket) -> CallSession:
+        pipeline = VoicePipeline(
+            workflow=self.workflow_factory(),
+            stt_model=self.stt_model,
+            tts_model=self.tts_model,
+            # One trace group per call
+            config=dataclasses.replace(self.config, group_id=gen_group_id()),
+        )
+        session = CallSession(stream_sid, pipeline, TwilioMediaSender(websocket))
+        self._sessions[stream_sid] = session
+        self._empty.clear()
+        self._ensure_reaper()
+        try:
+            await session.start()
+        except BaseException:
+            # ❌ A call that never got going mustn't stay registered and hold up a drain
+            await self.close(stream_sid)
+            raise
+        return session
+
+    async def close(self, stream_sid: str):
+        session = self._sessions.pop(stream_sid, None)
+        if session:
+            await session.close()
+        if not self._sessions:
+            self._empty.set()
+
+    async def admit(self) -> str | None:
+        """Claim a call slot, queueing for one if the worker is full.
+
+        Returns None once a slot is held (hand it back with `release()`), otherwise the reason the
+        call was turned away.
+        """
+        if not self.accepting:
+            return "worker is draining"
+        if self._slots.locked():
+            if self.queued_calls >= self.max_queued:
+                return f"worker at capacity ({self.active_calls} calls, queue full)"
+            self.queued_calls += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                return f"no call slot freed up within {self.queue_timeout}s"
+            finally:
+                self.queued_calls -= 1
+            if not self.accepting:
+                self._slots.release()
+                return "worker is draining"
+        else:
+            await self._slots.acquire()
+        self.active_calls += 1
+        return None
+
+    def release(self):
+        self.active_calls -= 1
+        self._slots.release()
+
+    @property
+    def has_capacity(self) -> bool:
+        return self.accepting and (not self._slots.locked() or self.queued_calls < self.max_queued)
+
+    def load(self) -> dict:
+        """Current load of this worker, for load balancers and dashboards."""
+        return {
+            "accepting": self.accepting,
+            "has_capacity": self.has_capacity,
+            "active_calls": self.active_calls,
+            "queued_calls": self.queued_calls,
+            "max_calls": self.max_calls,
+            "max_queued": self.max_queued,
+            "utilization": round(self.active_calls / self.max_calls, 3) if self.max_calls else 1.0,
+        }
+
+    def calls(self) -> dict:
+        """Per-call inbound audio stats, keyed by `streamSid`."""
+        return {sid: {"inbound": session.jitter.stats()} for sid, session in self._sessions.items()}
+
+    def start_draining(self):
+        """Stop taking new calls. Calls already in progress carry on until they hang up."""
+        self.accepting = False
+
+    async def wait_until_empty(self, timeout: float) -> bool:
+        """Wait for every active call to end. Returns False if some are still going at timeout."""
+        try:
+            await asyncio.wait_for(self._empty.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def _ensure_reaper(self):
+        if self._reaper_task is None or self._reaper_task.done():
+            self._reaper_task = asyncio.create_task(self._reap_idle_sessions())
+
+    async def _reap_idle_sessions(self):
+        while self._sessions:
+            await asyncio.sleep(REAP_INTERVAL)
+            now = time.monotonic()
+            idle = [
+                sid
+                for sid, session in self._sessions.items()
+                if now - session.last_activity > self.idle_timeout
+            ]
+            for sid in idle:
+                print(f"💤 Evicting idle call {sid}")
+                session = self._sessions.get(sid)
+                await self.close(sid)
+                if session:
+                    try:
+                        await session.sender.websocket.close()
+                    except Exception:
+                        pass
+
+    async def close_all(self):
+        for stream_sid in list(self._sessions):
+            await self.close(stream_sid)
+        if self._reaper_task and not self._reaper_task.done():
+            self._reaper_task.cancel()
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from typing import Awaitable, Callable
+
+import numpy as np
+
+from agents.voice import mulaw_encode
+from twilio_bridge import FRAME_DURATION_MS, FRAME_SIZE, MULAW_SILENCE, MediaFrame
+
+# 📶 How much caller audio we hold back to smooth out network jitter, in 20 ms frames
+JITTER_MIN_FRAMES = 2
+JITTER_MAX_FRAMES = 10
+
+# 🌫️ Level of the comfort noise that stands in for lost frames (int16 RMS, about -66 dBFS)
+COMFORT_NOISE_LEVEL = 16.0
+
+
+class JitterBuffer:
+    """Puts a call's inbound media frames back in order and plays them out every 20 ms.
+
+    Frames are slotted by their Twilio `timestamp` (falling back to `sequenceNumber`, which also
+    counts marks and so can't tell loss from a mark). Frames that arrive after their slot was
+    played are dropped, and a missing frame with later ones already waiting is concealed with
+    comfort noise (or silence). Playout starts once `target_depth` frames are buffered (or the
+    stream has gone quiet for `max_frames` frames); if the buffer runs dry it pauses and buffers up
+    again. That counts as an underrun only if more audio turns up within `max_frames` frames, i.e.
+    playout was starved rather than the caller's stream ending or pausing. The target follows an
+    RFC 3550 style estimate of the arrival jitter, between `min_frames` and `max_frames`. Beyond
+    `max_frames` the oldest frames are dropped so a burst after a network stall can't add lasting
+    delay. Closing hands on whatever is still buffered before stopping.
+    """
+
+    def __init__(
+        self,
+        on_frame: Callable[[bytes], Awaitable[None]],
+        *,
+        min_frames: int = JITTER_MIN_FRAMES,
+        max_frames: int = JITTER_MAX_FRAMES,
+        comfort_noise: bool = True,
+    ):
+        self.on_frame = on_frame
+        self.min_frames = min_frames
+        self.max_frames = max(max_frames, min_frames)
+        self.comfort_noise = comfort_noise
+        self.frame_seconds = FRAME_DURATION_MS / 1000
+        self.target_depth = min_frames
+        self.jitter_ms = 0.0
+
+        # 📊 Counters, see stats()
+        self.received = 0
+        self.played = 0
+        self.late = 0
+        self.duplicates = 0
+        self.concealed = 0
+        self.overflow_drops = 0
+        self.underruns = 0
+
+        self._frames: dict[int, bytes] = {}
+        self._next: int | None = None
+        self._highest = -1
+        self._by_timestamp: bool | None = None
+        self._last_transit: float | None = None
+        self._ready = asyncio.Event()
+        self._rng = np.random.default_rng()
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        # When playout last ran dry, until we know whether that was starvation
+        self._ran_dry_at: float | None = None
+
+    @property
+    def depth(self) -> int:
+        """Frames buffered ahead of playout, counting gaps that later frames have opened up."""
+        if self._next is None:
+            return 0
+        return max(0, self._highest - self._next + 1)
+
+    def start(self):
+        self._task = asyncio.create_task(self._playout())
+
+    async def close(self):
+        """Hand on whatever is still buffered, without waiting for its playout time, then stop."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._ready.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=self.max_frames * self.frame_seconds)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            pass
+        self._task = None
+
+    def _slot(self, frame: MediaFrame) -> int:
+        if self._by_timestamp is None:
+            self._by_timestamp = frame.timestamp is not None
+        if self._by_timestamp and frame.timestamp is not None:
+            return round(frame.timestamp / FRAME_DURATION_MS)
+        if frame.sequence_number is not None:
+            return frame.sequence_number
+        # Nothing to go on: take it as the next frame after the newest one
+        return self._highest + 1
+
+    def _update_jitter(self, slot: int):
+        # Transit time relative to the frame's place in the stream; its variation is the jitter
+        transit = time.monotonic() * 1000 - slot * FRAME_DURATION_MS
+        if self._last_transit is not None:
+            self.jitter_ms += (abs(transit - self._last_transit) - self.jitter_ms) / 16
+        self._last_transit = transit
+        wanted = self.min_frames + math.ceil(2 * self.jitter_ms / FRAME_DURATION_MS)
+        self.target_depth = min(self.max_frames, wanted)
+
+    def push(self, frame: MediaFrame):
+        """Take one inbound frame. Never blocks; the playout task hands frames on."""
+        slot = self._slot(frame)
+        self.received += 1
+        if self._ran_dry_at is not None:
+            # ⏸️ Audio kept coming after playout ran out of it: that was starvation, not the end
+            if time.monotonic() - self._ran_dry_at < self.max_frames * self.frame_seconds:
+                self.underruns += 1
+            self._ran_dry_at = None
+        self._update_jitter(slot)
+        if self._next is None:
+            self._next = slot
+        if slot < self._next:
+            self.late += 1
+            return
+        if slot in self._frames:
+            self.duplicates += 1
+            return
+        self._frames[slot] = frame.payload
+        self._highest = max(self._highest, slot)
+
+        while self.depth > self.max_frames:
+            if self._frames.pop(self._next, None) is not None:
+                self.overflow_drops += 1
+            self._next += 1
+
+        if self.depth >= self.target_depth:
+            self._ready.set()
+
+    def _fill(self) -> bytes:
+        if not self.comfort_noise:
+            return MULAW_SILENCE * FRAME_SIZE
+        noise = self._rng.normal(0, COMFORT_NOISE_LEVEL, FRAME_SIZE).astype(np.int16)
+        return mulaw_encode(noise).tobytes()
+
+    async def _playout(self):
+        while True:
+            draining = False
+            try:
+                await asyncio.wait_for(
+                    self._ready.wait(), timeout=self.max_frames * self.frame_seconds
+                )
+            except asyncio.TimeoutError:
+                # The stream went quiet short of the target: play what there is rather than hold
+                # on to the end of what the caller said
+                if not self.depth:
+                    continue
+                draining = True
+            next_tick = time.monotonic()
+            while self.depth:
+                payload = self._frames.pop(self._next, None)
+                if payload is None:
+                    payload = self._fill()
+                    self.concealed += 1
+                self._next += 1
+                self.played += 1
+                try:
+                    await self.on_frame(payload)
+                except Exception as e:
+                    print("❌ Error handling caller audio:", e)
+                if self._closing:
+                    # The call is over: hand the rest straight on
+                    continue
+
+                next_tick += self.frame_seconds
+                delay = next_tick - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                elif delay < -self.max_frames * self.frame_seconds:
+                    # Fell far behind (a stalled event loop): don't try to catch up in a burst
+                    next_tick = time.monotonic()
+
+            if self._closing:
+                return
+            # Ran dry: wait until we have target_depth frames again. push() decides whether this
+            # was an underrun. Playing out the tail after the stream went quiet never is.
+            if not draining:
+                self._ran_dry_at = time.monotonic()
+            self._ready.clear()
+
+    def stats(self) -> dict:
+        """Depth and loss figures for this call."""
+        expected = self.played + self.overflow_drops
+        return {
+            "depth_ms": self.depth * FRAME_DURATION_MS,
+            "target_depth_ms": self.target_depth * FRAME_DURATION_MS,
+            "jitter_ms": round(self.jitter_ms, 1),
+            "received": self.received,
+            "played": self.played,
+            "late": self.late,
+            "duplicates": self.duplicates,
+            "concealed": self.concealed,
+            "overflow_drops": self.overflow_drops,
+            "underruns": self.underruns,
+            "loss_rate": round(self.concealed / expected, 4) if expected else 0.0,
+        }
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import bisect
+import time
+
+from agents.voice import VoiceTurnTimings
+
+# 🪣 Histogram buckets in seconds, from a fast LLM token to a really slow turn
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """A Prometheus histogram with one label, rendered in the text exposition format.
+
+    Small enough that pulling in prometheus_client for it isn't worth it. Every call on a worker
+    observes into the same histograms, so with several workers each one reports its own.
+    """
+
+    def __init__(self, name: str, help: str, label: str, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = tuple(buckets)
+        # label value -> (per-bucket counts with +Inf last, sum)
+        self._series: dict[str, tuple[list[int], list[float]]] = {}
+
+    def observe(self, label_value: str, seconds: float):
+        counts, total = self._series.setdefault(label_value, ([0] * (len(self.buckets) + 1), [0.0]))
+        counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        total[0] += seconds
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for value, (counts, total) in self._series.items():
+            label = f'{self.label}="{value}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label}}} {total[0]}")
+            lines.append(f"{self.name}_count{{{label}}} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+# ⏱️ Where each turn spends its time, from the caller going quiet to Callie's first frame:
+#    stt = speech end -> final transcript, llm = transcript -> first token,
+#    tts = first token -> first TTS byte, outbound = first TTS byte -> first frame to Twilio,
+#    total = speech end -> first frame to Twilio
+TURN_LATENCY = Histogram(
+    "callie_turn_latency_seconds", "Latency of each stage of a conversational turn.", "stage"
+)
+
+
+def render_metrics() -> str:
+    return TURN_LATENCY.render()
+
+
+class TurnLatency:
+    """Collects the timestamps of one call's turns and records them once the first frame is out.
+
+    All timestamps are `time.monotonic()`. The pipeline fills in the transcript, first token and
+    first TTS byte; the call adds when the caller stopped speaking and when Callie's first frame
+    went to Twilio.
+    """
+
+    def __init__(self, histogram: Histogram = TURN_LATENCY):
+        self.histogram = histogram
+        self.speech_end_at: float | None = None
+        self._timings: VoiceTurnTimings | None = None
+        self._speech_end_at: float | None = None
+
+    def caller_stopped_speaking(self, at: float):
+        self.speech_end_at = at
+
+    def turn_started(self, timings: VoiceTurnTimings | None):
+        self._timings = timings
+        self._speech_end_at = None
+        # Speech that ended after this turn's transcript came back belongs to the next turn
+        transcript_at = timings.transcript_at if timings else None
+        if self.speech_end_at is not None and transcript_at is not None:
+            if self.speech_end_at <= transcript_at:
+                self._speech_end_at, self.speech_end_at = self.speech_end_at, None
+
+    def first_frame_sent(self, at: float | None = None):
+        """Record the turn. Only the first call per turn counts."""
+        timings, self._timings = self._timings, None
+        if timings is None:
+            return
+        at = time.monotonic() if at is None else at
+        stages = [
+            ("stt", self._speech_end_at, timings.transcript_at),
+            ("llm", timings.transcript_at, timings.first_text_at),
+            ("tts", timings.first_text_at, timings.first_audio_at),
+            ("outbound", timings.first_audio_at, at),
+            ("total", self._speech_end_at, at),
+        ]
+        for stage, start, end in stages:
+            if start is not None and end is not None and end >= start:
+                self.histogram.observe(stage, end - start)
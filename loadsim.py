@@ -0,0 +1,539 @@
+"""Load simulator for the Twilio media stream endpoint.
+
+Opens N concurrent websocket connections to `/media` and behaves like Twilio: sends `start`,
+replays caller audio as 20 ms mu-law `media` frames at real-time pace, plays back whatever the
+server sends (echoing `mark`s when playback reaches them and honouring `clear`), and ends with
+`stop`. It then reports time-to-first-audio, per-turn response latency percentiles and, when it
+can see the server process, CPU and memory per call.
+
+Run fully offline against a local server with fake STT/LLM/TTS backends:
+
+    python loadsim.py run --calls 50 --spawn-server
+
+Or against a running server (pass its PID to get CPU/memory numbers):
+
+    python loadsim.py run --url ws://localhost:8000/media --calls 20 --server-pid 1234
+
+Caller audio comes from `--wav` files (16-bit mono, any sample rate; calls cycle through them).
+Without any, every turn is 1.5 s of a synthetic voice-like tone. Other backends can be plugged in
+with `serve --registry module:function`, where the function returns a `CallSessionRegistry`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+import wave
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "agents-sdk/src")))
+
+import numpy as np
+import websockets
+
+from agents.voice import (
+    AudioInput,
+    StreamedAudioInput,
+    StreamedTranscriptionSession,
+    STTModel,
+    STTModelSettings,
+    TTSModel,
+    TTSModelSettings,
+    VoiceWorkflowBase,
+    mulaw_encode,
+)
+
+FRAME_SECONDS = 0.02
+SAMPLE_RATE = 8000
+FRAME_SIZE = int(SAMPLE_RATE * FRAME_SECONDS)
+MULAW_SILENCE = b"\xff" * FRAME_SIZE
+SPEECH_RMS = 500
+
+
+# 🎭 Offline backends. They stand in for the OpenAI models with realistic-ish timing, so the
+# numbers reflect the server's own overhead plus the configured model latencies.
+
+
+class SimulatedTranscriptionSession(StreamedTranscriptionSession):
+    """Emits a transcript each time the caller stops talking, like server-side VAD would."""
+
+    def __init__(self, input: StreamedAudioInput, latency: float, silence_frames: int):
+        self._queue = input.queue
+        self._latency = latency
+        self._silence_frames = silence_frames
+        self._closed = asyncio.Event()
+
+    async def transcribe_turns(self) -> AsyncIterator[str]:
+        speaking = False
+        quiet = 0
+        turn = 0
+        while not self._closed.is_set():
+            get = asyncio.ensure_future(self._queue.get())
+            closed = asyncio.ensure_future(self._closed.wait())
+            done, _ = await asyncio.wait({get, closed}, return_when=asyncio.FIRST_COMPLETED)
+            if get not in done:
+                get.cancel()
+                break
+            closed.cancel()
+            pcm = get.result()
+            loud = np.sqrt(np.mean(np.square(pcm, dtype=np.float32))) >= SPEECH_RMS
+            if loud:
+                speaking, quiet = True, 0
+            elif speaking:
+                quiet += 1
+                if quiet >= self._silence_frames:
+                    speaking = False
+                    turn += 1
+                    await asyncio.sleep(self._latency)
+                    yield f"caller turn {turn}"
+
+    async def close(self) -> None:
+        self._closed.set()
+
+
+class SimulatedSTT(STTModel):
+    def __init__(self, latency: float = 0.15, silence_ms: int = 500):
+        self.latency = latency
+        self.silence_frames = int(silence_ms / 1000 / FRAME_SECONDS)
+
+    @property
+    def model_name(self) -> str:
+        return "simulated_stt"
+
+    async def transcribe(self, input: AudioInput, settings: STTModelSettings, *_: bool) -> str:
+        await asyncio.sleep(self.latency)
+        return "caller turn"
+
+    async def create_session(
+        self, input: StreamedAudioInput, settings: STTModelSettings, *_: bool
+    ) -> StreamedTranscriptionSession:
+        return SimulatedTranscriptionSession(input, self.latency, self.silence_frames)
+
+
+class SimulatedWorkflow(VoiceWorkflowBase):
+    """Streams a canned answer word by word after a time-to-first-token delay."""
+
+    ANSWER = (
+        "Thanks for calling. I can help you with that. "
+        "Could you tell me a little more about what you need today?"
+    )
+
+    def __init__(self, first_token_latency: float = 0.35, token_interval: float = 0.02):
+        self.first_token_latency = first_token_latency
+        self.token_interval = token_interval
+
+    async def run(self, transcription: str) -> AsyncIterator[str]:
+        await asyncio.sleep(self.first_token_latency)
+        for word in self.ANSWER.split(" "):
+            yield word + " "
+            await asyncio.sleep(self.token_interval)
+
+
+class SimulatedTTS(TTSModel):
+    """Returns 24 kHz PCM in a burst after a first-byte delay, about 15 characters per second."""
+
+    def __init__(self, first_byte_latency: float = 0.2):
+        self.first_byte_latency = first_byte_latency
+
+    @property
+    def model_name(self) -> str:
+        return "simulated_tts"
+
+    async def run(self, text: str, settings: TTSModelSettings) -> AsyncIterator[bytes]:
+        await asyncio.sleep(self.first_byte_latency)
+        seconds = max(len(text) / 15, 0.2)
+        t = np.arange(int(24000 * seconds)) / 24000
+        audio = (np.sin(2 * np.pi * 220 * t) * 6000).astype(np.int16).tobytes()
+        for i in range(0, len(audio), 1024):
+            yield audio[i : i + 1024]
+            await asyncio.sleep(0)
+
+
+def simulated_registry():
+    from agents.voice import VoicePipelineConfig
+    from call_sessions import CallSessionRegistry
+
+    return CallSessionRegistry(
+        SimulatedWorkflow,
+        config=VoicePipelineConfig(tracing_disabled=True),
+        stt_model=SimulatedSTT(),
+        tts_model=SimulatedTTS(),
+    )
+
+
+def load_object(path: str):
+    module_name, _, attr = path.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def serve(args):
+    os.environ.setdefault("OPENAI_API_KEY", "offline")
+    import uvicorn
+
+    import stream_handler
+    from agents import set_tracing_disabled
+    from prompt_cache import PromptAudioCache
+
+    registry_factory = load_object(args.registry) if args.registry else simulated_registry
+    sessions = stream_handler.sessions = registry_factory()
+    prompts = stream_handler.prompts = PromptAudioCache(
+        sessions.tts_model, sessions.config.tts_settings
+    )
+    if not args.registry:
+        set_tracing_disabled(True)
+
+        async def offline_warmup():
+            await prompts.render_all({"greeting": stream_handler.GREETING})
+
+        stream_handler.warmup = offline_warmup
+    uvicorn.run(stream_handler.app, host=args.host, port=args.port, log_level="warning")
+
+
+# 📞 Simulated callers
+
+
+def load_wav(path: str) -> np.ndarray:
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise SystemExit(f"{path}: only 16-bit WAV files are supported")
+        pcm = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+        pcm = pcm.reshape(-1, wav.getnchannels()).mean(axis=1)
+        rate = wav.getframerate()
+    if rate != SAMPLE_RATE:
+        positions = np.arange(0, len(pcm), rate / SAMPLE_RATE)
+        pcm = np.interp(positions, np.arange(len(pcm)), pcm)
+    return pcm.astype(np.int16)
+
+
+def synthetic_utterance(seconds: float = 1.5) -> np.ndarray:
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    # A 150 Hz buzz with a syllable-rate envelope is loud enough to trip any VAD
+    envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)
+    return (np.sin(2 * np.pi * 150 * t) * envelope * 8000).astype(np.int16)
+
+
+def to_frames(pcm: np.ndarray) -> list[bytes]:
+    padded = np.concatenate((pcm, np.zeros(-len(pcm) % FRAME_SIZE, dtype=np.int16)))
+    encoded = mulaw_encode(padded).tobytes()
+    return [encoded[i : i + FRAME_SIZE] for i in range(0, len(encoded), FRAME_SIZE)]
+
+
+@dataclass
+class CallStats:
+    connected_at: float = 0.0
+    first_audio_at: float | None = None
+    turn_latencies: list[float] = field(default_factory=list)
+    frames_received: int = 0
+    error: str | None = None
+
+
+class SimulatedCaller:
+    def __init__(self, url: str, utterance: list[bytes], turns: int, gap: float):
+        self.url = url
+        self.utterance = utterance
+        self.turns = turns
+        self.gap = gap
+        self.stream_sid = "MZ" + uuid.uuid4().hex
+        self.stats = CallStats()
+        self._sequence = 0
+        self._playback_end = 0.0
+        self._pending_marks: list[asyncio.TimerHandle] = []
+        self._waiting_since: float | None = None
+
+    def _media(self, payload: bytes) -> str:
+        self._sequence += 1
+        return json.dumps(
+            {
+                "event": "media",
+                "sequenceNumber": str(self._sequence),
+                "media": {
+                    "track": "inbound",
+                    "chunk": str(self._sequence),
+                    "timestamp": str(int((self._sequence - 1) * FRAME_SECONDS * 1000)),
+                    "payload": base64.b64encode(payload).decode("ascii"),
+                },
+                "streamSid": self.stream_sid,
+            }
+        )
+
+    async def run(self):
+        try:
+            async with websockets.connect(self.url, max_size=None) as ws:
+                self.stats.connected_at = time.monotonic()
+                await ws.send(json.dumps({"event": "connected", "protocol": "Call"}))
+                await ws.send(
+                    json.dumps(
+                        {
+                            "event": "start",
+                            "sequenceNumber": "1",
+                            "start": {"streamSid": self.stream_sid, "tracks": ["inbound"]},
+                            "streamSid": self.stream_sid,
+                        }
+                    )
+                )
+                receiver = asyncio.create_task(self._receive(ws))
+                try:
+                    await self._send_audio(ws)
+                    await ws.send(json.dumps({"event": "stop", "streamSid": self.stream_sid}))
+                finally:
+                    receiver.cancel()
+                    for handle in self._pending_marks:
+                        handle.cancel()
+        except Exception as e:
+            self.stats.error = f"{type(e).__name__}: {e}"
+
+    async def _send_audio(self, ws):
+        # Frames are scheduled from a monotonic clock so the caller never drifts off real time
+        next_at = time.monotonic()
+        silence_frames = int(self.gap / FRAME_SECONDS)
+        for _ in range(self.turns):
+            for frames, is_speech in (
+                (self.utterance, True),
+                ([MULAW_SILENCE] * silence_frames, False),
+            ):
+                for frame in frames:
+                    await asyncio.sleep(max(0.0, next_at - time.monotonic()))
+                    await ws.send(self._media(frame))
+                    next_at += FRAME_SECONDS
+                if is_speech:
+                    self._waiting_since = time.monotonic()
+
+    async def _echo(self, ws, message: str):
+        try:
+            await ws.send(message)
+        except websockets.ConnectionClosed:
+            pass
+
+    async def _receive(self, ws):
+        loop = asyncio.get_running_loop()
+        async for message in ws:
+            data = json.loads(message)
+            event = data.get("event")
+            now = time.monotonic()
+            if event == "media":
+                self.stats.frames_received += 1
+                if self.stats.first_audio_at is None:
+                    self.stats.first_audio_at = now
+                if self._waiting_since is not None:
+                    self.stats.turn_latencies.append(now - self._waiting_since)
+                    self._waiting_since = None
+                self._playback_end = max(self._playback_end, now) + FRAME_SECONDS
+            elif event == "mark":
+                # Twilio echoes a mark once everything sent before it has been played
+                reply = json.dumps(
+                    {"event": "mark", "streamSid": self.stream_sid, "mark": data["mark"]}
+                )
+                delay = max(0.0, self._playback_end - now)
+                self._pending_marks.append(
+                    loop.call_later(delay, lambda r=reply: asyncio.ensure_future(self._echo(ws, r)))
+                )
+            elif event == "clear":
+                self._playback_end = now
+                for handle in self._pending_marks:
+                    handle.cancel()
+                self._pending_marks.clear()
+
+
+# 📈 Server process sampling (Linux /proc)
+
+
+class ProcessSampler:
+    def __init__(self, pid: int | None):
+        self.pid = pid
+        self.baseline_rss = self.peak_rss = self._rss()
+        self.baseline_cpu = self._cpu()
+        self._task: asyncio.Task | None = None
+
+    def _rss(self) -> int | None:
+        if self.pid is None:
+            return None
+        try:
+            with open(f"/proc/{self.pid}/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except OSError:
+            return None
+
+    def _cpu(self) -> float | None:
+        if self.pid is None:
+            return None
+        try:
+            with open(f"/proc/{self.pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        except OSError:
+            return None
+
+    async def _sample(self):
+        while True:
+            rss = self._rss()
+            if rss is not None and self.peak_rss is not None:
+                self.peak_rss = max(self.peak_rss, rss)
+            await asyncio.sleep(0.25)
+
+    def start(self):
+        self._task = asyncio.create_task(self._sample())
+
+    def stop(self) -> tuple[float | None, int | None]:
+        if self._task:
+            self._task.cancel()
+        cpu = self._cpu()
+        cpu_used = None if cpu is None or self.baseline_cpu is None else cpu - self.baseline_cpu
+        rss_growth = (
+            None
+            if self.peak_rss is None or self.baseline_rss is None
+            else self.peak_rss - self.baseline_rss
+        )
+        return cpu_used, rss_growth
+
+
+def percentiles(values: list[float]) -> str:
+    if not values:
+        return "n/a"
+    if len(values) == 1:
+        return f"p50={values[0] * 1000:.0f}ms"
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return (
+        f"p50={cuts[49] * 1000:.0f}ms p90={cuts[89] * 1000:.0f}ms "
+        f"p99={cuts[98] * 1000:.0f}ms max={max(values) * 1000:.0f}ms"
+    )
+
+
+async def run_load(args, server_pid: int | None) -> dict:
+    utterances = [to_frames(load_wav(path)) for path in args.wav] or [
+        to_frames(synthetic_utterance())
+    ]
+    callers = [
+        SimulatedCaller(args.url, utterances[i % len(utterances)], args.turns, args.gap)
+        for i in range(args.calls)
+    ]
+
+    sampler = ProcessSampler(server_pid)
+    sampler.start()
+    started = time.monotonic()
+
+    async def run_caller(i: int, caller: SimulatedCaller):
+        await asyncio.sleep(args.ramp * i / max(args.calls, 1))
+        await caller.run()
+
+    await asyncio.gather(*(run_caller(i, c) for i, c in enumerate(callers)))
+    wall = time.monotonic() - started
+    cpu_used, rss_growth = sampler.stop()
+
+    ok = [c.stats for c in callers if c.stats.error is None]
+    ttfa = [s.first_audio_at - s.connected_at for s in ok if s.first_audio_at is not None]
+    latencies = [latency for s in ok for latency in s.turn_latencies]
+    report = {
+        "calls": args.calls,
+        "failed": args.calls - len(ok),
+        "errors": sorted({c.stats.error for c in callers if c.stats.error}),
+        "wall_seconds": round(wall, 2),
+        "time_to_first_audio": ttfa,
+        "turn_latency": latencies,
+        "turns_answered": len(latencies),
+        "turns_sent": len(ok) * args.turns,
+        "server_cpu_seconds": cpu_used,
+        "server_rss_growth_bytes": rss_growth,
+    }
+    return report
+
+
+def print_report(report: dict):
+    calls = report["calls"]
+    print(f"📞 {calls} calls, {report['failed']} failed, {report['wall_seconds']}s wall time")
+    for error in report["errors"]:
+        print(f"   ❌ {error}")
+    print(f"⏱️ time to first audio  {percentiles(report['time_to_first_audio'])}")
+    print(
+        f"🔁 turn response        {percentiles(report['turn_latency'])} "
+        f"({report['turns_answered']}/{report['turns_sent']} turns answered)"
+    )
+    cpu, rss = report["server_cpu_seconds"], report["server_rss_growth_bytes"]
+    if cpu is not None:
+        core_share = cpu / report["wall_seconds"] / max(calls, 1) * 100
+        print(f"🧮 server CPU           {cpu:.2f}s total, {core_share:.2f}% of a core per call")
+    if rss is not None:
+        print(
+            f"🧠 server memory        +{rss / 2**20:.1f} MB peak, {rss / max(calls, 1) / 1024:.0f} KB per call"
+        )
+
+
+async def wait_for_port(host: str, port: int, timeout: float = 20.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise SystemExit(f"Server did not come up on {host}:{port}")
+
+
+def run(args):
+    server = None
+    server_pid = args.server_pid
+    if args.spawn_server:
+        command = [sys.executable, __file__, "serve", "--port", str(args.port)]
+        if args.registry:
+            command += ["--registry", args.registry]
+        server = subprocess.Popen(command)
+        server_pid = server.pid
+        args.url = f"ws://127.0.0.1:{args.port}/media"
+    try:
+        if server is not None:
+            asyncio.run(wait_for_port("127.0.0.1", args.port))
+        report = asyncio.run(run_load(args, server_pid))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="simulate concurrent calls")
+    run_parser.add_argument("--url", default="ws://127.0.0.1:8000/media")
+    run_parser.add_argument("--calls", type=int, default=10)
+    run_parser.add_argument("--turns", type=int, default=3, help="caller turns per call")
+    run_parser.add_argument(
+        "--gap", type=float, default=4.0, help="seconds of silence after each turn"
+    )
+    run_parser.add_argument(
+        "--ramp", type=float, default=2.0, help="seconds over which calls start"
+    )
+    run_parser.add_argument("--wav", action="append", default=[], help="caller audio, repeatable")
+    run_parser.add_argument("--server-pid", type=int, help="sample CPU/memory of this process")
+    run_parser.add_argument("--spawn-server", action="store_true", help="start a local server")
+    run_parser.add_argument("--port", type=int, default=8765, help="port for --spawn-server")
+    run_parser.add_argument("--registry", help="module:function building the CallSessionRegistry")
+    run_parser.add_argument("--json", action="store_true", help="print the raw report as JSON")
+    run_parser.set_defaults(handler=run)
+
+    serve_parser = commands.add_parser("serve", help="run the app with offline backends")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--registry", help="module:function building the CallSessionRegistry")
+    serve_parser.set_defaults(handler=serve)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Optional
+
+import numpy as np
+
+from agents.voice import AudioOutputEncoder, TTSModel, TTSModelSettings
+from twilio_bridge import TTS_SAMPLE_RATE, TWILIO_OUTPUT_FORMAT
+
+# A runtime alias, so no `X | None` here: that only works from Python 3.10
+PromptKey = tuple[str, Optional[str], Optional[str], Optional[float], str]
+
+
+class PromptAudioCache:
+    """Phrases Callie always says the same way, synthesized once and kept as ready-to-send frames.
+
+    Rendering goes through the same TTS model and settings as live turns, so a cached greeting
+    sounds like the rest of the call. Audio is keyed by model, voice, instructions and speed as
+    well as text: changing any of them renders the phrase again instead of replaying stale audio.
+    """
+
+    def __init__(self, tts_model: TTSModel, settings: TTSModelSettings):
+        self.tts_model = tts_model
+        self.settings = settings
+        self._frames: dict[PromptKey, list[bytes]] = {}
+        self._names: dict[str, PromptKey] = {}
+
+    def _key(self, text: str) -> PromptKey:
+        s = self.settings
+        return (self.tts_model.model_name, s.voice, s.instructions, s.speed, text)
+
+    async def render(self, name: str, text: str) -> list[bytes]:
+        """Synthesize `text` (unless it already is) and make it available as `name`."""
+        key = self._key(text)
+        self._names[name] = key
+        if key not in self._frames:
+            self._frames[key] = await self._synthesize(text)
+        return self._frames[key]
+
+    async def render_all(self, phrases: dict[str, str]):
+        await asyncio.gather(*(self.render(name, text) for name, text in phrases.items()))
+
+    async def _synthesize(self, text: str) -> list[bytes]:
+        # Same conversion as live turns get from the pipeline
+        encoder = AudioOutputEncoder(
+            TTS_SAMPLE_RATE,
+            TWILIO_OUTPUT_FORMAT["output_sample_rate"],
+            TWILIO_OUTPUT_FORMAT["output_encoding"],
+            TWILIO_OUTPUT_FORMAT["frame_duration_ms"],
+        )
+        frames: list[bytes] = []
+        pending = bytearray()
+        async for chunk in self.tts_model.run(text, self.settings):
+            # Chunks are raw int16 PCM and can split a sample in two, so an odd byte is carried
+            # over to the next chunk. The encoder copies what it's given, so the buffer is free
+            # to be trimmed again straight after.
+            pending += chunk
+            usable = len(pending) - len(pending) % 2
+            encoded = encoder.encode(np.frombuffer(pending, dtype=np.int16, count=usable // 2))
+            if encoded is not None:
+                frames += [frame.tobytes() for frame in encoded]
+            del pending[:usable]
+        last = encoder.flush()
+        if last is not None:
+            frames += [frame.tobytes() for frame in last]
+        return frames
+
+    def get(self, name: str) -> list[bytes] | None:
+        key = self._names.get(name)
+        return None if key is None else self._frames.get(key)
@@ -0,0 +1,152 @@
+"""Production entry point: several uvicorn workers sharing one port through SO_REUSEPORT.
+
+Each worker binds its own listening socket with SO_REUSEPORT, so the kernel spreads incoming
+calls across workers with no shared accept lock. Workers warm up (OpenAI connection pool,
+models) before they start accepting calls. On SIGTERM a worker stops accepting new calls,
+lets the calls it already has finish (up to CALLIE_DRAIN_TIMEOUT seconds), and only then exits.
+
+Configuration comes from the environment:
+    PORT                   port to listen on (default 8000)
+    WEB_CONCURRENCY        number of worker processes (default: number of CPUs)
+    CALLIE_DRAIN_TIMEOUT   seconds to wait for active calls on shutdown (default 25)
+    CALLIE_MAX_CALLS       calls each worker runs at once (default 50)
+    CALLIE_MAX_QUEUED      calls each worker lets wait for a free slot (default 5)
+    CALLIE_QUEUE_TIMEOUT   seconds a queued call waits before it is rejected (default 2)
+    CALLIE_TTS_CACHE_DIR   directory for synthesized phrases shared by all workers (optional)
+    CALLIE_LOCAL_ENDPOINTING  set to 1 to end caller turns on the local VAD (faster replies)
+    CALLIE_SILENCE_GATE    set to 1 to stop sending long silences to transcription (turns
+                           then end after 500 ms of silence unless ended locally)
+    CALLIE_SPECULATE       set to 1 to start replies on partial transcripts (faster replies)
+
+Each worker reports its load at GET /load (503 when it is full or draining), and the inbound
+audio stats of every call (jitter buffer depth, late and lost frames) at GET /calls. Turn latency
+histograms, broken down by stage, are at GET /metrics in Prometheus text format.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+WORKERS = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+# Heroku sends SIGKILL 30 s after SIGTERM, so leave a little room for the final cleanup
+DRAIN_TIMEOUT = float(os.getenv("CALLIE_DRAIN_TIMEOUT", "25"))
+
+# 🔁 A worker that dies this soon after starting is crashing on startup; don't respawn it in a loop
+MIN_WORKER_UPTIME = 5.0
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if hasattr(socket, "SO_REUSEPORT"):
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+    return sock
+
+
+class DrainingServer(uvicorn.Server):
+    """A uvicorn server whose first SIGTERM/SIGINT drains active calls instead of dropping them."""
+
+    def __init__(self, config: uvicorn.Config):
+        super().__init__(config)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._draining = False
+
+    async def serve(self, sockets=None):
+        self._loop = asyncio.get_running_loop()
+        await super().serve(sockets=sockets)
+
+    def handle_exit(self, sig, frame):
+        if self._loop is None:
+            return super().handle_exit(sig, frame)
+        if self._draining:
+            # A second Ctrl-C means "stop now". Repeated SIGTERMs are expected (Heroku signals
+            # every process in the dyno and the master forwards it too) and are ignored.
+            if sig == signal.SIGINT:
+                self.force_exit = True
+                self.should_exit = True
+            return
+        self._draining = True
+        self._loop.call_soon_threadsafe(lambda: asyncio.ensure_future(self._drain()))
+
+    async def _drain(self):
+        from stream_handler import sessions
+
+        print(f"🚰 Draining {len(sessions)} active call(s) before shutdown [{os.getpid()}]")
+        sessions.start_draining()
+        # Stop accepting connections so the kernel routes new calls to the other workers
+        for server in self.servers:
+            server.close()
+        if not await sessions.wait_until_empty(DRAIN_TIMEOUT):
+            print(f"⌛ {len(sessions)} call(s) still active after {DRAIN_TIMEOUT}s, closing them")
+        self.should_exit = True
+
+
+def run_worker(sock: socket.socket | None):
+    if sock is None:
+        sock = bind_socket(HOST, PORT)
+    config = uvicorn.Config("stream_handler:app", lifespan="on")
+    asyncio.run(DrainingServer(config).serve(sockets=[sock]))
+
+
+def main():
+    reuse_port = hasattr(socket, "SO_REUSEPORT")
+    workers = WORKERS if reuse_port else 1
+    # Without SO_REUSEPORT every worker would need to share one socket; just run a single worker
+    shared_sock = None if reuse_port else bind_socket(HOST, PORT)
+
+    ctx = multiprocessing.get_context("spawn")
+    processes: dict[int, tuple[multiprocessing.Process, float]] = {}
+    stopping = False
+
+    def spawn(slot: int):
+        process = ctx.Process(target=run_worker, args=(shared_sock,), name=f"callie-worker-{slot}")
+        process.start()
+        processes[slot] = (process, time.monotonic())
+
+    def stop(sig, frame):
+        nonlocal stopping
+        stopping = True
+        # Ctrl-C already reaches every process in the foreground group
+        if sig == signal.SIGINT:
+            return
+        for process, _ in processes.values():
+            if process.is_alive():
+                os.kill(process.pid, sig)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    print(f"🚀 Starting {workers} worker(s) on {HOST}:{PORT}")
+    for slot in range(workers):
+        spawn(slot)
+
+    while processes:
+        for slot, (process, started_at) in list(processes.items()):
+            process.join(timeout=0.5)
+            if process.is_alive():
+                continue
+            del processes[slot]
+            if stopping:
+                continue
+            if time.monotonic() - started_at < MIN_WORKER_UPTIME:
+                print(f"💥 Worker {slot} exited during startup (code {process.exitcode})")
+                stop(signal.SIGTERM, None)
+                sys.exit(1)
+            print(f"♻️ Worker {slot} exited (code {process.exitcode}), restarting")
+            spawn(slot)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,75 +1,206 @@
-import asyncio
-import base64
-import json
 import os
 import sys
 
 # ✅ Add the vendored SDK to Python's path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "agents-sdk/src")))
 
+from contextlib import asynccontextmanager
+from functools import partial
+
 from starlette.websockets import WebSocket, WebSocketDisconnect
 from starlette.applications import Starlette
-from starlette.routing import WebSocketRoute
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route, WebSocketRoute
 from openai import AsyncOpenAI
-from agents import Agent
-from agents.voice import VoicePipeline, AudioInput, SingleAgentVoiceWorkflow
+from agents import Agent, set_default_openai_client
+from agents.voice import (
+    CachedTTSModel,
+    IncrementalTextSplitter,
+    OpenAIVoiceModelProvider,
+    SilenceGateSettings,
+    SingleAgentVoiceWorkflow,
+    SpeculationSettings,
+    STTModelSettings,
+    TTSModelSettings,
+    VoicePipelineConfig,
+)
+from call_sessions import CallSessionRegistry
+from latency_metrics import PROMETHEUS_CONTENT_TYPE, render_metrics
+from prompt_cache import PromptAudioCache
+from twilio_bridge import MediaFrame, parse_message
 
-# 🔑 OpenAI Client
+# 🔑 OpenAI Client, shared by the agent runs and the STT/TTS models of every call
 openai = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+set_default_openai_client(openai)
+
+# 👋 Played the moment a call connects, from audio rendered at startup
+GREETING = "Hi, this is Callie! How can I help you today?"
 
 # 🤖 Define Callie Agent
 agent = Agent(
     name="Callie",
-    instructions="You're a helpful, friendly receptionist named Callie. Greet callers, ask what they need help with, and respond in a natural, polite voice.",
+    instructions=f"You're a helpful, friendly receptionist named Callie. Callers have already heard your greeting, \"{GREETING}\", so don't greet them again: find out what they need help with and respond in a natural, polite voice.",
     model="gpt-4o"
 )
 agent.voice = "alloy"
 
-# 🔁 Voice Pipeline
-pipeline = VoicePipeline(workflow=SingleAgentVoiceWorkflow(agent))
+voice_models = OpenAIVoiceModelProvider(openai_client=openai)
+
+local_endpointing = os.getenv("CALLIE_LOCAL_ENDPOINTING") == "1"
+silence_gate = os.getenv("CALLIE_SILENCE_GATE") == "1"
+
+# 💾 Callie says the same phrases over and over; synthesize each one once. Point
+# CALLIE_TTS_CACHE_DIR at a shared directory to keep them across restarts and workers.
+tts_model = CachedTTSModel(
+    voice_models.get_tts_model(None), disk_path=os.getenv("CALLIE_TTS_CACHE_DIR") or None
+)
+
+# 📇 One workflow (and conversation history) per call, keyed by streamSid
+sessions = CallSessionRegistry(
+    lambda: SingleAgentVoiceWorkflow(agent),
+    config=VoicePipelineConfig(
+        model_provider=voice_models,
+        # ⏱️ Optionally end turns on our own VAD instead of waiting for OpenAI's
+        # 🤫 and optionally stop streaming the silence while the caller listens. OpenAI has to
+        # end the turn before the gate closes, so the gate swaps semantic turn detection for a
+        # plain 500 ms silence timeout.
+        stt_settings=STTModelSettings(
+            local_endpointing=local_endpointing,
+            turn_detection=(
+                {"type": "server_vad", "silence_duration_ms": 500}
+                if silence_gate and not local_endpointing
+                else None
+            ),
+            silence_gate=SilenceGateSettings() if silence_gate else None,
+        ),
+        # 🎚️ Synthesize at most two sentences and a few seconds of audio ahead of the caller, so a
+        # barge-in throws away little TTS work and a long reply doesn't sit in memory
+        # ✂️ Start speaking on the first clause, and don't let a slow reply leave the line silent
+        tts_settings=TTSModelSettings(
+            voice=agent.voice,
+            incremental_splitter=partial(IncrementalTextSplitter, max_wait_seconds=0.6),
+            max_inflight_segments=2,
+            max_queued_seconds=3.0,
+        ),
+        # 🔮 Optionally start thinking on the partial transcript, before the caller has finished
+        speculation=SpeculationSettings() if os.getenv("CALLIE_SPECULATE") == "1" else None,
+    ),
+    tts_model=tts_model,
+    # 🚦 Past these limits new calls are turned away instead of slowing down the ones in progress
+    max_calls=int(os.getenv("CALLIE_MAX_CALLS", "50")),
+    max_queued=int(os.getenv("CALLIE_MAX_QUEUED", "5")),
+    queue_timeout=float(os.getenv("CALLIE_QUEUE_TIMEOUT", "2")),
+)
+
+# 🗃️ Fixed phrases, synthesized once per worker with the same voice as live turns
+prompts = PromptAudioCache(sessions.tts_model, sessions.config.tts_settings)
+
+
+# 🔥 Get everything expensive out of the way before the first call reaches this worker
+async def warmup():
+    try:
+        # Opens (and keeps) a connection in the shared pool used for LLM, STT and TTS requests
+        await openai.with_options(max_retries=0, timeout=5.0).models.retrieve(agent.model)
+        print("🔥 OpenAI connection pool warmed up")
+    except Exception as e:
+        print("⚠️ Warmup request failed:", e)
+    try:
+        await prompts.render_all({"greeting": GREETING})
+        print("👋 Greeting audio rendered")
+    except Exception as e:
+        # Calls still work without it, Callie just waits for the caller to speak first
+        print("⚠️ Could not render greeting audio:", e)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    await warmup()
+    yield
+    await sessions.close_all()
+
 
 # 🎧 Twilio Media Stream Handler
 async def handle_twilio_stream(websocket: WebSocket):
+    rejection = await sessions.admit()
+    if rejection is not None:
+        # 🚦 Full or shutting down: say why and hang up right away so the call goes elsewhere
+        print(f"🚦 Rejecting call: {rejection}")
+        await websocket.accept()
+        await websocket.close(code=1013, reason=rejection)
+        return
+
+    try:
+        await serve_call(websocket)
+    finally:
+        sessions.release()
+
+
+async def serve_call(websocket: WebSocket):
     await websocket.accept()
     print("📞 Twilio stream connected")
 
-    audio_chunks = []
+    session = None
 
     try:
         while True:
-            message = await websocket.receive_text()
-            data = json.loads(message)
-
-            if data.get("event") == "media":
-                chunk_b64 = data["media"]["payload"]
-                audio_chunk = base64.b64decode(chunk_b64)
-                audio_chunks.append(audio_chunk)
-
-            elif data.get("event") == "stop":
+            message = parse_message(await websocket.receive_text())
+
+            if isinstance(message, MediaFrame):
+                if session is None:
+                    continue
+                session.touch()
+                session.jitter.push(message)
+                continue
+
+            event = message.get("event")
+            if event == "mark":
+                if session is not None:
+                    session.sender.on_mark(message["mark"]["name"])
+
+            elif event == "start":
+                stream_sid = message["start"]["streamSid"]
+                print(f"▶️ Stream started: {stream_sid}")
+                session = await sessions.open(stream_sid, websocket)
+                greeting = prompts.get("greeting")
+                if greeting:
+                    session.sender.send_frames(greeting)
+                    session.sender.send_mark("greeting-end")
+
+            elif event == "stop":
                 print("📴 Stream ended")
                 break
 
     except WebSocketDisconnect:
         print("🔌 WebSocket disconnected")
 
-    raw_audio = b''.join(audio_chunks)
+    finally:
+        if session is not None:
+            await sessions.close(session.stream_sid)
 
-    try:
-        buffer = AudioInput.from_raw_bytes(raw_audio, sample_rate=8000)
-        print("🧠 Running Callie pipeline on received audio...")
 
-        result = await pipeline.run(buffer)
+# 📊 This worker's load. Answers 503 when it can't take another call, so a load balancer health
+# check routes around it.
+async def load_status(request: Request):
+    return JSONResponse(sessions.load(), status_code=200 if sessions.has_capacity else 503)
 
-        async for event in result.stream():
-            if event.type == "voice_stream_event_audio":
-                print("🎤 Callie is speaking...")
 
-    except Exception as e:
-        print("❌ Error during audio processing:", e)
+# 📶 Inbound audio quality of every call on this worker: jitter buffer depth, loss and so on
+async def call_stats(request: Request):
+    return JSONResponse(sessions.calls())
+
+
+# 📈 Per-stage turn latency histograms for Prometheus to scrape
+async def metrics(request: Request):
+    return Response(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 
-# 🌐 WebSocket Route
+# 🌐 Routes
 routes = [
-    WebSocketRoute("/media", handle_twilio_stream)
+    WebSocketRoute("/media", handle_twilio_stream),
+    Route("/load", load_status),
+    Route("/calls", call_stats),
+    Route("/metrics", metrics),
 ]
 
-app = Starlette(debug=True, routes=routes)
+app = Starlette(debug=os.getenv("CALLIE_DEBUG") == "1", routes=routes, lifespan=lifespan)
@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import binascii
+import json
+import logging
+import math
+import time
+from typing import NamedTuple
+
+from starlette.websockets import WebSocket, WebSocketDisconnect, WebSocketState
+
+from agents.voice import StreamedAudioResult
+from latency_metrics import TurnLatency
+
+# ⚡ orjson parses a media message about 3x faster than the stdlib; it's optional
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# 📏 Twilio media streams are 8 kHz mono mu-law, played out in 20 ms frames
+TWILIO_SAMPLE_RATE = 8000
+FRAME_DURATION_MS = 20
+FRAME_SIZE = TWILIO_SAMPLE_RATE * FRAME_DURATION_MS // 1000  # bytes per frame (1 byte per sample)
+MULAW_SILENCE = b"\xff"
+
+# 📍 Drop a mark every this many frames so we learn how far playback has got
+MARK_INTERVAL_FRAMES = 10
+
+# ⏩ How far ahead of real-time playback we let Twilio's buffer get. Enough to ride out network
+# jitter, small enough that a barge-in only has this much audio to clear on Twilio's side.
+PACER_LEAD_MS = 100
+
+# 🧯 How much of Callie's audio we queue for the writer before we stop reading more from the
+# pipeline. Past this, the pipeline pauses synthesis instead of us holding whole replies in memory.
+OUTBOX_MAX_MS = 2000
+
+TTS_SAMPLE_RATE = 24000
+
+# 📦 Have the pipeline hand us audio exactly as Twilio wants it, converted in one pass
+TWILIO_OUTPUT_FORMAT = {
+    "output_sample_rate": TWILIO_SAMPLE_RATE,
+    "output_encoding": "mulaw",
+    "frame_duration_ms": FRAME_DURATION_MS,
+}
+
+_MEDIA_PREFIX = '{"event":"media"'
+_PAYLOAD_KEY = '"payload":"'
+_TIMESTAMP_KEY = '"timestamp":"'
+_SEQUENCE_KEY = '"sequenceNumber":"'
+
+
+class MediaFrame(NamedTuple):
+    """An inbound Twilio `media` message, already base64-decoded."""
+
+    payload: bytes
+    timestamp: int | None
+    sequence_number: int | None
+
+
+def _scan_field(message: str, key: str) -> int | None:
+    start = message.find(key)
+    if start < 0:
+        return None
+    start += len(key)
+    return int(message[start : message.index('"', start)])
+
+
+def parse_message(message: str) -> MediaFrame | dict:
+    """Parse one message from a Twilio media stream.
+
+    About 50 of these arrive per second per call, almost all of them `media`, so media messages
+    get a fast path. With orjson installed the whole message is parsed with it. Without it, media
+    messages are recognised by their prefix and their fields are sliced straight out of the text,
+    which is roughly twice as fast as `json.loads`. Every other event returns the parsed dict.
+    """
+    if orjson is not None:
+        data = orjson.loads(message)
+        if data.get("event") == "media":
+            media = data["media"]
+            return MediaFrame(
+                binascii.a2b_base64(media["payload"]),
+                int(media["timestamp"]) if "timestamp" in media else None,
+                int(data["sequenceNumber"]) if "sequenceNumber" in data else None,
+            )
+        return data
+
+    if message.startswith(_MEDIA_PREFIX):
+        # Payload is at the end of the message and base64 never contains a quote
+        start = message.rfind(_PAYLOAD_KEY)
+        if start >= 0:
+            start += len(_PAYLOAD_KEY)
+            return MediaFrame(
+                binascii.a2b_base64(message[start : message.index('"', start)]),
+                _scan_field(message, _TIMESTAMP_KEY),
+                _scan_field(message, _SEQUENCE_KEY),
+            )
+
+    data = json.loads(message)
+    if data.get("event") == "media":
+        media = data["media"]
+        return MediaFrame(
+            base64.b64decode(media["payload"]),
+            int(media["timestamp"]) if "timestamp" in media else None,
+            int(data["sequenceNumber"]) if "sequenceNumber" in data else None,
+        )
+    return data
+
+
+class TwilioMediaSender:
+    """Owns the outbound side of a Twilio media stream websocket.
+
+    Every message goes through one queue drained by one writer task, so frames from different
+    turns can never interleave on the wire. The writer paces media in real time: each 20 ms frame
+    is scheduled against a monotonic playback clock and written at most `lead_ms` before it is
+    due to play, however burstily the TTS model produces audio. Unsent audio therefore stays in
+    our queue, where a barge-in can drop it for free, and the clock tells us what the caller has
+    heard so far. Twilio echoes each `mark` back once the audio before it has been played, which
+    confirms it.
+    """
+
+    def __init__(self, websocket: WebSocket, lead_ms: int = PACER_LEAD_MS):
+        self.websocket = websocket
+        self.stream_sid: str | None = None
+        self.lead = lead_ms / 1000
+        self.frames_sent = 0
+        self.frames_written = 0
+        self.frames_played = 0
+        self._mark_positions: dict[str, int] = {}
+        self._mark_counter = 0
+        # Each entry is (message, is_media_frame)
+        self._outbox: asyncio.Queue[tuple[str, bool]] = asyncio.Queue()
+        self._writer_task: asyncio.Task | None = None
+        # When the last written frame finishes playing, on the time.monotonic() clock
+        self._playback_end = 0.0
+        # Set whenever frames leave the outbox, for wait_for_room()
+        self._drained = asyncio.Event()
+        self._closed = False
+
+    def start(self, stream_sid: str):
+        self.stream_sid = stream_sid
+        if self._writer_task is None:
+            self._writer_task = asyncio.create_task(self._write_loop())
+            # If the writer dies (e.g. the websocket went away), don't leave anyone waiting on it
+            self._writer_task.add_done_callback(lambda _: self._drained.set())
+
+    async def _write_loop(self):
+        frame_duration = FRAME_DURATION_MS / 1000
+        while True:
+            message, is_frame = await self._outbox.get()
+            if is_frame:
+                # After a gap in the audio, playback restarts from now
+                plays_at = max(self._playback_end, time.monotonic())
+                delay = plays_at - self.lead - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self._playback_end = plays_at + frame_duration
+                self.frames_written += 1
+                self._drained.set()
+            try:
+                await self.websocket.send_text(message)
+            except (WebSocketDisconnect, RuntimeError) as e:
+                # 📴 The caller hung up while we were still talking: that's a normal end of call
+                if isinstance(e, WebSocketDisconnect) or self._closed or not self.is_connected:
+                    logger.debug("Twilio websocket closed, stopping writer (%s)", self.stream_sid)
+                    return
+                raise
+
+    @property
+    def is_connected(self) -> bool:
+        return (
+            self.websocket.client_state == WebSocketState.CONNECTED
+            and self.websocket.application_state == WebSocketState.CONNECTED
+        )
+
+    def send_frames(self, frames: list[bytes]):
+        """Queue a batch of mu-law frames. The batch is queued in one go so it stays contiguous."""
+        # The envelope is fixed, so build the JSON by hand instead of serializing a dict per frame
+        prefix = f'{{"event":"media","streamSid":"{self.stream_sid}","media":{{"payload":"'
+        for frame in frames:
+            self._outbox.put_nowait(
+                (f'{prefix}{base64.b64encode(frame).decode("ascii")}"}}}}', True)
+            )
+            self.frames_sent += 1
+            if self.frames_sent % MARK_INTERVAL_FRAMES == 0:
+                self.send_mark()
+
+    async def wait_for_room(self, max_queued_ms: int = OUTBOX_MAX_MS):
+        """Wait until no more than `max_queued_ms` of audio is waiting for the writer."""
+        max_frames = max_queued_ms // FRAME_DURATION_MS
+        while self.frames_sent - self.frames_written > max_frames:
+            if self._closed or (self._writer_task and self._writer_task.done()):
+                return
+            self._drained.clear()
+            await self._drained.wait()
+
+    def send_mark(self, name: str | None = None) -> str:
+        if name is None:
+            self._mark_counter += 1
+            name = f"frame-{self._mark_counter}"
+        self._mark_positions[name] = self.frames_sent
+        self._outbox.put_nowait(
+            (
+                json.dumps({"event": "mark", "streamSid": self.stream_sid, "mark": {"name": name}}),
+                False,
+            )
+        )
+        return name
+
+    def on_mark(self, name: str):
+        """Called when Twilio echoes a mark back, i.e. playback has reached it."""
+        position = self._mark_positions.pop(name, None)
+        if position is not None:
+            self.frames_played = max(self.frames_played, position)
+
+    @property
+    def frames_heard(self) -> int:
+        """Frames the caller has heard by now, from the playback clock, never behind the marks."""
+        ahead = math.ceil(
+            max(0.0, self._playback_end - time.monotonic()) * 1000 / FRAME_DURATION_MS
+        )
+        return max(self.frames_played, self.frames_written - ahead)
+
+    @property
+    def playback_position_ms(self) -> int:
+        return self.frames_heard * FRAME_DURATION_MS
+
+    @property
+    def is_playing(self) -> bool:
+        """Whether Twilio still has audio of ours that it hasn't confirmed playing."""
+        return self.frames_sent > self.frames_played
+
+    def _drop_queued(self):
+        while not self._outbox.empty():
+            self._outbox.get_nowait()
+
+    def send_clear(self):
+        """Drop everything not yet played: our own unsent messages and Twilio's playback buffer."""
+        heard = self.frames_heard
+        self._drop_queued()
+        # Audio that was cleared was never heard, so it no longer counts as sent, and marks that
+        # Twilio echoes back because of the clear say nothing about playback.
+        self._mark_positions.clear()
+        self.frames_sent = self.frames_written = self.frames_played = heard
+        self._playback_end = time.monotonic()
+        self._drained.set()
+        self._outbox.put_nowait(
+            (json.dumps({"event": "clear", "streamSid": self.stream_sid}), False)
+        )
+
+    async def close(self):
+        if self._writer_task is None:
+            return
+        # The caller is gone, so there is no one left to play the rest to
+        self._closed = True
+        self._drained.set()
+        self._drop_queued()
+        self._writer_task.cancel()
+        try:
+            await self._writer_task
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            logger.exception("Error writing to Twilio (%s)", self.stream_sid)
+
+
+async def bridge_result(
+    result: StreamedAudioResult, sender: TwilioMediaSender, latency: TurnLatency | None = None
+):
+    """Send everything Callie says back to the caller as Twilio media frames.
+
+    The pipeline is set up to return 20 ms, 8 kHz mu-law frames (see `TWILIO_OUTPUT_FORMAT`), so
+    each audio event is sent as it is.
+    """
+    turn = 0
+    async for event in result.stream():
+        if event.type == "voice_stream_event_audio" and event.data is not None:
+            frames = [frame.tobytes() for frame in event.data]
+            sender.send_frames(frames)
+            if frames and latency:
+                latency.first_frame_sent()
+            # ⏳ Read on only as fast as the caller hears it, so the pipeline holds the rest back
+            await sender.wait_for_room()
+        elif event.type == "voice_stream_event_lifecycle":
+            if event.event == "turn_started":
+                if latency:
+                    latency.turn_started(event.timings)
+                turn += 1
+                print(f"🎤 Callie is speaking (turn {turn})...")
+            elif event.event == "turn_ended":
+                sender.send_mark(f"turn-{turn}-end")
+            elif event.event == "turn_interrupted":
+                print(f"✋ Callie was interrupted (turn {turn})")
+
+
+async def barge_in(result: StreamedAudioResult, sender: TwilioMediaSender) -> bool:
+    """Stop Callie mid-sentence: cancel the rest of the turn and flush Twilio's playback.
+
+    Returns whether there was anything to stop. A response counts as active from its first text
+    until its last frame has played, including the gaps between TTS segments when nothing is
+    playing yet.
+    """
+    interrupted = await result.interrupt()
+    if not interrupted and not sender.is_playing:
+        return False
+    sender.send_clear()
+    return True